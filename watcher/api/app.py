@@ -67,4 +67,7 @@ def setup_app(config=None):
         **app_conf
     )
 
+    if CONF.api.enable_response_cache:
+        app = middleware.ResponseCacheMiddleware(app)
+
     return acl.install(app, CONF, config.app.acl_public_routes)
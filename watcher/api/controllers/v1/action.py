@@ -148,10 +148,6 @@ class Action(base.APIBase):
 
         self.fields = []
         fields = list(objects.Action.fields)
-        # audit_template_uuid is not part of objects.Audit.fields
-        # because it's an API-only attribute.
-        fields.append('action_plan_uuid')
-        fields.append('next_uuid')
         for field in fields:
             # Skip fields we do not expose.
             if not hasattr(self, field):
@@ -159,11 +155,26 @@ class Action(base.APIBase):
             self.fields.append(field)
             setattr(self, field, kwargs.get(field, wtypes.Unset))
 
+        # action_plan_uuid and next_uuid are not part of objects.Action.fields
+        # because they're API-only attributes.
+        self.fields.append('action_plan_uuid')
+        self.fields.append('next_uuid')
         self.fields.append('action_plan_id')
-        setattr(self, 'action_plan_uuid', kwargs.get('action_plan_id',
-                wtypes.Unset))
-        setattr(self, 'next_uuid', kwargs.get('next',
-                wtypes.Unset))
+        # the uuids are given when they are looked up for a whole collection
+        if 'action_plan_uuid' in kwargs:
+            self._action_plan_uuid = kwargs['action_plan_uuid']
+            if self._action_plan_uuid:
+                self.action_plan_id = kwargs.get('action_plan_id')
+        else:
+            setattr(self, 'action_plan_uuid', kwargs.get('action_plan_id',
+                    wtypes.Unset))
+        if 'next_uuid' in kwargs:
+            self._next_uuid = kwargs['next_uuid']
+            if self._next_uuid:
+                self.next = kwargs.get('next')
+        else:
+            setattr(self, 'next_uuid', kwargs.get('next',
+                    wtypes.Unset))
 
     @staticmethod
     def _convert_with_links(action, url, expand=True):
@@ -181,8 +192,12 @@ class Action(base.APIBase):
         return action
 
     @classmethod
-    def convert_with_links(cls, action, expand=True):
-        action = Action(**action.as_dict())
+    def convert_with_links(cls, action, expand=True, **related):
+        """Convert an action, with the related uuids if already looked up
+
+        :param related: the action_plan_uuid and next_uuid of the action
+        """
+        action = Action(**dict(action.as_dict(), **related))
         return cls._convert_with_links(action, pecan.request.host_url, expand)
 
     @classmethod
@@ -213,8 +228,28 @@ class ActionCollection(collection.Collection):
                            **kwargs):
 
         collection = ActionCollection()
-        collection.actions = [Action.convert_with_links(p, expand)
-                              for p in actions]
+        context = pecan.request.context
+        # the uuids of the action plans and of the next actions of the
+        # page are looked up at once
+        action_plan_uuids = dict(
+            (action_plan.id, action_plan.uuid) for action_plan in
+            objects.ActionPlan.list_by_ids(
+                context, [p.action_plan_id for p in actions
+                          if p.action_plan_id]))
+        next_uuids = dict(
+            (action.id, action.uuid) for action in
+            objects.Action.list_by_ids(
+                context, [p.next for p in actions if p.next]))
+        collection.actions = []
+        for p in actions:
+            related = {}
+            if p.action_plan_id:
+                related['action_plan_uuid'] = action_plan_uuids.get(
+                    p.action_plan_id)
+            if p.next:
+                related['next_uuid'] = next_uuids.get(p.next)
+            collection.actions.append(
+                Action.convert_with_links(p, expand, **related))
 
         if 'sort_key' in kwargs:
             reverse = False
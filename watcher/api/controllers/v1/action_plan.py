@@ -191,9 +191,20 @@ class ActionPlan(base.APIBase):
         self.fields.append('audit_uuid')
         self.fields.append('first_action_uuid')
 
-        setattr(self, 'audit_uuid', kwargs.get('audit_id', wtypes.Unset))
-        setattr(self, 'first_action_uuid',
-                kwargs.get('first_action_id', wtypes.Unset))
+        # the uuids are given when they are looked up for a whole collection
+        if 'audit_uuid' in kwargs:
+            self._audit_uuid = kwargs['audit_uuid']
+            if self._audit_uuid:
+                self.audit_id = kwargs.get('audit_id')
+        else:
+            setattr(self, 'audit_uuid', kwargs.get('audit_id', wtypes.Unset))
+        if 'first_action_uuid' in kwargs:
+            self._first_action_uuid = kwargs['first_action_uuid']
+            if self._first_action_uuid:
+                self.first_action_id = kwargs.get('first_action_id')
+        else:
+            setattr(self, 'first_action_uuid',
+                    kwargs.get('first_action_id', wtypes.Unset))
 
     @staticmethod
     def _convert_with_links(action_plan, url, expand=True):
@@ -212,8 +223,14 @@ class ActionPlan(base.APIBase):
         return action_plan
 
     @classmethod
-    def convert_with_links(cls, rpc_action_plan, expand=True):
-        action_plan = ActionPlan(**rpc_action_plan.as_dict())
+    def convert_with_links(cls, rpc_action_plan, expand=True, **related):
+        """Convert an action plan, with the related uuids if looked up
+
+        :param related: the audit_uuid and first_action_uuid of the action
+                        plan
+        """
+        action_plan = ActionPlan(**dict(rpc_action_plan.as_dict(),
+                                        **related))
         return cls._convert_with_links(action_plan, pecan.request.host_url,
                                        expand)
 
@@ -242,8 +259,28 @@ class ActionPlanCollection(collection.Collection):
     def convert_with_links(rpc_action_plans, limit, url=None, expand=False,
                            **kwargs):
         collection = ActionPlanCollection()
-        collection.action_plans = [ActionPlan.convert_with_links(
-            p, expand) for p in rpc_action_plans]
+        context = pecan.request.context
+        # the uuids of the audits and of the first actions of the page are
+        # looked up at once
+        audit_uuids = dict(
+            (audit.id, audit.uuid) for audit in objects.Audit.list_by_ids(
+                context, [p.audit_id for p in rpc_action_plans
+                          if p.audit_id]))
+        first_action_uuids = dict(
+            (action.id, action.uuid) for action in
+            objects.Action.list_by_ids(
+                context, [p.first_action_id for p in rpc_action_plans
+                          if p.first_action_id]))
+        collection.action_plans = []
+        for p in rpc_action_plans:
+            related = {}
+            if p.audit_id:
+                related['audit_uuid'] = audit_uuids.get(p.audit_id)
+            if p.first_action_id:
+                related['first_action_uuid'] = first_action_uuids.get(
+                    p.first_action_id)
+            collection.action_plans.append(
+                ActionPlan.convert_with_links(p, expand, **related))
 
         if 'sort_key' in kwargs:
             reverse = False
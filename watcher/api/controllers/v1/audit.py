@@ -165,11 +165,17 @@ class Audit(base.APIBase):
         # audit_template_uuid & audit_template_name are not part of
         # objects.Audit.fields because they're API-only attributes.
         fields.append('audit_template_uuid')
-        setattr(self, 'audit_template_uuid', kwargs.get('audit_template_id',
-                wtypes.Unset))
         fields.append('audit_template_name')
-        setattr(self, 'audit_template_name', kwargs.get('audit_template_id',
-                wtypes.Unset))
+        # the audit template is given when it is looked up for a whole
+        # collection
+        if 'audit_template_uuid' in kwargs:
+            self._audit_template_uuid = kwargs['audit_template_uuid']
+            self._audit_template_name = kwargs.get('audit_template_name')
+        else:
+            setattr(self, 'audit_template_uuid',
+                    kwargs.get('audit_template_id', wtypes.Unset))
+            setattr(self, 'audit_template_name',
+                    kwargs.get('audit_template_id', wtypes.Unset))
 
     @staticmethod
     def _convert_with_links(audit, url, expand=True):
@@ -192,8 +198,13 @@ class Audit(base.APIBase):
         return audit
 
     @classmethod
-    def convert_with_links(cls, rpc_audit, expand=True):
-        audit = Audit(**rpc_audit.as_dict())
+    def convert_with_links(cls, rpc_audit, expand=True, **related):
+        """Convert an audit, with its audit template if already looked up
+
+        :param related: the audit_template_uuid and audit_template_name of
+                        the audit
+        """
+        audit = Audit(**dict(rpc_audit.as_dict(), **related))
         return cls._convert_with_links(audit, pecan.request.host_url, expand)
 
     @classmethod
@@ -223,8 +234,24 @@ class AuditCollection(collection.Collection):
     def convert_with_links(rpc_audits, limit, url=None, expand=False,
                            **kwargs):
         collection = AuditCollection()
-        collection.audits = [Audit.convert_with_links(p, expand)
-                             for p in rpc_audits]
+        # the audit templates of the page are looked up at once
+        audit_templates = dict(
+            (audit_template.id, audit_template) for audit_template in
+            objects.AuditTemplate.list_by_ids(
+                pecan.request.context,
+                [p.audit_template_id for p in rpc_audits
+                 if p.audit_template_id]))
+        collection.audits = []
+        for p in rpc_audits:
+            related = {}
+            if p.audit_template_id:
+                audit_template = audit_templates.get(p.audit_template_id)
+                related['audit_template_uuid'] = getattr(
+                    audit_template, 'uuid', None)
+                related['audit_template_name'] = getattr(
+                    audit_template, 'name', None)
+            collection.audits.append(
+                Audit.convert_with_links(p, expand, **related))
 
         if 'sort_key' in kwargs:
             reverse = False
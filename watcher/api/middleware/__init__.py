@@ -16,10 +16,13 @@
 
 from watcher.api.middleware import auth_token
 from watcher.api.middleware import parsable_error
+from watcher.api.middleware import response_cache
 
 
 ParsableErrorMiddleware = parsable_error.ParsableErrorMiddleware
 AuthTokenMiddleware = auth_token.AuthTokenMiddleware
+ResponseCacheMiddleware = response_cache.ResponseCacheMiddleware
 
 __all__ = (ParsableErrorMiddleware,
-           AuthTokenMiddleware)
+           AuthTokenMiddleware,
+           ResponseCacheMiddleware)
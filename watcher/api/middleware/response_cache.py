@@ -0,0 +1,149 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Middleware serving the GET requests of the read-mostly resources of the
+API from a cache of their serialized responses.
+
+The responses are keyed by URL, Accept header and the identity headers
+the request context is built from. They are returned with an ETag and a
+Last-Modified header, so that the conditional requests of the clients
+polling them are answered with 304 Not Modified.
+
+The entries are invalidated as soon as the objects they are built from
+are written through the objects layer of this process. The writes done
+by other processes are seen once the entries expire.
+"""
+
+import collections
+import hashlib
+import threading
+import time
+
+from oslo_config import cfg
+import webob
+
+from watcher.common import cache
+from watcher.objects import action_plan as action_plan_objects
+from watcher.objects import base as objects_base
+
+RESPONSE_CACHE_OPTS = [
+    cfg.BoolOpt('enable_response_cache',
+                default=True,
+                help='Cache the responses of the goals, the audit '
+                     'templates and the finished action plans'),
+    cfg.IntOpt('response_cache_ttl',
+               default=30,
+               help='Number of seconds a cached response is served, which '
+                    'bounds how long the writes done by other processes '
+                    'can be missed'),
+    cfg.IntOpt('response_cache_size',
+               default=1000,
+               help='Maximum number of cached responses'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(RESPONSE_CACHE_OPTS, 'api')
+
+# the classes of the objects the cached resources are built from
+RESOURCES = {
+    'goals': [],
+    'audit_templates': ['AuditTemplate'],
+    'action_plans': ['ActionPlan', 'Action', 'Audit'],
+}
+
+# the headers the request context, and thus the policy, depends on
+CONTEXT_HEADERS = ['X-User', 'X-User-Id', 'X-Project-Name', 'X-Project-Id',
+                   'X-User-Domain-Id', 'X-User-Domain-Name', 'X-Roles',
+                   'X-Show-Deleted']
+
+FINISHED_ACTION_PLAN_STATES = [
+    action_plan_objects.State.SUCCEEDED,
+    action_plan_objects.State.FAILED,
+    action_plan_objects.State.CANCELLED,
+    action_plan_objects.State.DELETED,
+]
+
+# the number of writes of each object class, part of the cache keys so
+# that a write makes the entries built before it unreachable
+_generations = collections.defaultdict(int)
+_generations_lock = threading.Lock()
+
+
+def _invalidate(obj_name):
+    with _generations_lock:
+        _generations[obj_name] += 1
+
+
+class ResponseCacheMiddleware(object):
+    """Serve the read-mostly resources from a cache of their responses."""
+
+    def __init__(self, app):
+        self.app = app
+        self.cache = cache.TTLCache(CONF.api.response_cache_ttl,
+                                    CONF.api.response_cache_size)
+        objects_base.add_write_listener(_invalidate)
+
+    @staticmethod
+    def _get_resource(request):
+        parts = request.path_info.strip('/').split('/')
+        if len(parts) > 1 and parts[0] == 'v1' and parts[1] in RESOURCES:
+            return parts[1]
+
+    @staticmethod
+    def _get_key(request, resource):
+        return (request.url, request.headers.get('Accept'),
+                tuple(request.headers.get(header)
+                      for header in CONTEXT_HEADERS),
+                tuple(_generations[obj_name]
+                      for obj_name in RESOURCES[resource]))
+
+    @staticmethod
+    def _is_cacheable(resource, response):
+        if response.status_int != 200:
+            return False
+        if resource != 'action_plans':
+            return True
+        # new action plans are created and run by the other services, only
+        # the finished ones do not change anymore
+        if response.content_type != 'application/json':
+            return False
+        try:
+            state = response.json.get('state')
+        except (ValueError, AttributeError):
+            return False
+        return state in FINISHED_ACTION_PLAN_STATES
+
+    def __call__(self, environ, start_response):
+        request = webob.Request(environ)
+        resource = self._get_resource(request)
+        if request.method != 'GET' or resource is None:
+            return self.app(environ, start_response)
+
+        key = self._get_key(request, resource)
+        entry = self.cache.get(key)
+        if entry is None:
+            response = request.get_response(self.app)
+            if not self._is_cacheable(resource, response):
+                return response(environ, start_response)
+            entry = (response.body, response.headers['Content-Type'],
+                     hashlib.md5(response.body).hexdigest(),
+                     int(time.time()))
+            self.cache.set(key, entry)
+
+        body, content_type, etag, last_modified = entry
+        response = webob.Response(body=body, conditional_response=True)
+        response.headers['Content-Type'] = content_type
+        response.etag = etag
+        response.last_modified = last_modified
+        return response(environ, start_response)
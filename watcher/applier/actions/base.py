@@ -41,7 +41,7 @@ class BaseAction(object):
     @property
     def osc(self):
         if not self._osc:
-            self._osc = clients.OpenStackClients()
+            self._osc = clients.get_clients()
         return self._osc
 
     @property
@@ -56,6 +56,48 @@ class BaseAction(object):
     def resource_id(self):
         return self.input_parameters[self.RESOURCE_ID]
 
+    @property
+    def hypervisors(self):
+        """The hypervisors affected by the action
+
+        The workflow engine may run at the same time the actions affecting
+        distinct hypervisors. An action returning None, the default, is
+        run after all the previous actions and before all the next ones.
+        """
+        return None
+
+    @property
+    def exclusive(self):
+        """Whether the action must be run alone on its hypervisors
+
+        An exclusive action waits for the previous actions affecting its
+        hypervisors, and the next ones wait for it.
+        """
+        return True
+
+    @property
+    def instances(self):
+        """The ids of the instances whose state the preconditions need
+
+        They are fetched at once for all the actions of the action plan.
+        """
+        return []
+
+    def check_preconditions(self, cluster):
+        """Check the action against the predicted state of the cluster
+
+        Called, before the action plan is executed, for all its actions
+        in order. An action whose preconditions are met updates the
+        cluster with its effect.
+
+        :param cluster: a ClusterSnapshot
+        :returns: False if the effect of the action is already there, e.g.
+            when a resumed action plan re-runs an action which succeeded,
+            so that it is not executed again, True otherwise.
+        :raises: ActionPreconditionFailed
+        """
+        return True
+
     @abc.abstractmethod
     def execute(self):
         raise NotImplementedError()
@@ -50,6 +50,22 @@ class ChangeNovaServiceState(base.BaseAction):
     def state(self):
         return self.input_parameters.get(self.STATE)
 
+    @property
+    def hypervisors(self):
+        return [self.host]
+
+    def check_preconditions(self, cluster):
+        if self.state not in (hstate.HypervisorState.ONLINE.value,
+                              hstate.HypervisorState.OFFLINE.value):
+            raise exception.ActionPreconditionFailed(
+                reason=_("The target state is not defined"))
+        if not cluster.has_service(self.host):
+            raise exception.ActionPreconditionFailed(
+                reason=_("no nova-compute service on %s") % self.host)
+        cluster.set_service_enabled(
+            self.host, self.state == hstate.HypervisorState.ONLINE.value)
+        return True
+
     def execute(self):
         target_state = None
         if self.state == hstate.HypervisorState.OFFLINE.value:
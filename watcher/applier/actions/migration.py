@@ -35,6 +35,7 @@ class Migrate(base.BaseAction):
     # input parameters constants
     MIGRATION_TYPE = 'migration_type'
     LIVE_MIGRATION = 'live'
+    NON_LIVE_MIGRATION = 'non_live'
     DST_HYPERVISOR = 'dst_hypervisor'
     SRC_HYPERVISOR = 'src_hypervisor'
 
@@ -51,7 +52,8 @@ class Migrate(base.BaseAction):
             voluptuous.Required(self.RESOURCE_ID): self.check_resource_id,
             voluptuous.Required(self.MIGRATION_TYPE,
                                 default=self.LIVE_MIGRATION):
-                                    voluptuous.Any(*[self.LIVE_MIGRATION]),
+                                    voluptuous.Any(self.LIVE_MIGRATION,
+                                                   self.NON_LIVE_MIGRATION),
             voluptuous.Required(self.DST_HYPERVISOR):
                 voluptuous.All(voluptuous.Any(*six.string_types),
                                voluptuous.Length(min=1)),
@@ -76,15 +78,53 @@ class Migrate(base.BaseAction):
     def src_hypervisor(self):
         return self.input_parameters.get(self.SRC_HYPERVISOR)
 
+    @property
+    def hypervisors(self):
+        return [self.src_hypervisor, self.dst_hypervisor]
+
+    @property
+    def exclusive(self):
+        # several migrations may run from or to the same hypervisor
+        return False
+
+    @property
+    def instances(self):
+        return [self.instance_uuid]
+
+    def check_preconditions(self, cluster):
+        host = cluster.get_instance_host(self.instance_uuid)
+        if host is None:
+            raise exception.ActionPreconditionFailed(
+                reason=_("instance %s not found") % self.instance_uuid)
+        if host == self.dst_hypervisor:
+            # already migrated, e.g. by the previous run of a resumed plan
+            return False
+        if host != self.src_hypervisor:
+            raise exception.ActionPreconditionFailed(
+                reason=_("instance %(instance)s is on %(host)s instead of "
+                         "%(src)s") % {'instance': self.instance_uuid,
+                                       'host': host,
+                                       'src': self.src_hypervisor})
+        if not cluster.is_service_available(self.dst_hypervisor):
+            raise exception.ActionPreconditionFailed(
+                reason=_("the nova-compute service of %s is not enabled "
+                         "and up") % self.dst_hypervisor)
+        cluster.set_instance_host(self.instance_uuid, self.dst_hypervisor)
+        return True
+
     def migrate(self, destination):
         nova = nova_helper.NovaHelper(osc=self.osc)
         LOG.debug("Migrate instance %s to %s", self.instance_uuid,
                   destination)
         instance = nova.find_instance(self.instance_uuid)
         if instance:
-            if self.migration_type == 'live':
+            if self.migration_type == self.LIVE_MIGRATION:
                 return nova.live_migrate_instance(
                     instance_id=self.instance_uuid, dest_hostname=destination)
+            elif self.migration_type == self.NON_LIVE_MIGRATION:
+                # the instance is rebuilt on the destination with a new id
+                return nova.watcher_non_live_migrate_instance(
+                    instance_id=self.instance_uuid, hypervisor_id=destination)
             else:
                 raise exception.Invalid(
                     message=(_('Migration of type %(migration_type)s is not '
@@ -19,7 +19,9 @@
 from oslo_config import cfg
 from oslo_log import log
 
+from watcher._i18n import _LI
 from watcher.applier import base
+from watcher.applier import precondition
 from watcher.applier.workflow_engine.loading import default
 from watcher import objects
 
@@ -34,6 +36,7 @@ class DefaultApplier(base.BaseApplier):
         self._loader = default.DefaultWorkFlowEngineLoader()
         self._engine = None
         self._context = context
+        self._validator = precondition.ActionPlanValidator(context)
 
     @property
     def context(self):
@@ -43,6 +46,10 @@ class DefaultApplier(base.BaseApplier):
     def applier_manager(self):
         return self._applier_manager
 
+    @property
+    def validator(self):
+        return self._validator
+
     @property
     def engine(self):
         if self._engine is None:
@@ -61,4 +68,15 @@ class DefaultApplier(base.BaseApplier):
         # todo(jed) remove direct access to dbapi need filter in object
         filters = {'action_plan_id': action_plan.id}
         actions = objects.Action.dbapi.get_action_list(self.context, filters)
-        return self.engine.execute(actions)
+        # when the action plan is resumed after a restart of the applier,
+        # the actions which already succeeded are not executed again
+        pending = [action for action in actions
+                   if action.state != objects.action.State.SUCCEEDED]
+        if len(pending) < len(actions):
+            LOG.info(_LI("Resuming action plan %(action_plan)s, "
+                         "%(done)d of %(total)d actions already succeeded"),
+                     {'action_plan': action_plan_uuid,
+                      'done': len(actions) - len(pending),
+                      'total': len(actions)})
+        pending = self.validator.validate(action_plan_uuid, pending)
+        return self.engine.execute(pending)
@@ -17,10 +17,13 @@
 # limitations under the License.
 #
 
+import os
+
 from oslo_config import cfg
 from oslo_log import log
 
 from watcher.applier.messaging import trigger
+from watcher.common import context
 from watcher.common.messaging import messaging_core
 
 LOG = log.getLogger(__name__)
@@ -53,7 +56,18 @@ APPLIER_MANAGER_OPTS = [
     cfg.StrOpt('workflow_engine',
                default='taskflow',
                required=True,
-               help='Select the engine to use to execute the workflow')
+               help='Select the engine to use to execute the workflow'),
+    cfg.FloatOpt('claim_interval',
+                 default=10.0,
+                 help='Number of seconds between two lookups, by an '
+                      'applier with a free worker, of the action plans '
+                      'left TRIGGERED because the applier which received '
+                      'them was busy'),
+    cfg.BoolOpt('resume_action_plans',
+                default=True,
+                help='Resume, when the applier starts, the action plans '
+                     'left ONGOING by a previous run. The actions which '
+                     'already succeeded are not executed again.'),
 ]
 
 opt_group = cfg.OptGroup(name='watcher_applier',
@@ -61,19 +75,38 @@ opt_group = cfg.OptGroup(name='watcher_applier',
                                'core')
 CONF.register_group(opt_group)
 CONF.register_opts(APPLIER_MANAGER_OPTS, opt_group)
+CONF.import_opt('host', 'watcher.common.service')
 
 
 class ApplierManager(messaging_core.MessagingCore):
-    def __init__(self):
+    def __init__(self, host=None):
         super(ApplierManager, self).__init__(
             CONF.watcher_applier.publisher_id,
             CONF.watcher_applier.conductor_topic,
             CONF.watcher_applier.status_topic,
             api_version=self.API_VERSION,
         )
-        self.conductor_topic_handler.add_endpoint(
-            trigger.TriggerActionPlan(self))
+        self.host = host or CONF.host
+        # identifies the applier owning the action plans it executes: the
+        # appliers running on the same host are told apart by their pid
+        self.applier_id = '%s:%d' % (self.host, os.getpid())
+        self.trigger = trigger.TriggerActionPlan(self)
+        self.conductor_topic_handler.add_endpoint(self.trigger)
+
+    def connect(self):
+        super(ApplierManager, self).connect()
+        self.trigger.start()
+
+    def disconnect(self):
+        self.trigger.stop()
+        super(ApplierManager, self).disconnect()
 
     def join(self):
         self.conductor_topic_handler.join()
         self.status_topic_handler.join()
+
+    def resume_action_plans(self):
+        if not CONF.watcher_applier.resume_action_plans:
+            return []
+        return self.trigger.resume_action_plans(
+            context.make_context(is_admin=True))
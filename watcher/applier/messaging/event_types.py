@@ -23,3 +23,4 @@ import enum
 class EventTypes(enum.Enum):
     LAUNCH_ACTION_PLAN = "launch_action_plan"
     LAUNCH_ACTION = "launch_action"
+    LAUNCH_ACTIONS = "launch_actions"
@@ -16,22 +16,86 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from concurrent import futures
+import collections
+import errno
+import os
+import threading
 
+from concurrent import futures
 from oslo_config import cfg
 from oslo_log import log
+from oslo_service import loopingcall
 
+from watcher._i18n import _LI
 from watcher.applier.action_plan import default
+from watcher.common import context as watcher_context
+from watcher import objects
+from watcher.objects import action_plan as ap_objects
 
 LOG = log.getLogger(__name__)
 CONF = cfg.CONF
 
 
 class TriggerActionPlan(object):
+    """Execute the action plans claimed by this applier
+
+    Several appliers can consume the conductor topic. An action plan is
+    executed by the applier which atomically claims it in the database,
+    so it runs exactly once. An applier whose workers are all busy
+    leaves the action plans it receives TRIGGERED: they are claimed by
+    the first applier with a free worker, either when one of its plans
+    ends or when it looks for waiting plans every claim_interval
+    seconds.
+    """
+
     def __init__(self, applier_manager):
         self.applier_manager = applier_manager
-        workers = CONF.watcher_applier.workers
-        self.executor = futures.ThreadPoolExecutor(max_workers=workers)
+        self.workers = CONF.watcher_applier.workers
+        self.executor = futures.ThreadPoolExecutor(max_workers=self.workers)
+        self._running = 0
+        self._lock = threading.Lock()
+        # the resumed action plans, already claimed, waiting for a worker
+        self._resumed = collections.deque()
+        self._claim_loop = None
+
+    @property
+    def hostname(self):
+        return self.applier_manager.applier_id
+
+    @staticmethod
+    def _is_running(pid):
+        try:
+            os.kill(pid, 0)
+        except OSError as e:
+            return e.errno != errno.ESRCH
+        return True
+
+    def _is_orphaned(self, owner):
+        """Whether the applier which claimed an action plan is gone
+
+        Only the appliers of this host can be checked.
+        """
+        if owner == self.hostname:
+            # this applier just started, e.g. in a container where the pid
+            # of the previous run is reused
+            return True
+        host, sep, pid = owner.rpartition(':')
+        if not sep or not pid.isdigit():
+            # claimed by a release which identified the appliers by host
+            return owner == self.applier_manager.host
+        return (host == self.applier_manager.host and
+                not self._is_running(int(pid)))
+
+    def _reserve_worker(self):
+        with self._lock:
+            if self._running >= self.workers:
+                return False
+            self._running += 1
+            return True
+
+    def _release_worker(self):
+        with self._lock:
+            self._running -= 1
 
     def do_launch_action_plan(self, context, action_plan_uuid):
         try:
@@ -42,9 +106,97 @@ class TriggerActionPlan(object):
         except Exception as e:
             LOG.exception(e)
 
+    def _next_resumed(self):
+        try:
+            return self._resumed.popleft()
+        except IndexError:
+            return None
+
+    def _work(self, context, action_plan_uuid=None):
+        """Execute an action plan, then the waiting ones
+
+        Runs on a reserved worker, which is released when no action plan
+        is left to claim. The resumed action plans go before the
+        TRIGGERED ones.
+        """
+        try:
+            if (action_plan_uuid is not None and
+                    not objects.ActionPlan.claim(context, action_plan_uuid,
+                                                 self.hostname)):
+                LOG.info(_LI("Action plan %s is handled by another "
+                             "applier"), action_plan_uuid)
+                action_plan_uuid = None
+            while True:
+                if action_plan_uuid is None:
+                    action_plan_uuid = self._next_resumed()
+                if action_plan_uuid is None:
+                    action_plan_uuid = objects.ActionPlan.claim_next(
+                        context, self.hostname)
+                    if action_plan_uuid is None:
+                        break
+                    # more plans may be waiting, use the other free workers
+                    if self._reserve_worker():
+                        self.executor.submit(self._work, context)
+                self.do_launch_action_plan(context, action_plan_uuid)
+                action_plan_uuid = None
+        except Exception as e:
+            LOG.exception(e)
+        finally:
+            self._release_worker()
+
     def launch_action_plan(self, context, action_plan_uuid):
         LOG.debug("Trigger ActionPlan %s", action_plan_uuid)
-        # submit
-        self.executor.submit(self.do_launch_action_plan, context,
-                             action_plan_uuid)
+        if self._reserve_worker():
+            self.executor.submit(self._work, context, action_plan_uuid)
+        else:
+            LOG.debug("All the workers are busy, action plan %s is left to "
+                      "the next free one", action_plan_uuid)
         return action_plan_uuid
+
+    def claim_action_plans(self, context):
+        """Execute the TRIGGERED action plans if a worker is free"""
+        if self._reserve_worker():
+            self.executor.submit(self._work, context)
+
+    def start(self):
+        context = watcher_context.make_context(is_admin=True)
+        interval = CONF.watcher_applier.claim_interval
+        self._claim_loop = loopingcall.FixedIntervalLoopingCall(
+            self.claim_action_plans, context)
+        self._claim_loop.start(interval=interval, initial_delay=interval)
+
+    def stop(self):
+        if self._claim_loop is not None:
+            self._claim_loop.stop()
+            self._claim_loop = None
+
+    def resume_action_plans(self, context):
+        """Launch again the action plans interrupted by a restart
+
+        The action plans still ONGOING with an applier of this host which
+        is no longer running were being executed when it stopped. They are
+        taken over, their actions which already succeeded are skipped.
+        """
+        action_plans = objects.ActionPlan.list(
+            context, filters={'state': ap_objects.State.ONGOING})
+        resumed = []
+        for action_plan in action_plans:
+            if (action_plan.hostname is None or
+                    not self._is_orphaned(action_plan.hostname)):
+                continue
+            # another applier of this host may be resuming it as well
+            if not objects.ActionPlan.claim(
+                    context, action_plan.uuid, self.hostname,
+                    states=(ap_objects.State.ONGOING,),
+                    previous_hostname=action_plan.hostname):
+                continue
+            LOG.info(_LI("Resuming action plan %s"), action_plan.uuid)
+            resumed.append(action_plan.uuid)
+        self._resumed.extend(resumed)
+        # the action plans left when all the workers are busy are run by
+        # the first worker done, before any TRIGGERED one is claimed
+        for _ in resumed:
+            if not self._reserve_worker():
+                break
+            self.executor.submit(self._work, context)
+        return resumed
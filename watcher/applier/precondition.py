@@ -0,0 +1,191 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+import voluptuous
+
+from watcher._i18n import _LI, _LW
+from watcher.applier.actions import factory
+from watcher.common import clients
+from watcher.common import exception
+from watcher.common import nova_helper
+from watcher import objects
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+PRECONDITION_OPTS = [
+    cfg.StrOpt('precondition_policy',
+               default='fail',
+               choices=['fail', 'prune', 'none'],
+               help='What to do when the preconditions of some actions of '
+                    'an action plan are no longer met when it is launched: '
+                    'fail the action plan before executing any action, '
+                    'prune (cancel) these actions and execute the others, '
+                    'or none to not check the preconditions'),
+]
+CONF.register_opts(PRECONDITION_OPTS, 'watcher_applier')
+
+
+class ClusterSnapshot(object):
+    """Predicted state of the instances and services used by a plan
+
+    The instances are fetched at once when the snapshot is built and the
+    nova-compute services with a single request, on first use. The
+    actions then update the snapshot with their effect, in the order of
+    the action plan.
+    """
+
+    def __init__(self, nova, instance_ids):
+        self.nova = nova
+        # {instance id: host}
+        self._instance_hosts = {}
+        instance_ids = set(instance_ids)
+        if instance_ids:
+            # the instances kept in cache by the previous actions of this
+            # process may have moved since
+            for instance_id, instance in nova.find_instances(
+                    instance_ids, refresh=True).items():
+                if instance is not None:
+                    self._instance_hosts[instance_id] = getattr(
+                        instance, 'OS-EXT-SRV-ATTR:host')
+        # {host: {'enabled': bool, 'up': bool}}
+        self._services = None
+
+    @property
+    def services(self):
+        if self._services is None:
+            self._services = dict(
+                (service.host, {'enabled': service.status == 'enabled',
+                                'up': service.state == 'up'})
+                for service in self.nova.get_service_list())
+        return self._services
+
+    def get_instance_host(self, instance_id):
+        """Host of an instance, None if the instance does not exist"""
+        return self._instance_hosts.get(instance_id)
+
+    def set_instance_host(self, instance_id, host):
+        self._instance_hosts[instance_id] = host
+
+    def has_service(self, host):
+        return host in self.services
+
+    def is_service_available(self, host):
+        """Whether the nova-compute service of a host is enabled and up"""
+        service = self.services.get(host)
+        return service is not None and service['enabled'] and service['up']
+
+    def set_service_enabled(self, host, enabled):
+        self.services[host]['enabled'] = enabled
+
+
+class ActionPlanValidator(object):
+    """Check the preconditions of all the actions of a plan at once
+
+    The actions are checked against the current state of the cluster
+    before any is executed, so that an action plan computed on a stale
+    cluster model does not fail halfway. The actions which cannot be
+    executed fail the action plan or are pruned, according to
+    [watcher_applier]/precondition_policy.
+    """
+
+    def __init__(self, context, osc=None):
+        self.context = context
+        self.osc = osc if osc else clients.get_clients()
+        self.action_factory = factory.ActionFactory()
+        self.report = {}
+
+    @staticmethod
+    def _reject(action_plan_uuid, db_action, reason):
+        LOG.warning(_LW("Action %(action)s of action plan %(action_plan)s "
+                        "cannot be executed: %(reason)s"),
+                    {'action': db_action.uuid,
+                     'action_plan': action_plan_uuid,
+                     'reason': reason})
+
+    def validate(self, action_plan_uuid, db_actions):
+        """Return the actions of the plan to execute
+
+        :param action_plan_uuid: the uuid of the action plan
+        :param db_actions: the actions to execute, in the plan order
+        :raises: ActionPlanPreconditionFailed with the 'fail' policy, if
+            the preconditions of some actions are not met
+        """
+        policy = CONF.watcher_applier.precondition_policy
+        if policy == 'none' or not db_actions:
+            return db_actions
+
+        start = time.time()
+        invalid = set()
+        actions = []
+        for db_action in db_actions:
+            try:
+                actions.append((db_action, self.action_factory.make_action(
+                    db_action, osc=self.osc)))
+            except voluptuous.Invalid as e:
+                self._reject(action_plan_uuid, db_action, e)
+                invalid.add(db_action.uuid)
+
+        instance_ids = set()
+        for _, action in actions:
+            instance_ids.update(action.instances)
+        cluster = ClusterSnapshot(nova_helper.NovaHelper(osc=self.osc),
+                                  instance_ids)
+
+        done = set()
+        for db_action, action in actions:
+            try:
+                if action.check_preconditions(cluster) is False:
+                    done.add(db_action.uuid)
+            except exception.ActionPreconditionFailed as e:
+                self._reject(action_plan_uuid, db_action, e)
+                invalid.add(db_action.uuid)
+
+        self.report = {'duration': time.time() - start,
+                       'actions': len(db_actions),
+                       'instances': len(instance_ids),
+                       'invalid': len(invalid),
+                       'done': len(done)}
+        LOG.info(_LI("Checked the preconditions of the %(actions)d actions "
+                     "of action plan %(action_plan)s in %(duration).3f "
+                     "seconds, %(invalid)d of them are not met and "
+                     "%(done)d of them are already done"),
+                 dict(self.report, action_plan=action_plan_uuid))
+
+        if done:
+            # e.g. the actions of a resumed plan executed by its previous
+            # run, whose state may not have been written
+            objects.Action.update_states(
+                self.context,
+                dict.fromkeys(done, objects.action.State.SUCCEEDED))
+            db_actions = [db_action for db_action in db_actions
+                          if db_action.uuid not in done]
+        if not invalid:
+            return db_actions
+        if policy == 'fail':
+            objects.Action.update_states(
+                self.context,
+                dict.fromkeys(invalid, objects.action.State.FAILED))
+            raise exception.ActionPlanPreconditionFailed(
+                action_plan=action_plan_uuid, count=len(invalid))
+        objects.Action.update_states(
+            self.context,
+            dict.fromkeys(invalid, objects.action.State.CANCELLED))
+        return [db_action for db_action in db_actions
+                if db_action.uuid not in invalid]
@@ -21,10 +21,8 @@ import abc
 import six
 
 from watcher.applier.actions import factory
-from watcher.applier.messaging import event_types
+from watcher.applier.workflow_engine import state_writer
 from watcher.common import clients
-from watcher.common.messaging.events import event
-from watcher import objects
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -34,6 +32,8 @@ class BaseWorkFlowEngine(object):
         self._applier_manager = applier_manager
         self._action_factory = factory.ActionFactory()
         self._osc = None
+        self._state_writer = state_writer.ActionStateWriter(
+            context, applier_manager)
 
     @property
     def context(self):
@@ -42,7 +42,7 @@ class BaseWorkFlowEngine(object):
     @property
     def osc(self):
         if not self._osc:
-            self._osc = clients.OpenStackClients()
+            self._osc = clients.get_clients()
         return self._osc
 
     @property
@@ -53,17 +53,20 @@ class BaseWorkFlowEngine(object):
     def action_factory(self):
         return self._action_factory
 
+    @property
+    def state_writer(self):
+        return self._state_writer
+
     def notify(self, action, state):
-        db_action = objects.Action.get_by_uuid(self.context, action.uuid)
-        db_action.state = state
-        db_action.save()
-        ev = event.Event()
-        ev.type = event_types.EventTypes.LAUNCH_ACTION
-        ev.data = {}
-        payload = {'action_uuid': action.uuid,
-                   'action_state': state}
-        self.applier_manager.status_topic_handler.publish_event(
-            ev.type.name, payload)
+        """Record a state transition of an action
+
+        The transitions are written to the database in batches, flush()
+        must be called to write the pending ones.
+        """
+        self.state_writer.update(action.uuid, state)
+
+    def flush(self):
+        self.state_writer.flush()
 
     @abc.abstractmethod
     def execute(self, actions):
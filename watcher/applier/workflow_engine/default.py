@@ -15,6 +15,10 @@
 # limitations under the License.
 #
 
+import collections
+import threading
+
+from oslo_config import cfg
 from oslo_log import log
 from taskflow import engines
 from taskflow.patterns import graph_flow as gf
@@ -25,9 +29,30 @@ from watcher.applier.workflow_engine import base
 from watcher.objects import action as obj_action
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+WORKFLOW_ENGINE_OPTS = [
+    cfg.IntOpt('max_concurrent_actions',
+               default=10,
+               min=1,
+               help='Maximum number of actions of an action plan executed '
+                    'at the same time'),
+    cfg.IntOpt('max_concurrent_actions_per_hypervisor',
+               default=1,
+               min=1,
+               help='Maximum number of actions affecting the same '
+                    'hypervisor (e.g. migrations from or to it) executed '
+                    'at the same time'),
+]
+CONF.register_opts(WORKFLOW_ENGINE_OPTS, 'watcher_applier')
 
 
 class DefaultWorkFlowEngine(base.BaseWorkFlowEngine):
+    def __init__(self, context=None, applier_manager=None):
+        super(DefaultWorkFlowEngine, self).__init__(context, applier_manager)
+        self._hypervisor_semaphores = {}
+        self._semaphores_lock = threading.Lock()
+
     def decider(self, history):
         # FIXME(jed) not possible with the current Watcher Planner
         #
@@ -41,6 +66,71 @@ class DefaultWorkFlowEngine(base.BaseWorkFlowEngine):
         # (True to allow v execution or False to not).
         return True
 
+    def get_hypervisor_semaphore(self, hypervisor):
+        """Semaphore limiting the actions running on a hypervisor"""
+        with self._semaphores_lock:
+            if hypervisor not in self._hypervisor_semaphores:
+                self._hypervisor_semaphores[hypervisor] = (
+                    threading.BoundedSemaphore(
+                        CONF.watcher_applier.
+                        max_concurrent_actions_per_hypervisor))
+            return self._hypervisor_semaphores[hypervisor]
+
+    def build_flow(self, tasks):
+        """Link the tasks which cannot be executed at the same time
+
+        The tasks are given in the order of the action plan. A task
+        depends on the previous tasks sharing its resource_id, and on the
+        previous tasks affecting its hypervisors when either is exclusive
+        (e.g. changing the state of a nova-compute service waits for the
+        migrations from or to that hypervisor). A task whose hypervisors
+        are unknown depends on all the previous tasks, and all the next
+        ones depend on it.
+        """
+        flow = gf.Flow("watcher_flow")
+        flow.add(*tasks)
+
+        barrier = None
+        since_barrier = []
+        # {hypervisor: last exclusive task}
+        last_exclusive = {}
+        # {hypervisor: [non exclusive tasks after the last exclusive one]}
+        shared = collections.defaultdict(list)
+        # {resource_id: last task}
+        last_by_resource = {}
+
+        for t in tasks:
+            hypervisors = t.hypervisors
+            if hypervisors is None:
+                requires = since_barrier or ([barrier] if barrier else [])
+                barrier = t
+                since_barrier = []
+                last_exclusive.clear()
+                shared.clear()
+                last_by_resource.clear()
+            else:
+                requires = [barrier] if barrier else []
+                for hypervisor in hypervisors:
+                    if t.exclusive and shared[hypervisor]:
+                        requires.extend(shared[hypervisor])
+                    elif hypervisor in last_exclusive:
+                        requires.append(last_exclusive[hypervisor])
+                    if t.exclusive:
+                        last_exclusive[hypervisor] = t
+                        shared[hypervisor] = []
+                    else:
+                        shared[hypervisor].append(t)
+                if t.resource_id in last_by_resource:
+                    requires.append(last_by_resource[t.resource_id])
+                last_by_resource[t.resource_id] = t
+                since_barrier.append(t)
+
+            for required in set(requires):
+                if required is not t:
+                    # decider == guard (UML)
+                    flow.link(required, t, decider=self.decider)
+        return flow
+
     def execute(self, actions):
         try:
             # NOTE(jed) We want to have a strong separation of concern
@@ -49,32 +139,21 @@ class DefaultWorkFlowEngine(base.BaseWorkFlowEngine):
             # We want to provide the 'taskflow' engine by
             # default although we still want to leave the possibility for
             # the users to change it.
-            # todo(jed) we need to change the way the actions are stored.
-            # The current implementation only use a linked list of actions.
             # todo(jed) add olso conf for retry and name
-            flow = gf.Flow("watcher_flow")
-            previous = None
-            for a in actions:
-                task = TaskFlowActionContainer(a, self)
-                flow.add(task)
-                if previous is None:
-                    previous = task
-                    # we have only one Action in the Action Plan
-                    if len(actions) == 1:
-                        nop = TaskFlowNop()
-                        flow.add(nop)
-                        flow.link(previous, nop)
-                else:
-                    # decider == guard (UML)
-                    flow.link(previous, task, decider=self.decider)
-                    previous = task
+            tasks = [TaskFlowActionContainer(a, self) for a in actions]
+            flow = self.build_flow(tasks)
 
-            e = engines.load(flow)
+            e = engines.load(
+                flow, engine='parallel', executor='threaded',
+                max_workers=CONF.watcher_applier.max_concurrent_actions)
             e.run()
             return True
         except Exception as e:
             LOG.exception(e)
             return False
+        finally:
+            # every state is written before the action plan one
+            self.flush()
 
 
 class TaskFlowActionContainer(task.Task):
@@ -99,6 +178,23 @@ class TaskFlowActionContainer(task.Task):
     def engine(self):
         return self._engine
 
+    @property
+    def resource_id(self):
+        return (self._db_action.input_parameters or {}).get('resource_id')
+
+    @property
+    def hypervisors(self):
+        try:
+            hypervisors = self.action.hypervisors
+        except Exception:
+            # the action cannot be loaded, it will fail when executed
+            return None
+        return None if hypervisors is None else sorted(set(hypervisors))
+
+    @property
+    def exclusive(self):
+        return self.action.exclusive
+
     def pre_execute(self):
         try:
             self.engine.notify(self._db_action,
@@ -111,12 +207,25 @@ class TaskFlowActionContainer(task.Task):
                                obj_action.State.FAILED)
             raise
 
+    def _execute_action(self):
+        hypervisors = self.hypervisors or []
+        semaphores = [self.engine.get_hypervisor_semaphore(hypervisor)
+                      for hypervisor in hypervisors]
+        # always acquired in the same order to avoid deadlocks
+        for semaphore in semaphores:
+            semaphore.acquire()
+        try:
+            return self.action.execute()
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+
     def execute(self, *args, **kwargs):
         try:
             LOG.debug("Running action %s", self.name)
 
             # todo(jed) remove return (true or false) raise an Exception
-            result = self.action.execute()
+            result = self._execute_action()
             if result is not True:
                 self.engine.notify(self._db_action,
                                    obj_action.State.FAILED)
@@ -150,12 +259,3 @@ class TaskFlowActionContainer(task.Task):
         except Exception as e:
             LOG.exception(e)
             LOG.critical(_LC("Oops! We need disaster recover plan"))
-
-
-class TaskFlowNop(task.Task):
-    """This class is use in case of the workflow have only one Action.
-
-    We need at least two atoms to create a link
-    """
-    def execute(self):
-        pass
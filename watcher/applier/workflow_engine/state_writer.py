@@ -0,0 +1,112 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import collections
+import threading
+
+from oslo_config import cfg
+from oslo_log import log
+
+from watcher._i18n import _LE
+from watcher.applier.messaging import event_types
+from watcher import objects
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+STATE_WRITER_OPTS = [
+    cfg.IntOpt('state_batch_size',
+               default=50,
+               min=1,
+               help='Number of action state transitions buffered before '
+                    'they are written to the database together'),
+    cfg.FloatOpt('state_flush_interval',
+                 default=1.0,
+                 help='Maximum number of seconds an action state transition '
+                      'is buffered before being written to the database'),
+]
+CONF.register_opts(STATE_WRITER_OPTS, 'watcher_applier')
+
+
+class ActionStateWriter(object):
+    """Buffer the state transitions of the actions and write them in batches
+
+    Only the last state of an action is written when it changes several
+    times before a flush. A flush happens when state_batch_size actions
+    are pending, state_flush_interval seconds after the first pending
+    transition, or when flush() is called. Each flush updates the database
+    in a single transaction and publishes one status event for all the
+    actions.
+    """
+
+    def __init__(self, context, applier_manager, batch_size=None,
+                 flush_interval=None):
+        self.context = context
+        self.applier_manager = applier_manager
+        self.batch_size = (CONF.watcher_applier.state_batch_size
+                           if batch_size is None else batch_size)
+        self.flush_interval = (CONF.watcher_applier.state_flush_interval
+                               if flush_interval is None
+                               else flush_interval)
+        self._pending = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def update(self, action_uuid, state):
+        with self._lock:
+            self._pending.pop(action_uuid, None)
+            self._pending[action_uuid] = state
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval,
+                                              self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            LOG.exception(_LE("Cannot write the state of the actions"))
+
+    def flush(self):
+        """Write and publish the pending state transitions"""
+        # the flushes are serialized to write the states in order
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                states = self._pending
+                self._pending = collections.OrderedDict()
+            if not states:
+                return
+            try:
+                objects.Action.update_states(self.context, states)
+            except Exception:
+                with self._lock:
+                    # keep them, unless a newer state is pending
+                    for action_uuid, state in states.items():
+                        self._pending.setdefault(action_uuid, state)
+                raise
+
+        payload = {'actions': [{'action_uuid': action_uuid,
+                                'action_state': state}
+                               for action_uuid, state in states.items()]}
+        self.applier_manager.status_topic_handler.publish_event(
+            event_types.EventTypes.LAUNCH_ACTIONS.name, payload)
@@ -42,4 +42,5 @@ def main():
 
     server = manager.ApplierManager()
     server.connect()
+    server.resume_action_plans()
     server.join()
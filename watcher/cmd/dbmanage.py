@@ -19,17 +19,30 @@
 Run storage database migration.
 """
 
+import argparse
 import sys
+import time
 
 from oslo_config import cfg
 
 from watcher.common import service
 from watcher.db import migration
+from watcher.db import purge
 
 
 CONF = cfg.CONF
 
 
+def _int_at_least(minimum):
+    def check(value):
+        value = int(value)
+        if value < minimum:
+            raise argparse.ArgumentTypeError(
+                "%d is lower than %d" % (value, minimum))
+        return value
+    return check
+
+
 class DBCommand(object):
 
     @staticmethod
@@ -56,6 +69,21 @@ class DBCommand(object):
     def create_schema():
         migration.create_schema()
 
+    @staticmethod
+    def purge():
+        start = time.time()
+        counts = purge.purge(CONF.command.age, CONF.command.batch_size,
+                             CONF.command.max_rows, CONF.command.dry_run)
+        elapsed = time.time() - start
+        for table in purge.TABLES:
+            print('%s: %d' % (table, counts[table]))
+        total = sum(counts.values())
+        if CONF.command.dry_run:
+            print('%d rows would be purged' % total)
+        else:
+            print('%d rows purged in %.2fs (%.1f rows/s)' % (
+                total, elapsed, total / elapsed if elapsed else 0.0))
+
 
 def add_command_parsers(subparsers):
     parser = subparsers.add_parser(
@@ -96,6 +124,23 @@ def add_command_parsers(subparsers):
         help="Create the database schema.")
     parser.set_defaults(func=DBCommand.create_schema)
 
+    parser = subparsers.add_parser(
+        'purge',
+        help="Hard delete the soft deleted audit templates, audits, "
+             "action plans and actions, and the finished audits and "
+             "action plans with their actions. Use --age to only purge "
+             "the rows deleted or finished more than this number of days "
+             "ago.")
+    parser.add_argument('--age', type=int, default=30)
+    parser.add_argument('--max-rows', type=_int_at_least(0),
+                        help="Maximum number of rows to purge.")
+    parser.add_argument('--batch-size', type=_int_at_least(1),
+                        default=purge.DEFAULT_BATCH_SIZE,
+                        help="Number of rows deleted per transaction.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only count the rows to purge.")
+    parser.set_defaults(func=DBCommand.purge)
+
 
 command_opt = cfg.SubCommandOpt('command',
                                 title='Command',
@@ -113,7 +158,7 @@ def main():
     # pls change it to watcher-dbsync upgrade
     valid_commands = set([
         'upgrade', 'downgrade', 'revision',
-        'version', 'stamp', 'create_schema',
+        'version', 'stamp', 'create_schema', 'purge',
     ])
     if not set(sys.argv).intersection(valid_commands):
         sys.argv.append('upgrade')
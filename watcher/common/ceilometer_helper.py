@@ -23,10 +23,20 @@ from watcher.common import clients
 
 
 class CeilometerHelper(object):
+    # above this number of resources, a batch of statistics is fetched with
+    # a single unrestricted query per meter
+    max_filtered_resources = 10
+
     def __init__(self, osc=None):
-        """:param osc: an OpenStackClients instance"""
-        self.osc = osc if osc else clients.OpenStackClients()
-        self.ceilometer = self.osc.ceilometer()
+        """:param osc: an OpenStackClients instance, shared by default"""
+        self.osc = osc if osc else clients.get_clients()
+        self._ceilometer = None
+
+    @property
+    def ceilometer(self):
+        if self._ceilometer is None:
+            self._ceilometer = self.osc.ceilometer()
+        return self._ceilometer
 
     def build_query(self, user_id=None, tenant_id=None, resource_id=None,
                     user_ids=None, tenant_ids=None, resource_ids=None):
@@ -70,7 +80,7 @@ class CeilometerHelper(object):
             return f(*args, **kargs)
         except HTTPUnauthorized:
             self.osc.reset_clients()
-            self.ceilometer = self.osc.ceilometer()
+            self._ceilometer = self.osc.ceilometer()
             return f(*args, **kargs)
         except Exception:
             raise
@@ -126,6 +136,64 @@ class CeilometerHelper(object):
             item_value = statistic[-1]._info.get('aggregate').get('avg')
         return item_value
 
+    def statistic_aggregation_batch(self,
+                                    resource_ids,
+                                    meter_names,
+                                    period,
+                                    aggregate='avg'):
+        """Statistic aggregates of several resources and meters at once
+
+        The conditions of a Ceilometer query are all combined with a logical
+        AND, so a query can only be restricted to one resource_id at a time:
+        a set of ids cannot be chunked into a single query.
+
+        Up to `max_filtered_resources` resources, a query restricted to the
+        resource_id is sent per (resource, meter) couple, so that Ceilometer
+        only aggregates the samples of the wanted resources. Above, a single
+        query grouped by resource_id is sent per meter: Ceilometer then
+        aggregates the samples of every resource, which costs more on its
+        side but keeps the number of queries independent of the number of
+        resources, and the statistics of the other resources are dropped.
+
+        :param resource_ids: ids of the resources to get the statistics of
+        :param meter_names: meter names of which we want the statistics
+        :param period: `period`: In seconds, see `statistic_aggregation`
+        :param aggregate: aggregate function applied to the samples
+        :return: a {(resource_id, meter_name): value} dict, the value is
+                 None for the resources without statistics
+        """
+        wanted = set(resource_ids)
+        values = dict(((resource_id, meter_name), None)
+                      for resource_id in wanted
+                      for meter_name in meter_names)
+        if not wanted:
+            return values
+
+        if len(wanted) <= self.max_filtered_resources:
+            queries = [self.build_query(resource_id=resource_id)
+                       for resource_id in sorted(wanted)]
+        else:
+            queries = [[]]
+
+        for meter_name in meter_names:
+            for query in queries:
+                statistics = self.query_retry(
+                    f=self.ceilometer.statistics.list,
+                    meter_name=meter_name,
+                    q=query,
+                    period=period,
+                    aggregates=[{'func': aggregate}],
+                    groupby=['resource_id'])
+                # statistics are ordered by period, so the last one of each
+                # group wins just like in statistic_aggregation
+                for statistic in statistics or []:
+                    resource_id = statistic._info.get(
+                        'groupby', {}).get('resource_id')
+                    if resource_id in wanted:
+                        values[(resource_id, meter_name)] = (
+                            statistic._info.get('aggregate').get(aggregate))
+        return values
+
     def get_last_sample_values(self, resource_id, meter_name, limit=1):
         samples = self.query_sample(meter_name=meter_name,
                                     query=self.build_query(resource_id),
@@ -10,6 +10,9 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
+import threading
+
 from ceilometerclient import client as ceclient
 from cinderclient import client as ciclient
 from glanceclient import client as glclient
@@ -62,19 +65,49 @@ ka_loading.register_session_conf_options(cfg.CONF, _CLIENTS_AUTH_GROUP)
 
 
 class OpenStackClients(object):
-    """Convenience class to create and cache client instances."""
+    """Convenience class to create and cache client instances.
+
+    The clients are created on first use and share a single keystone
+    session, hence its token and its HTTP connections. They can be used
+    by several threads at the same time.
+    """
 
     def __init__(self):
+        self._lock = threading.RLock()
+        self._created = collections.Counter()
+        self._reused = collections.Counter()
         self.reset_clients()
 
     def reset_clients(self):
-        self._session = None
-        self._keystone = None
-        self._nova = None
-        self._glance = None
-        self._cinder = None
-        self._ceilometer = None
-        self._neutron = None
+        with self._lock:
+            self._session = None
+            self._keystone = None
+            self._nova = None
+            self._glance = None
+            self._cinder = None
+            self._ceilometer = None
+            self._neutron = None
+
+    def _get_or_create(self, name, create):
+        """Return the cached client called name, or create it"""
+        attr = '_%s' % name
+        client = getattr(self, attr)
+        if client is None:
+            with self._lock:
+                client = getattr(self, attr)
+                if client is None:
+                    client = create()
+                    setattr(self, attr, client)
+                    self._created[name] += 1
+                    return client
+        self._reused[name] += 1
+        return client
+
+    def get_stats(self):
+        """Number of times each client was created and reused"""
+        return dict((name, {'created': self._created[name],
+                            'reused': self._reused[name]})
+                    for name in set(self._created) | set(self._reused))
 
     def _get_keystone_session(self):
         auth = ka_loading.load_auth_from_conf_options(cfg.CONF,
@@ -90,69 +123,81 @@ class OpenStackClients(object):
 
     @property
     def session(self):
-        if not self._session:
-            self._session = self._get_keystone_session()
-        return self._session
+        return self._get_or_create('session', self._get_keystone_session)
 
     def _get_client_option(self, client, option):
         return getattr(getattr(cfg.CONF, '%s_client' % client), option)
 
     @exception.wrap_keystone_exception
     def keystone(self):
-        if not self._keystone:
-            self._keystone = keyclient.Client(session=self.session)
-
-        return self._keystone
+        return self._get_or_create(
+            'keystone', lambda: keyclient.Client(session=self.session))
 
     @exception.wrap_keystone_exception
     def nova(self):
-        if self._nova:
-            return self._nova
+        def create():
+            novaclient_version = self._get_client_option('nova',
+                                                         'api_version')
+            return nvclient.Client(novaclient_version, session=self.session)
 
-        novaclient_version = self._get_client_option('nova', 'api_version')
-        self._nova = nvclient.Client(novaclient_version,
-                                     session=self.session)
-        return self._nova
+        return self._get_or_create('nova', create)
 
     @exception.wrap_keystone_exception
     def glance(self):
-        if self._glance:
-            return self._glance
+        def create():
+            glanceclient_version = self._get_client_option('glance',
+                                                           'api_version')
+            return glclient.Client(glanceclient_version,
+                                   session=self.session)
 
-        glanceclient_version = self._get_client_option('glance', 'api_version')
-        self._glance = glclient.Client(glanceclient_version,
-                                       session=self.session)
-        return self._glance
+        return self._get_or_create('glance', create)
 
     @exception.wrap_keystone_exception
     def cinder(self):
-        if self._cinder:
-            return self._cinder
+        def create():
+            cinderclient_version = self._get_client_option('cinder',
+                                                           'api_version')
+            return ciclient.Client(cinderclient_version,
+                                   session=self.session)
 
-        cinderclient_version = self._get_client_option('cinder', 'api_version')
-        self._cinder = ciclient.Client(cinderclient_version,
-                                       session=self.session)
-        return self._cinder
+        return self._get_or_create('cinder', create)
 
     @exception.wrap_keystone_exception
     def ceilometer(self):
-        if self._ceilometer:
-            return self._ceilometer
+        def create():
+            ceilometerclient_version = self._get_client_option(
+                'ceilometer', 'api_version')
+            return ceclient.get_client(ceilometerclient_version,
+                                       session=self.session)
 
-        ceilometerclient_version = self._get_client_option('ceilometer',
-                                                           'api_version')
-        self._ceilometer = ceclient.get_client(ceilometerclient_version,
-                                               session=self.session)
-        return self._ceilometer
+        return self._get_or_create('ceilometer', create)
 
     @exception.wrap_keystone_exception
     def neutron(self):
-        if self._neutron:
-            return self._neutron
-
-        neutronclient_version = self._get_client_option('neutron',
-                                                        'api_version')
-        self._neutron = netclient.Client(neutronclient_version,
-                                         session=self.session)
-        self._neutron.format = 'json'
-        return self._neutron
+        def create():
+            neutronclient_version = self._get_client_option('neutron',
+                                                            'api_version')
+            neutron = netclient.Client(neutronclient_version,
+                                       session=self.session)
+            neutron.format = 'json'
+            return neutron
+
+        return self._get_or_create('neutron', create)
+
+
+_CLIENTS = None
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_clients():
+    """Return the OpenStackClients shared by the whole process
+
+    Building the clients and getting a keystone token once per process,
+    rather than once per action, audit or helper, saves a round trip to
+    keystone and new HTTP connections each time.
+    """
+    global _CLIENTS
+    with _CLIENTS_LOCK:
+        if _CLIENTS is None:
+            _CLIENTS = OpenStackClients()
+        return _CLIENTS
@@ -283,3 +283,12 @@ class LoadingError(WatcherException):
 
 class ReservedWord(WatcherException):
     msg_fmt = _("The identifier '%(name)s' is a reserved word")
+
+
+class ActionPreconditionFailed(WatcherException):
+    msg_fmt = _("The preconditions of the action are not met: %(reason)s")
+
+
+class ActionPlanPreconditionFailed(WatcherException):
+    msg_fmt = _("The preconditions of %(count)d action(s) of action plan "
+                "%(action_plan)s are not met")
@@ -0,0 +1,218 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Wait for the completion of the Nova operations started by the actions.
+
+Instead of polling the Nova API every second, a waiter checks the state
+of an instance again as soon as a notification about it is received on
+the message bus. When no notification comes (e.g. the notifications are
+disabled or lost), the state is polled at exponentially growing intervals
+with a random jitter so that the actions started at the same time do not
+query the API together.
+"""
+
+import collections
+import random
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+import oslo_messaging as om
+
+from watcher._i18n import _LI
+from watcher.common.messaging import notification_handler
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+INSTANCE_WAITER_OPTS = [
+    cfg.BoolOpt('use_notifications',
+                default=False,
+                help='Listen to the Nova notifications to detect the end '
+                     'of the operations on the instances (e.g. '
+                     'migrations) as soon as it happens'),
+    cfg.ListOpt('notification_topics',
+                default=['versioned_notifications'],
+                help='The topics Nova publishes its notifications on'),
+    cfg.StrOpt('notification_pool',
+               default='watcher_instance_waiter',
+               help='Listener pool receiving its own copy of the Nova '
+                    'notifications, so that they are not shared with the '
+                    'other Watcher listeners of the same topics. Appliers '
+                    'sharing a pool may miss the end of their operations '
+                    'until the next poll'),
+    cfg.FloatOpt('initial_interval',
+                 default=0.5,
+                 help='Number of seconds before the first poll of the Nova '
+                      'API, the interval is doubled after every poll'),
+    cfg.FloatOpt('max_interval',
+                 default=5.0,
+                 help='Maximum number of seconds between two polls of the '
+                      'Nova API'),
+    cfg.FloatOpt('notification_poll_interval',
+                 default=30.0,
+                 help='Number of seconds between two polls of the Nova API '
+                      'when listening to the notifications, in case one '
+                      'of them is lost'),
+    cfg.FloatOpt('jitter',
+                 default=0.5,
+                 help='Fraction of every interval which may be randomly '
+                      'cut, between 0 and 1'),
+]
+instance_waiter_opt_group = cfg.OptGroup(
+    name='watcher_instance_waiter',
+    title='Options for waiting the completion of the Nova operations')
+CONF.register_group(instance_waiter_opt_group)
+CONF.register_opts(INSTANCE_WAITER_OPTS, instance_waiter_opt_group)
+
+
+def backoff_intervals(initial, maximum, jitter):
+    """Yield exponentially growing intervals with a random jitter
+
+    :param initial: the first interval, in seconds
+    :param maximum: the maximum interval, in seconds
+    :param jitter: the fraction of every interval which may be cut
+    """
+    interval = initial
+    while True:
+        yield interval * (1 - jitter * random.random())
+        interval = min(interval * 2, maximum)
+
+
+class InstanceWaiter(object):
+    """Wait until a condition on an instance is met
+
+    The waiting threads are woken up by the notifications about their
+    instance, when the waiter is started, otherwise by the end of their
+    polling interval.
+    """
+
+    def __init__(self, initial_interval=None, max_interval=None,
+                 jitter=None, notification_poll_interval=None):
+        conf = CONF.watcher_instance_waiter
+        self.initial_interval = (conf.initial_interval
+                                 if initial_interval is None
+                                 else initial_interval)
+        self.max_interval = (conf.max_interval if max_interval is None
+                             else max_interval)
+        self.jitter = conf.jitter if jitter is None else jitter
+        self.notification_poll_interval = (
+            conf.notification_poll_interval
+            if notification_poll_interval is None
+            else notification_poll_interval)
+        # counters to measure how the waits end
+        self.checks = 0
+        self.notified = 0
+        # the legacy notifications are published by compute.<host>
+        self.handler = notification_handler.NovaNotificationHandler(
+            publisher_id=('nova-', 'compute.'))
+        self.handler.register_observer(self)
+        self._events = collections.defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    @property
+    def listening(self):
+        return self._listener is not None
+
+    def start(self, transport=None):
+        transport = transport or om.get_transport(CONF)
+        targets = [om.Target(topic=topic) for topic in
+                   CONF.watcher_instance_waiter.notification_topics]
+        self._listener = om.get_notification_listener(
+            transport, targets, [self.handler], executor='eventlet',
+            pool=CONF.watcher_instance_waiter.notification_pool)
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener.wait()
+            self._listener = None
+
+    def update(self, observable, ctx, metadata, publisher_id, event_type,
+               payload):
+        if not str(event_type).startswith(('instance.',
+                                           'compute.instance.')):
+            return
+        data = payload.get('nova_object.data', payload)
+        # the legacy notifications give the uuid as instance_id
+        instance_id = data.get('uuid') or data.get('instance_id')
+        with self._lock:
+            events = list(self._events.get(instance_id, ()))
+        for event in events:
+            event.set()
+
+    def wait(self, check, timeout, instance_id=None):
+        """Call check until it returns a true value or timeout expires
+
+        :param check: callable querying the state of the instance
+        :param timeout: maximum number of seconds to wait
+        :param instance_id: the instance whose notifications wake up the
+                            waiter, if any
+        :return: the last value returned by check
+        """
+        event = threading.Event()
+        if instance_id is not None:
+            with self._lock:
+                self._events[instance_id].add(event)
+        try:
+            deadline = time.time() + timeout
+            if self.listening and instance_id is not None:
+                # the notification wakes up the waiter, only poll in case
+                # it is lost
+                intervals = backoff_intervals(
+                    self.notification_poll_interval,
+                    self.notification_poll_interval, self.jitter)
+            else:
+                intervals = backoff_intervals(
+                    self.initial_interval, self.max_interval, self.jitter)
+            while True:
+                event.clear()
+                self.checks += 1
+                result = check()
+                remaining = deadline - time.time()
+                if result or remaining <= 0:
+                    return result
+                if event.wait(min(next(intervals), remaining)):
+                    self.notified += 1
+        finally:
+            if instance_id is not None:
+                with self._lock:
+                    self._events[instance_id].discard(event)
+                    if not self._events[instance_id]:
+                        del self._events[instance_id]
+
+    def get_stats(self):
+        return {'checks': self.checks, 'notified': self.notified}
+
+
+_INSTANCE_WAITER = None
+_INSTANCE_WAITER_LOCK = threading.Lock()
+
+
+def get_instance_waiter():
+    """Return the waiter shared by every action of this process"""
+    global _INSTANCE_WAITER
+    with _INSTANCE_WAITER_LOCK:
+        if _INSTANCE_WAITER is None:
+            waiter = InstanceWaiter()
+            if CONF.watcher_instance_waiter.use_notifications:
+                LOG.info(_LI("Listening to the Nova notifications"))
+                waiter.start()
+            _INSTANCE_WAITER = waiter
+        return _INSTANCE_WAITER
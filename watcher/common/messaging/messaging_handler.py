@@ -109,8 +109,9 @@ class MessagingHandler(threading.Thread):
 
     def stop(self):
         LOG.debug('Stopped server')
-        self.__server.wait()
+        # the server must be stopped before waiting for its completion
         self.__server.stop()
+        self.__server.wait()
 
     def publish_event(self, event_type, payload, request_id=None):
         self.__notifier.info(
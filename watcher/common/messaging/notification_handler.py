@@ -30,20 +30,34 @@ class NotificationHandler(observable.Observable):
         super(NotificationHandler, self).__init__()
         self.publisher_id = publisher_id
 
-    def info(self, ctx, publisher_id, event_type, payload, metadata):
-        if publisher_id == self.publisher_id:
+    def match_publisher(self, publisher_id):
+        return publisher_id == self.publisher_id
+
+    def _handle(self, ctx, publisher_id, event_type, payload, metadata):
+        if self.match_publisher(publisher_id):
             self.set_changed()
             self.notify(ctx, publisher_id, event_type, metadata, payload)
             return messaging.NotificationResult.HANDLED
 
+    def info(self, ctx, publisher_id, event_type, payload, metadata):
+        return self._handle(ctx, publisher_id, event_type, payload, metadata)
+
     def warn(self, ctx, publisher_id, event_type, payload, metadata):
-        if publisher_id == self.publisher_id:
-            self.set_changed()
-            self.notify(ctx, publisher_id, event_type, metadata, payload)
-            return messaging.NotificationResult.HANDLED
+        return self._handle(ctx, publisher_id, event_type, payload, metadata)
 
     def error(self, ctx, publisher_id, event_type, payload, metadata):
-        if publisher_id == self.publisher_id:
-            self.set_changed()
-            self.notify(ctx, publisher_id, event_type, metadata, payload)
-            return messaging.NotificationResult.HANDLED
+        return self._handle(ctx, publisher_id, event_type, payload, metadata)
+
+
+class NovaNotificationHandler(NotificationHandler):
+    """Accept the notifications of every Nova service
+
+    Nova services publish with their own binary and host as publisher id
+    (e.g. ``nova-compute:compute-1``), so only the prefix is compared.
+    """
+
+    def __init__(self, publisher_id='nova-'):
+        super(NovaNotificationHandler, self).__init__(publisher_id)
+
+    def match_publisher(self, publisher_id):
+        return str(publisher_id).startswith(self.publisher_id)
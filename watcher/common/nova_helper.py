@@ -18,42 +18,186 @@
 #
 
 import random
-import time
+import threading
 
+from concurrent import futures
+from oslo_config import cfg
 from oslo_log import log
 
 import cinderclient.exceptions as ciexceptions
 import novaclient.exceptions as nvexceptions
 
+from watcher.common import cache as common_cache
 from watcher.common import clients
+from watcher.common import instance_waiter
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+INSTANCE_CACHE_OPTS = [
+    cfg.BoolOpt('enabled',
+                default=True,
+                help='Cache the instances looked up in Nova so that the '
+                     'actions of an action plan do not fetch the same '
+                     'instance again'),
+    cfg.IntOpt('ttl',
+               default=30,
+               min=0,
+               help='Number of seconds a cached instance is considered '
+                    'valid'),
+    cfg.IntOpt('max_size',
+               default=10000,
+               min=1,
+               help='Maximum number of instances kept in cache, the least '
+                    'recently used ones are evicted first'),
+    cfg.IntOpt('list_threshold',
+               default=100,
+               min=1,
+               help='Number of instances looked up together above which '
+                    'all the instances are listed at once instead of '
+                    'being fetched one by one'),
+]
+instance_cache_opt_group = cfg.OptGroup(
+    name='watcher_instance_cache',
+    title='Options for the cache of the Nova instances')
+CONF.register_group(instance_cache_opt_group)
+CONF.register_opts(INSTANCE_CACHE_OPTS, instance_cache_opt_group)
+
+_INSTANCE_CACHE = None
+_INSTANCE_CACHE_LOCK = threading.Lock()
+
+
+def get_instance_cache():
+    """Return the cache shared by every action of this process"""
+    global _INSTANCE_CACHE
+    with _INSTANCE_CACHE_LOCK:
+        if _INSTANCE_CACHE is None:
+            _INSTANCE_CACHE = common_cache.TTLCache(
+                ttl=CONF.watcher_instance_cache.ttl,
+                max_size=CONF.watcher_instance_cache.max_size)
+        return _INSTANCE_CACHE
 
 
 class NovaHelper(object):
 
-    def __init__(self, osc=None):
-        """:param osc: an OpenStackClients instance"""
-        self.osc = osc if osc else clients.OpenStackClients()
-        self.neutron = self.osc.neutron()
-        self.cinder = self.osc.cinder()
-        self.nova = self.osc.nova()
-        self.glance = self.osc.glance()
+    def __init__(self, osc=None, waiter=None, cache=None):
+        """:param osc: an OpenStackClients instance, shared by default
+
+        :param waiter: an InstanceWaiter, the one of the process by default
+        :param cache: a TTLCache of the instances, the one of the process
+            by default
+        """
+        self.osc = osc if osc else clients.get_clients()
+        self.waiter = waiter or instance_waiter.get_instance_waiter()
+        if cache is None and CONF.watcher_instance_cache.enabled:
+            cache = get_instance_cache()
+        self.cache = cache
+        # the clients are only built when used
+        self._neutron = None
+        self._cinder = None
+        self._nova = None
+        self._glance = None
+
+    @property
+    def neutron(self):
+        if self._neutron is None:
+            self._neutron = self.osc.neutron()
+        return self._neutron
+
+    @property
+    def cinder(self):
+        if self._cinder is None:
+            self._cinder = self.osc.cinder()
+        return self._cinder
+
+    @property
+    def nova(self):
+        if self._nova is None:
+            self._nova = self.osc.nova()
+        return self._nova
+
+    @property
+    def glance(self):
+        if self._glance is None:
+            self._glance = self.osc.glance()
+        return self._glance
 
     def get_hypervisors_list(self):
         return self.nova.hypervisors.list()
 
-    def find_instance(self, instance_id):
-        search_opts = {'all_tenants': True}
-        instances = self.nova.servers.list(detailed=True,
-                                           search_opts=search_opts)
-        instance = None
-        for _instance in instances:
-            if _instance.id == instance_id:
-                instance = _instance
-                break
+    def get_service_list(self, binary='nova-compute'):
+        return self.nova.services.list(binary=binary)
+
+    def get_flavor_list(self):
+        # is_public=None returns both public and private flavors
+        return self.nova.flavors.list(is_public=None)
+
+    def get_instance_list(self, marker=None, limit=None):
+        """Return one page of instances across all tenants
+
+        :param marker: id of the last instance of the previous page
+        :param limit: maximum number of instances in the page
+        """
+        return self.nova.servers.list(detailed=True,
+                                      search_opts={'all_tenants': True},
+                                      marker=marker, limit=limit)
+
+    def find_instance(self, instance_id, refresh=False):
+        """Return the instance of the given id or None if it does not exist
+
+        :param refresh: ignore the cached instance and fetch it again
+        """
+        if self.cache is not None and not refresh:
+            instance = self.cache.get(instance_id)
+            if instance is not None:
+                return instance
+        try:
+            instance = self.nova.servers.get(instance_id)
+        except nvexceptions.NotFound:
+            return None
+        if self.cache is not None:
+            self.cache.set(instance_id, instance)
         return instance
 
+    def find_instances(self, instance_ids, refresh=False):
+        """Look up several instances at once
+
+        Above [watcher_instance_cache]list_threshold missing instances, all
+        the instances are listed in a single request.
+
+        :param instance_ids: the ids of the instances
+        :param refresh: ignore the cached instances and fetch them again
+        :return: a dict giving the instance, or None if it does not exist,
+            of every id
+        """
+        instances = {}
+        missing_ids = set()
+        for instance_id in instance_ids:
+            instance = None
+            if self.cache is not None and not refresh:
+                instance = self.cache.get(instance_id)
+            instances[instance_id] = instance
+            if instance is None:
+                missing_ids.add(instance_id)
+
+        if len(missing_ids) > CONF.watcher_instance_cache.list_threshold:
+            for instance in self.nova.servers.list(
+                    detailed=True, search_opts={'all_tenants': True}):
+                if instance.id in missing_ids:
+                    instances[instance.id] = instance
+                    if self.cache is not None:
+                        self.cache.set(instance.id, instance)
+        else:
+            for instance_id in missing_ids:
+                instances[instance_id] = self.find_instance(instance_id,
+                                                            refresh=refresh)
+        return instances
+
+    def forget_instance(self, instance_id):
+        """Remove an instance modified by an operation from the cache"""
+        if self.cache is not None:
+            self.cache.delete(instance_id)
+
     def watcher_non_live_migrate_instance(self, instance_id, hypervisor_id,
                                           keep_original_image_name=True):
         """This method migrates a given instance
@@ -67,6 +211,11 @@ class NovaHelper(object):
         It returns True if the migration was successful,
         False otherwise.
 
+        The steps which do not depend on each other run concurrently: the
+        settings of the instance are gathered while it is stopped, then
+        its volumes are all detached at once. Its image is only built
+        once every volume is detached.
+
         :param instance_id: the unique id of the instance to migrate.
         :param keep_original_image_name: flag indicating whether the
             image name from which the original instance was built must be
@@ -74,8 +223,6 @@ class NovaHelper(object):
             If this flag is False, a temporary image name is built
         """
 
-        new_image_name = ""
-
         LOG.debug(
             "Trying a non-live migrate of instance '%s' "
             "using a temporary image ..." % instance_id)
@@ -85,156 +232,102 @@ class NovaHelper(object):
         if not instance:
             LOG.debug("Instance %s not found !" % instance_id)
             return False
-        else:
-            host_name = getattr(instance, "OS-EXT-SRV-ATTR:host")
-            # https://bugs.launchpad.net/nova/+bug/1182965
-            LOG.debug(
-                "Instance %s found on host '%s'." % (instance_id, host_name))
-
-            if not keep_original_image_name:
-                # randrange gives you an integral value
-                irand = random.randint(0, 1000)
-
-                # Building the temporary image name
-                # which will be used for the migration
-                new_image_name = "tmp-migrate-%s-%s" % (instance_id, irand)
-            else:
-                # Get the image name of the current instance.
-                # We'll use the same name for the new instance.
-                imagedict = getattr(instance, "image")
-                image_id = imagedict["id"]
-                image = self.nova.images.get(image_id)
-                new_image_name = getattr(image, "name")
-
-            instance_name = getattr(instance, "name")
-            flavordict = getattr(instance, "flavor")
-            # a_dict = dict([flavorstr.strip('{}').split(":"),])
-            flavor_id = flavordict["id"]
-            flavor = self.nova.flavors.get(flavor_id)
-            flavor_name = getattr(flavor, "name")
-            keypair_name = getattr(instance, "key_name")
-
-            addresses = getattr(instance, "addresses")
-
-            floating_ip = ""
-            network_names_list = []
-
-            for network_name, network_conf_obj in addresses.items():
-                LOG.debug(
-                    "Extracting network configuration for network '%s'" %
-                    network_name)
 
-                network_names_list.append(network_name)
-
-                for net_conf_item in network_conf_obj:
-                    if net_conf_item['OS-EXT-IPS:type'] == "floating":
-                        floating_ip = net_conf_item['addr']
-                        break
-
-            sec_groups_list = getattr(instance, "security_groups")
-            sec_groups = []
-
-            for sec_group_dict in sec_groups_list:
-                sec_groups.append(sec_group_dict['name'])
+        host_name = getattr(instance, "OS-EXT-SRV-ATTR:host")
+        # https://bugs.launchpad.net/nova/+bug/1182965
+        LOG.debug(
+            "Instance %s found on host '%s'." % (instance_id, host_name))
 
-            # Stopping the old instance properly so
-            # that no new data is sent to it and to its attached volumes
-            stopped_ok = self.stop_instance(instance_id)
+        instance_name = getattr(instance, "name")
+        keypair_name = getattr(instance, "key_name")
 
-            if not stopped_ok:
+        floating_ip = ""
+        network_names_list = []
+        for network_name, network_conf_obj in getattr(
+                instance, "addresses").items():
+            LOG.debug(
+                "Extracting network configuration for network '%s'" %
+                network_name)
+
+            network_names_list.append(network_name)
+
+            for net_conf_item in network_conf_obj:
+                if net_conf_item['OS-EXT-IPS:type'] == "floating":
+                    floating_ip = net_conf_item['addr']
+                    break
+
+        sec_groups = [sec_group_dict['name'] for sec_group_dict in
+                      getattr(instance, "security_groups")]
+
+        # The attached volumes are detached from the instance in order to
+        # attach them later to the new instance. Looks like this :
+        # os-extended-volumes:volumes_attached |
+        # [{u'id': u'c5c3245f-dd59-4d4f-8d3a-89d80135859a'}]
+        volume_ids = [attached_volume['id'] for attached_volume in
+                      getattr(instance,
+                              "os-extended-volumes:volumes_attached")]
+
+        with futures.ThreadPoolExecutor(
+                max_workers=len(volume_ids) + 3) as executor:
+            # Stopping the old instance properly so that no new data is
+            # sent to it and to its attached volumes, while its settings
+            # are gathered
+            stopped = executor.submit(self.stop_instance, instance_id)
+            image_name = executor.submit(self._get_image_name, instance_id,
+                                         instance, keep_original_image_name)
+            flavor_name = executor.submit(self._get_flavor_name, instance)
+            mappings = [executor.submit(self._get_volume_mapping, volume_id)
+                        for volume_id in volume_ids]
+
+            if not stopped.result():
                 LOG.debug("Could not stop instance: %s" % instance_id)
                 return False
 
-            # Building the temporary image which will be used
-            # to re-build the same instance on another target host
-            image_uuid = self.create_image_from_instance(instance_id,
-                                                         new_image_name)
-
-            if not image_uuid:
-                LOG.debug(
-                    "Could not build temporary image of instance: %s" %
-                    instance_id)
+            blocks = [mapping.result() for mapping in mappings]
+            if None in blocks:
                 return False
 
-            #
-            # We need to get the list of attached volumes and detach
-            # them from the instance in order to attache them later
-            # to the new instance
-            #
-            blocks = []
-
-            # Looks like this :
-            # os-extended-volumes:volumes_attached |
-            # [{u'id': u'c5c3245f-dd59-4d4f-8d3a-89d80135859a'}]
-            attached_volumes = getattr(instance,
-                                       "os-extended-volumes:volumes_attached")
-
-            for attached_volume in attached_volumes:
-                volume_id = attached_volume['id']
-
-                try:
-                    volume = self.cinder.volumes.get(volume_id)
-
-                    attachments_list = getattr(volume, "attachments")
-
-                    device_name = attachments_list[0]['device']
-                    # When a volume is attached to an instance
-                    # it contains the following property :
-                    # attachments = [{u'device': u'/dev/vdb',
-                    # u'server_id': u'742cc508-a2f2-4769-a794-bcdad777e814',
-                    # u'id': u'f6d62785-04b8-400d-9626-88640610f65e',
-                    # u'host_name': None, u'volume_id':
-                    # u'f6d62785-04b8-400d-9626-88640610f65e'}]
-
-                    # boot_index indicates a number
-                    # designating the boot order of the device.
-                    # Use -1 for the boot volume,
-                    # choose 0 for an attached volume.
-                    block_device_mapping_v2_item = {"device_name": device_name,
-                                                    "source_type": "volume",
-                                                    "destination_type":
-                                                        "volume",
-                                                    "uuid": volume_id,
-                                                    "boot_index": "0"}
-
-                    blocks.append(
-                        block_device_mapping_v2_item)
-
-                    LOG.debug("Detaching volume %s from instance: %s" % (
-                        volume_id, instance_id))
-                    # volume.detach()
-                    self.nova.volumes.delete_server_volume(instance_id,
-                                                           volume_id)
-
-                    if not self.wait_for_volume_status(volume, "available", 5,
-                                                       10):
-                        LOG.debug(
-                            "Could not detach volume %s from instance: %s" % (
-                                volume_id, instance_id))
-                        return False
-                except ciexceptions.NotFound:
-                    LOG.debug("Volume '%s' not found " % image_id)
-                    return False
-
-            # We create the new instance from
-            # the intermediate image of the original instance
-            new_instance = self. \
-                create_instance(hypervisor_id,
-                                instance_name,
-                                image_uuid,
-                                flavor_name,
-                                sec_groups,
-                                network_names_list=network_names_list,
-                                keypair_name=keypair_name,
-                                create_new_floating_ip=False,
-                                block_device_mapping_v2=blocks)
-
-            if not new_instance:
-                LOG.debug(
-                    "Could not create new instance "
-                    "for non-live migration of instance %s" % instance_id)
+            # The volumes are detached together, but before the snapshot
+            # since nova refuses to detach a volume from an instance while
+            # its image is taken
+            detached = [executor.submit(self.detach_volume, instance_id,
+                                        volume_id)
+                        for volume_id in volume_ids]
+            if not all([detach.result() for detach in detached]):
                 return False
 
+            flavor_name = flavor_name.result()
+
+        # Building the temporary image which will be used to re-build
+        # the same instance on another target host
+        image_uuid = self.create_image_from_instance(instance_id,
+                                                     image_name.result())
+        if not image_uuid:
+            LOG.debug(
+                "Could not build temporary image of instance: %s" %
+                instance_id)
+            return False
+
+        # We create the new instance from
+        # the intermediate image of the original instance
+        new_instance = self. \
+            create_instance(hypervisor_id,
+                            instance_name,
+                            image_uuid,
+                            flavor_name,
+                            sec_groups,
+                            network_names_list=network_names_list,
+                            keypair_name=keypair_name,
+                            create_new_floating_ip=False,
+                            block_device_mapping_v2=blocks)
+
+        if not new_instance:
+            LOG.debug(
+                "Could not create new instance "
+                "for non-live migration of instance %s" % instance_id)
+            return False
+
+        if floating_ip:
             try:
                 LOG.debug("Detaching floating ip '%s' from instance %s" % (
                     floating_ip, instance_id))
@@ -250,20 +343,85 @@ class NovaHelper(object):
             except Exception as e:
                 LOG.debug(e)
 
-            new_host_name = getattr(new_instance, "OS-EXT-SRV-ATTR:host")
+        new_host_name = getattr(new_instance, "OS-EXT-SRV-ATTR:host")
 
-            # Deleting the old instance (because no more useful)
-            delete_ok = self.delete_instance(instance_id)
-            if not delete_ok:
-                LOG.debug("Could not delete instance: %s" % instance_id)
-                return False
+        # Deleting the old instance (because no more useful)
+        delete_ok = self.delete_instance(instance_id)
+        if not delete_ok:
+            LOG.debug("Could not delete instance: %s" % instance_id)
+            return False
 
-            LOG.debug(
-                "Instance %s has been successfully migrated "
-                "to new host '%s' and its new id is %s." % (
-                    instance_id, new_host_name, new_instance.id))
+        LOG.debug(
+            "Instance %s has been successfully migrated "
+            "to new host '%s' and its new id is %s." % (
+                instance_id, new_host_name, new_instance.id))
+
+        return True
+
+    def _get_image_name(self, instance_id, instance,
+                        keep_original_image_name):
+        """Return the name of the image used to migrate an instance"""
+        if not keep_original_image_name:
+            # Building the temporary image name
+            # which will be used for the migration
+            return "tmp-migrate-%s-%s" % (instance_id,
+                                          random.randint(0, 1000))
+        # Get the image name of the current instance.
+        # We'll use the same name for the new instance.
+        image = self.nova.images.get(getattr(instance, "image")["id"])
+        return getattr(image, "name")
+
+    def _get_flavor_name(self, instance):
+        flavor = self.nova.flavors.get(getattr(instance, "flavor")["id"])
+        return getattr(flavor, "name")
+
+    def _get_volume_mapping(self, volume_id):
+        """Return the block device mapping attaching a volume again
+
+        :param volume_id: the unique id of a volume attached to an instance
+        :return: the mapping, None if the volume does not exist
+        """
+        try:
+            volume = self.cinder.volumes.get(volume_id)
+        except ciexceptions.NotFound:
+            LOG.debug("Volume '%s' not found " % volume_id)
+            return None
 
-            return True
+        # When a volume is attached to an instance
+        # it contains the following property :
+        # attachments = [{u'device': u'/dev/vdb',
+        # u'server_id': u'742cc508-a2f2-4769-a794-bcdad777e814',
+        # u'id': u'f6d62785-04b8-400d-9626-88640610f65e',
+        # u'host_name': None, u'volume_id':
+        # u'f6d62785-04b8-400d-9626-88640610f65e'}]
+        device_name = getattr(volume, "attachments")[0]['device']
+
+        # boot_index indicates a number
+        # designating the boot order of the device.
+        # Use -1 for the boot volume,
+        # choose 0 for an attached volume.
+        return {"device_name": device_name,
+                "source_type": "volume",
+                "destination_type": "volume",
+                "uuid": volume_id,
+                "boot_index": "0"}
+
+    def detach_volume(self, instance_id, volume_id, retry=5, sleep=10):
+        """Detach a volume from an instance and wait until it is available
+
+        :param instance_id: the unique id of the instance.
+        :param volume_id: the unique id of the volume to detach.
+        """
+        LOG.debug("Detaching volume %s from instance: %s" % (
+            volume_id, instance_id))
+        self.nova.volumes.delete_server_volume(instance_id, volume_id)
+
+        if not self.wait_for_volume_status(volume_id, "available", retry,
+                                           sleep):
+            LOG.debug("Could not detach volume %s from instance: %s" % (
+                volume_id, instance_id))
+            return False
+        return True
 
     def live_migrate_instance(self, instance_id, dest_hostname,
                               block_migration=False, retry=120):
@@ -278,6 +436,7 @@ class NovaHelper(object):
         :param instance_id: the unique id of the instance to migrate.
         :param dest_hostname: the name of the destination compute node.
         :param block_migration:  No shared storage is required.
+        :param retry: maximum number of seconds to wait for the migration.
         """
 
         LOG.debug("Trying a live migrate of instance %s to host '%s'" % (
@@ -297,17 +456,19 @@ class NovaHelper(object):
             instance.live_migrate(host=dest_hostname,
                                   block_migration=block_migration,
                                   disk_over_commit=True)
-            while getattr(instance,
-                          'OS-EXT-SRV-ATTR:host') != dest_hostname \
-                    and retry:
-                instance = self.nova.servers.get(instance.id)
+            self.forget_instance(instance_id)
+
+            def get_migrated_instance():
+                migrated = self.nova.servers.get(instance_id)
                 LOG.debug(
                     'Waiting the migration of {0}  to {1}'.format(
-                        instance,
-                        getattr(instance,
-                                'OS-EXT-SRV-ATTR:host')))
-                time.sleep(1)
-                retry -= 1
+                        migrated,
+                        getattr(migrated, 'OS-EXT-SRV-ATTR:host')))
+                if getattr(migrated, 'OS-EXT-SRV-ATTR:host') == dest_hostname:
+                    return migrated
+
+            instance = self.waiter.wait(get_migrated_instance, retry,
+                                        instance_id) or instance
 
             host_name = getattr(instance, 'OS-EXT-SRV-ATTR:host')
             if host_name != dest_hostname:
@@ -411,15 +572,16 @@ class NovaHelper(object):
 
                 # Waiting for the new image to be officially in ACTIVE state
                 # in order to make sure it can be used
-                status = image.status
-                retry = 10
-                while status != 'active' and status != 'error' and retry:
-                    time.sleep(5)
-                    retry -= 1
-                    # Retrieve the instance again so the status field updates
-                    image = self.glance.images.get(image_uuid)
-                    status = image.status
-                    LOG.debug("Current image status: %s" % status)
+                def get_created_image():
+                    # Retrieve the image again so the status field updates
+                    created = self.glance.images.get(image_uuid)
+                    LOG.debug("Current image status: %s" % created.status)
+                    if created.status in ('active', 'error'):
+                        return created
+
+                if image.status not in ('active', 'error'):
+                    # glance notifications are not listened to
+                    image = self.waiter.wait(get_created_image, 50) or image
 
                 if not image:
                     LOG.debug("Image not found: %s" % image_uuid)
@@ -445,6 +607,7 @@ class NovaHelper(object):
             return False
         else:
             self.nova.servers.delete(instance_id)
+            self.forget_instance(instance_id)
             LOG.debug("Instance %s removed." % instance_id)
             return True
 
@@ -463,6 +626,7 @@ class NovaHelper(object):
             return False
         else:
             self.nova.servers.stop(instance_id)
+            self.forget_instance(instance_id)
 
             if self.wait_for_vm_state(instance, "stopped", 8, 10):
                 LOG.debug("Instance %s stopped." % instance_id)
@@ -479,17 +643,21 @@ class NovaHelper(object):
         :param server: server object.
         :param vm_state: for which state we are waiting for
         :param retry: how many times to retry
-        :param sleep: seconds to sleep between the retries
+        :param sleep: seconds to sleep between the retries, retry * sleep
+            gives the maximum number of seconds to wait
         """
 
         if not server:
             return False
 
-        while getattr(server, 'OS-EXT-STS:vm_state') != vm_state and retry:
-            time.sleep(sleep)
-            server = self.nova.servers.get(server)
-            retry -= 1
-        return getattr(server, 'OS-EXT-STS:vm_state') == vm_state
+        if getattr(server, 'OS-EXT-STS:vm_state') == vm_state:
+            return True
+
+        def has_vm_state():
+            current = self.nova.servers.get(server)
+            return getattr(current, 'OS-EXT-STS:vm_state') == vm_state
+
+        return self.waiter.wait(has_vm_state, retry * sleep, server.id)
 
     def wait_for_instance_status(self, instance, status_list, retry, sleep):
         """Waits for instance to be in a specific status
@@ -501,19 +669,43 @@ class NovaHelper(object):
         :param status_list: tuple containing the list of
             status we are waiting for
         :param retry: how many times to retry
-        :param sleep: seconds to sleep between the retries
+        :param sleep: seconds to sleep between the retries, retry * sleep
+            gives the maximum number of seconds to wait
         """
 
         if not instance:
             return False
 
-        while instance.status not in status_list and retry:
-            LOG.debug("Current instance status: %s" % instance.status)
-            time.sleep(sleep)
-            instance = self.nova.servers.get(instance.id)
-            retry -= 1
         LOG.debug("Current instance status: %s" % instance.status)
-        return instance.status in status_list
+        if instance.status in status_list:
+            return True
+
+        def has_status():
+            current = self.nova.servers.get(instance.id)
+            LOG.debug("Current instance status: %s" % current.status)
+            return current.status in status_list
+
+        return self.waiter.wait(has_status, retry * sleep, instance.id)
+
+    def wait_for_volume_status(self, volume_id, status, retry, sleep):
+        """Waits for volume to be in a specific status
+
+        Cinder does not notify the waiter, the volume is polled at
+        exponentially growing intervals.
+
+        :param volume_id: the unique id of the volume.
+        :param status: the status we are waiting for
+        :param retry: how many times to retry
+        :param sleep: seconds to sleep between the retries, retry * sleep
+            gives the maximum number of seconds to wait
+        """
+
+        def has_status():
+            current = self.cinder.volumes.get(volume_id)
+            LOG.debug("Current volume status: %s" % current.status)
+            return current.status == status
+
+        return self.waiter.wait(has_status, retry * sleep)
 
     def create_instance(self, hypervisor_id, inst_name="test", image_id=None,
                         flavor_name="m1.tiny",
@@ -536,12 +728,10 @@ class NovaHelper(object):
         # Allow admin users to view any keypair
         # https://bugs.launchpad.net/nova/+bug/1182965
         if not self.nova.keypairs.findall(name=keypair_name):
-            LOG.debug("Key pair '%s' not found with user '%s'" % (
-                keypair_name, self.user))
+            LOG.debug("Key pair '%s' not found" % keypair_name)
             return
         else:
-            LOG.debug("Key pair '%s' found with user '%s'" % (
-                keypair_name, self.user))
+            LOG.debug("Key pair '%s' found" % keypair_name)
 
         try:
             image = self.nova.images.get(image_id)
@@ -88,6 +88,15 @@ class BaseConnection(object):
         :raises: AuditTemplateNotFound
         """
 
+    @abc.abstractmethod
+    def get_audit_templates_by_ids(self, context, audit_template_ids):
+        """Return several audit templates at once.
+
+        :param context: The security context
+        :param audit_template_ids: The ids of the audit templates.
+        :returns: A list of the audit templates found, in no particular order.
+        """
+
     @abc.abstractmethod
     def get_audit_template_by_uuid(self, context, audit_template_uuid):
         """Return an audit template.
@@ -184,6 +193,15 @@ class BaseConnection(object):
         :raises: AuditNotFound
         """
 
+    @abc.abstractmethod
+    def get_audits_by_ids(self, context, audit_ids):
+        """Return several audits at once.
+
+        :param context: The security context
+        :param audit_ids: The ids of the audits.
+        :returns: A list of the audits found, in no particular order.
+        """
+
     @abc.abstractmethod
     def get_audit_by_uuid(self, context, audit_uuid):
         """Return an audit.
@@ -220,6 +238,17 @@ class BaseConnection(object):
         :raises: AuditNotFound
         """
 
+    @abc.abstractmethod
+    def soft_delete_audits(self, audit_ids):
+        """Soft delete audits with their action plans and actions.
+
+        The rows of each table are soft deleted with a single UPDATE per
+        batch of audits, all of them in one transaction.
+
+        :param audit_ids: The ids of the audits.
+        :returns: The number of soft deleted audits.
+        """
+
     @abc.abstractmethod
     def get_action_list(self, context, columns=None, filters=None, limit=None,
                         marker=None, sort_key=None, sort_dir=None):
@@ -262,6 +291,24 @@ class BaseConnection(object):
         :raises: ActionAlreadyExists
         """
 
+    @abc.abstractmethod
+    def create_actions(self, values_list, chain=False):
+        """Create several actions in a single transaction.
+
+        :param values_list: A list of dicts, as given to create_action.
+        :param chain: Whether each action must be followed by the next
+                      one of the list, by setting its 'next' field.
+        :returns: The list of the actions, in the same order.
+        :raises: ActionAlreadyExists
+        """
+
+    @abc.abstractmethod
+    def update_action_states(self, states):
+        """Update the state of several actions in a single transaction.
+
+        :param states: A dict giving the new state of every action uuid.
+        """
+
     @abc.abstractmethod
     def get_action_by_id(self, context, action_id):
         """Return a action.
@@ -272,6 +319,15 @@ class BaseConnection(object):
         :raises: ActionNotFound
         """
 
+    @abc.abstractmethod
+    def get_actions_by_ids(self, context, action_ids):
+        """Return several actions at once.
+
+        :param context: The security context
+        :param action_ids: The ids of the actions.
+        :returns: A list of the actions found, in no particular order.
+        """
+
     @abc.abstractmethod
     def get_action_by_uuid(self, context, action_uuid):
         """Return a action.
@@ -345,6 +401,15 @@ class BaseConnection(object):
         :raises: ActionPlanNotFound
         """
 
+    @abc.abstractmethod
+    def get_action_plans_by_ids(self, context, action_plan_ids):
+        """Return several action plans at once.
+
+        :param context: The security context
+        :param action_plan_ids: The ids of the action plans.
+        :returns: A list of the action plans found, in no particular order.
+        """
+
     @abc.abstractmethod
     def get_action_plan_by_uuid(self, context, action_plan__uuid):
         """Return a action plan.
@@ -364,6 +429,33 @@ class BaseConnection(object):
         :raises: ActionPlanReferenced
         """
 
+    @abc.abstractmethod
+    def claim_action_plan(self, action_plan_id, hostname, states,
+                          previous_hostname=None):
+        """Atomically take the ownership of an action plan.
+
+        The action plan is moved to the ONGOING state and its hostname
+        set, only if it is in one of the given states. When several
+        appliers claim the same action plan, a single one succeeds.
+
+        :param action_plan_id: The id or uuid of an action plan.
+        :param hostname: The identifier of the applier executing it.
+        :param states: The states the action plan can be claimed from.
+        :param previous_hostname: If set, the action plan is only claimed
+                                  from this applier.
+        :returns: True if the action plan was claimed.
+        """
+
+    @abc.abstractmethod
+    def claim_next_action_plan(self, hostname, states):
+        """Atomically take the ownership of the oldest claimable plan.
+
+        :param hostname: The host of the applier executing it.
+        :param states: The states the action plan can be claimed from.
+        :returns: The uuid of the claimed action plan, or None if no
+                  action plan could be claimed.
+        """
+
     @abc.abstractmethod
     def update_action_plan(self, action_plan_id, values):
         """Update properties of an action plan.
@@ -374,3 +466,43 @@ class BaseConnection(object):
         :raises: ActionPlanReferenced
         :raises: Invalid
         """
+
+    @abc.abstractmethod
+    def soft_delete_action_plans(self, action_plan_ids):
+        """Soft delete action plans and their actions.
+
+        The rows of each table are soft deleted with a single UPDATE per
+        batch of action plans, all of them in one transaction.
+
+        :param action_plan_ids: The ids of the action plans.
+        :returns: The number of soft deleted action plans.
+        """
+
+    @abc.abstractmethod
+    def purge_rows(self, table, older_than, limit):
+        """Hard delete a batch of the old rows of a table.
+
+        The rows purged are the rows soft deleted before older_than, the
+        audits and action plans finished before it and the actions of the
+        latter. The rows still referenced by other rows, e.g. the action
+        plans of which some actions are not purged yet, are left untouched.
+
+        :param table: The name of the table, e.g. 'actions'.
+        :param older_than: The datetime before which the rows are purged.
+        :param limit: Maximum number of rows to delete.
+        :returns: The number of deleted rows.
+        :raises: Invalid
+        """
+
+    @abc.abstractmethod
+    def count_purgeable_rows(self, table, older_than):
+        """Count the rows of a table purge_rows() would delete.
+
+        The rows referenced by rows of other tables which can be purged as
+        well are counted, as if the referencing tables were purged first.
+
+        :param table: The name of the table, e.g. 'actions'.
+        :param older_than: The datetime before which the rows are purged.
+        :returns: The number of rows.
+        :raises: Invalid
+        """
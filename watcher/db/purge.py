@@ -0,0 +1,94 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Purge of the old rows of the database."""
+
+import datetime
+import time
+
+from oslo_log import log
+from oslo_utils import timeutils
+
+from watcher._i18n import _
+from watcher._i18n import _LI
+from watcher.common import exception
+from watcher.db import api as db_api
+
+LOG = log.getLogger(__name__)
+
+# the referencing tables are purged before the tables they reference
+TABLES = ['actions', 'action_plans', 'audits', 'audit_templates']
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _purge_table(dbapi, table, older_than, batch_size, max_rows):
+    start = time.time()
+    count = 0
+    while True:
+        limit = batch_size
+        if max_rows is not None:
+            limit = min(batch_size, max_rows - count)
+        deleted = dbapi.purge_rows(table, older_than, limit)
+        count += deleted
+        if deleted < limit or count == max_rows:
+            break
+    elapsed = time.time() - start
+    LOG.info(_LI("%(count)d rows purged from %(table)s in %(elapsed).2fs "
+                 "(%(rate).1f rows/s)"),
+             {'count': count, 'table': table, 'elapsed': elapsed,
+              'rate': count / elapsed if elapsed else 0.0})
+    return count
+
+
+def purge(age_in_days, batch_size=DEFAULT_BATCH_SIZE, max_rows=None,
+          dry_run=False):
+    """Hard delete the rows soft deleted or finished age_in_days days ago
+
+    Each batch of rows is deleted in its own transaction, so that the
+    tables are never locked for long.
+
+    :param age_in_days: Age of the rows to purge.
+    :param batch_size: Number of rows deleted per transaction.
+    :param max_rows: Maximum number of rows to delete from all the tables,
+                     no limit if None.
+    :param dry_run: Only count the rows which would be deleted.
+    :returns: The number of deleted rows, by table.
+    :raises: Invalid if batch_size is not positive or max_rows is negative.
+    """
+    if batch_size < 1:
+        raise exception.Invalid(
+            message=_("The batch size must be at least 1."))
+    if max_rows is not None and max_rows < 0:
+        raise exception.Invalid(
+            message=_("The maximum number of rows cannot be negative."))
+    older_than = timeutils.utcnow() - datetime.timedelta(days=age_in_days)
+    dbapi = db_api.get_instance()
+    counts = dict.fromkeys(TABLES, 0)
+    remaining = max_rows
+    for table in TABLES:
+        if remaining == 0:
+            break
+        if dry_run:
+            count = dbapi.count_purgeable_rows(table, older_than)
+            if remaining is not None:
+                count = min(count, remaining)
+        else:
+            count = _purge_table(dbapi, table, older_than, batch_size,
+                                 remaining)
+        counts[table] = count
+        if remaining is not None:
+            remaining -= count
+    return counts
@@ -0,0 +1,49 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add the indexes used to filter and paginate the lists
+
+Revision ID: 3cfd8e2a8b25
+Revises: 4b16194c56bc
+Create Date: 2016-05-02 10:12:41.125487
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3cfd8e2a8b25'
+down_revision = '4b16194c56bc'
+
+from alembic import op  # noqa
+
+INDEXES = [
+    ('ix_audit_templates_deleted_at_id', 'audit_templates',
+     ['deleted_at', 'id']),
+    ('ix_audits_audit_template_id_id', 'audits', ['audit_template_id', 'id']),
+    ('ix_audits_state_id', 'audits', ['state', 'id']),
+    ('ix_audits_deleted_at_id', 'audits', ['deleted_at', 'id']),
+    ('ix_action_plans_audit_id_id', 'action_plans', ['audit_id', 'id']),
+    ('ix_action_plans_state_id', 'action_plans', ['state', 'id']),
+    ('ix_action_plans_deleted_at_id', 'action_plans', ['deleted_at', 'id']),
+    ('ix_actions_action_plan_id_id', 'actions', ['action_plan_id', 'id']),
+    ('ix_actions_state_id', 'actions', ['state', 'id']),
+    ('ix_actions_deleted_at_id', 'actions', ['deleted_at', 'id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,37 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add the host of the applier executing an action plan
+
+Revision ID: 4b16194c56bc
+Revises: None
+Create Date: 2016-04-29 16:03:52.473019
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4b16194c56bc'
+down_revision = None
+
+from alembic import op  # noqa
+import sqlalchemy as sa  # noqa
+
+
+def upgrade():
+    op.add_column('action_plans',
+                  sa.Column('hostname', sa.String(255), nullable=True))
+
+
+def downgrade():
+    # SQLite cannot drop a column, the table is copied in batch mode
+    with op.batch_alter_table('action_plans') as batch_op:
+        batch_op.drop_column('hostname')
@@ -17,11 +17,15 @@
 
 """SQLAlchemy storage backend."""
 
+import operator
+
 from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_db.sqlalchemy import session as db_session
-from oslo_db.sqlalchemy import utils as db_utils
 from oslo_log import log
+from oslo_utils import timeutils
+import sqlalchemy
+from sqlalchemy.orm import attributes as orm_attributes
 from sqlalchemy.orm import exc
 
 from watcher import _i18n
@@ -37,6 +41,9 @@ _ = _i18n._
 
 _FACADE = None
 
+# maximum number of bound parameters of the IN clauses, SQLite allows 999
+IN_CLAUSE_SIZE = 500
+
 
 def _create_facade_lazily():
     global _FACADE
@@ -89,18 +96,154 @@ def add_identity_filter(query, value):
         raise exception.InvalidIdentity(identity=value)
 
 
+def _after_marker(column, value, id_column, id_value, sort_dir):
+    """Return the criterion selecting the rows ordered after the marker
+
+    The rows are ordered on (column, id), the NULL values first in
+    ascending order as in MySQL and SQLite. The criterion starts with a
+    range on the column, so that the index on (column, id) is used.
+    """
+    if sort_dir == 'asc':
+        after, after_or_at = operator.gt, operator.ge
+    else:
+        after, after_or_at = operator.lt, operator.le
+
+    if column is None:
+        return after(id_column, id_value)
+
+    if value is None:
+        criterion = sqlalchemy.and_(column.is_(None),
+                                    after(id_column, id_value))
+        if sort_dir == 'asc':
+            criterion = sqlalchemy.or_(criterion, column.isnot(None))
+        return criterion
+
+    criterion = sqlalchemy.and_(
+        after_or_at(column, value),
+        sqlalchemy.or_(after(column, value), after(id_column, id_value)))
+    if sort_dir == 'desc' and column.nullable:
+        criterion = sqlalchemy.or_(criterion, column.is_(None))
+    return criterion
+
+
 def _paginate_query(model, limit=None, marker=None, sort_key=None,
                     sort_dir=None, query=None):
+    """Return a page of the results ordered on (sort_key, id)
+
+    The page starts after the sort key and id of the marker, the last row
+    of the previous page, instead of after the rows of the previous pages,
+    so its cost does not depend on its position.
+    """
     if not query:
         query = model_query(model)
-    sort_keys = ['id']
-    if sort_key and sort_key not in sort_keys:
-        sort_keys.insert(0, sort_key)
-    query = db_utils.paginate_query(query, model, limit, sort_keys,
-                                    marker=marker, sort_dir=sort_dir)
+    sort_dir = sort_dir or 'asc'
+    if sort_dir not in ('asc', 'desc'):
+        raise ValueError(_("Unknown sort direction, must be one of: "
+                           "asc, desc"))
+    order = sqlalchemy.asc if sort_dir == 'asc' else sqlalchemy.desc
+
+    columns = model.__table__.columns
+    column = None
+    if sort_key and sort_key != 'id':
+        if sort_key not in columns:
+            raise db_exc.InvalidSortKey(sort_key)
+        column = columns[sort_key]
+        query = query.order_by(order(column))
+    query = query.order_by(order(columns.id))
+
+    if marker is not None:
+        query = query.filter(_after_marker(
+            column, getattr(marker, sort_key) if column is not None else None,
+            columns.id, marker.id, sort_dir))
+    if limit is not None:
+        query = query.limit(limit)
     return query.all()
 
 
+def _get_by_ids(model, ids):
+    """Return the rows of the given ids, looked up in batches"""
+    ids = sorted(set(ids))
+    session = get_session()
+    rows = []
+    for start in range(0, len(ids), IN_CLAUSE_SIZE):
+        query = model_query(model, session=session)
+        rows.extend(query.filter(
+            model.id.in_(ids[start:start + IN_CLAUSE_SIZE])).all())
+    return rows
+
+
+def _soft_delete(session, model, criterion):
+    """Soft delete the rows matching the criterion with one UPDATE"""
+    query = model_query(model, session=session)
+    query = query.filter(criterion).filter(model.deleted == 0)
+    return query.update({'deleted': model.id,
+                         'deleted_at': timeutils.utcnow(),
+                         'state': 'DELETED'},
+                        synchronize_session=False)
+
+
+# the states of the audits and action plans which are over
+_FINISHED_STATES = ['SUCCEEDED', 'FAILED', 'CANCELLED']
+
+_PURGE_MODELS = {
+    'actions': models.Action,
+    'action_plans': models.ActionPlan,
+    'audits': models.Audit,
+    'audit_templates': models.AuditTemplate,
+}
+
+# a row can only be purged once it is not referenced anymore by the rows
+# of these tables
+_PURGE_REFERENCES = {
+    'actions': [],
+    'action_plans': [('actions', models.Action.action_plan_id)],
+    'audits': [('action_plans', models.ActionPlan.audit_id)],
+    'audit_templates': [('audits', models.Audit.audit_template_id)],
+}
+
+
+def _purgeable(table, older_than):
+    """Return the criterion selecting the rows of a table to purge
+
+    These are the rows soft deleted before older_than, the audits and
+    action plans finished before it and the actions of the latter.
+    """
+    model = _PURGE_MODELS[table]
+    criterion = model.deleted_at < older_than
+    if table == 'actions':
+        action_plan_ids = sqlalchemy.select([models.ActionPlan.id]).where(
+            _purgeable('action_plans', older_than)).correlate(None)
+        criterion = sqlalchemy.or_(
+            criterion, model.action_plan_id.in_(action_plan_ids))
+    elif table in ('action_plans', 'audits'):
+        last_change = sqlalchemy.func.coalesce(model.updated_at,
+                                               model.created_at)
+        criterion = sqlalchemy.or_(criterion, sqlalchemy.and_(
+            model.state.in_(_FINISHED_STATES), last_change < older_than))
+    return criterion
+
+
+def _purgeable_query(query, table, older_than, strict=True):
+    """Filter the query on the rows of a table which can be purged
+
+    :param strict: when False, the rows only referenced by rows which can
+                   be purged as well are selected too, which is how they
+                   are counted before anything is deleted.
+    """
+    model = _PURGE_MODELS[table]
+    query = query.filter(_purgeable(table, older_than))
+    for referencing_table, column in _PURGE_REFERENCES[table]:
+        referencing = column == model.id
+        if not strict:
+            referencing_model = _PURGE_MODELS[referencing_table]
+            purgeable_ids = sqlalchemy.select([referencing_model.id]).where(
+                _purgeable(referencing_table, older_than)).correlate(None)
+            referencing = sqlalchemy.and_(
+                referencing, ~referencing_model.id.in_(purgeable_ids))
+        query = query.filter(~sqlalchemy.exists().where(referencing))
+    return query
+
+
 class Connection(api.BaseConnection):
     """SqlAlchemy connection."""
 
@@ -154,6 +297,8 @@ class Connection(api.BaseConnection):
             query = query.filter_by(state=filters['state'])
         if 'audit_id' in filters:
             query = query.filter_by(audit_id=filters['audit_id'])
+        if 'hostname' in filters:
+            query = query.filter_by(hostname=filters['hostname'])
         if 'audit_uuid' in filters:
             query = query.join(models.Audit,
                                models.ActionPlan.audit_id == models.Audit.id)
@@ -226,6 +371,11 @@ class Connection(api.BaseConnection):
             raise exception.AuditTemplateNotFound(
                 audit_template=audit_template_id)
 
+    def get_audit_templates_by_ids(self, context, audit_template_ids):
+        return [audit_template for audit_template in
+                _get_by_ids(models.AuditTemplate, audit_template_ids)
+                if context.show_deleted or audit_template.deleted_at is None]
+
     def get_audit_template_by_uuid(self, context, audit_template_uuid):
         query = model_query(models.AuditTemplate)
         query = query.filter_by(uuid=audit_template_uuid)
@@ -346,6 +496,29 @@ class Connection(api.BaseConnection):
         except exc.NoResultFound:
             raise exception.AuditNotFound(audit=audit_id)
 
+    def get_audits_by_ids(self, context, audit_ids):
+        return [audit for audit in _get_by_ids(models.Audit, audit_ids)
+                if context.show_deleted or audit.state != 'DELETED']
+
+    def soft_delete_audits(self, audit_ids):
+        audit_ids = sorted(set(audit_ids))
+        session = get_session()
+        count = 0
+        with session.begin():
+            for start in range(0, len(audit_ids), IN_CLAUSE_SIZE):
+                ids = audit_ids[start:start + IN_CLAUSE_SIZE]
+                action_plan_ids = sqlalchemy.select(
+                    [models.ActionPlan.id]).where(
+                    models.ActionPlan.audit_id.in_(ids))
+                _soft_delete(session, models.Action,
+                             models.Action.action_plan_id.in_(
+                                 action_plan_ids))
+                _soft_delete(session, models.ActionPlan,
+                             models.ActionPlan.audit_id.in_(ids))
+                count += _soft_delete(session, models.Audit,
+                                      models.Audit.id.in_(ids))
+        return count
+
     def get_audit_by_uuid(self, context, audit_uuid):
         query = model_query(models.Audit)
         query = query.filter_by(uuid=audit_uuid)
@@ -438,6 +611,71 @@ class Connection(api.BaseConnection):
             raise exception.ActionAlreadyExists(uuid=values['uuid'])
         return action
 
+    def create_actions(self, values_list, chain=False):
+        values_list = [dict(values) for values in values_list]
+        for values in values_list:
+            # ensure defaults are present for new actions
+            if not values.get('uuid'):
+                values['uuid'] = utils.generate_uuid()
+        uuids = [values['uuid'] for values in values_list]
+
+        session = get_session()
+        table = models.Action.__table__
+        try:
+            with session.begin():
+                if values_list:
+                    # as with the ORM, the defaults apply to None values
+                    columns = [
+                        c for c in set().union(*values_list)
+                        if c in table.c and (
+                            table.c[c].default is None or
+                            any(v.get(c) is not None for v in values_list))]
+                    session.execute(table.insert(), [
+                        dict((c, values.get(c)) for c in columns)
+                        for values in values_list])
+
+                # the ids and the defaults filled in by the DB are only
+                # known once the actions are inserted
+                rows = {}
+                for start in range(0, len(uuids), IN_CLAUSE_SIZE):
+                    query = model_query(models.Action, session=session)
+                    rows.update(
+                        (action.uuid, action) for action in query.filter(
+                            models.Action.uuid.in_(
+                                uuids[start:start + IN_CLAUSE_SIZE])))
+                actions = [rows[uuid] for uuid in uuids]
+
+                if chain and len(actions) > 1:
+                    session.execute(
+                        table.update().where(
+                            table.c.id == sqlalchemy.bindparam('_id')).values(
+                                next=sqlalchemy.bindparam('_next')),
+                        [{'_id': action.id, '_next': next_action.id}
+                         for action, next_action in zip(actions,
+                                                        actions[1:])])
+                    for action, next_action in zip(actions, actions[1:]):
+                        orm_attributes.set_committed_value(
+                            action, 'next', next_action.id)
+        except db_exc.DBDuplicateEntry as e:
+            raise exception.ActionAlreadyExists(uuid=e.value)
+
+        return actions
+
+    def update_action_states(self, states):
+        uuids_by_state = {}
+        for action_uuid, state in states.items():
+            uuids_by_state.setdefault(state, []).append(action_uuid)
+
+        session = get_session()
+        with session.begin():
+            for state, uuids in uuids_by_state.items():
+                for start in range(0, len(uuids), IN_CLAUSE_SIZE):
+                    query = model_query(models.Action, session=session)
+                    query = query.filter(models.Action.uuid.in_(
+                        uuids[start:start + IN_CLAUSE_SIZE]))
+                    query.update({'state': state},
+                                 synchronize_session=False)
+
     def get_action_by_id(self, context, action_id):
         query = model_query(models.Action)
         query = query.filter_by(id=action_id)
@@ -451,6 +689,10 @@ class Connection(api.BaseConnection):
         except exc.NoResultFound:
             raise exception.ActionNotFound(action=action_id)
 
+    def get_actions_by_ids(self, context, action_ids):
+        return [action for action in _get_by_ids(models.Action, action_ids)
+                if context.show_deleted or action.state != 'DELETED']
+
     def get_action_by_uuid(self, context, action_uuid):
         query = model_query(models.Action)
         query = query.filter_by(uuid=action_uuid)
@@ -546,6 +788,24 @@ class Connection(api.BaseConnection):
         except exc.NoResultFound:
             raise exception.ActionPlanNotFound(action_plan=action_plan_id)
 
+    def get_action_plans_by_ids(self, context, action_plan_ids):
+        return [action_plan for action_plan in
+                _get_by_ids(models.ActionPlan, action_plan_ids)
+                if context.show_deleted or action_plan.state != 'DELETED']
+
+    def soft_delete_action_plans(self, action_plan_ids):
+        action_plan_ids = sorted(set(action_plan_ids))
+        session = get_session()
+        count = 0
+        with session.begin():
+            for start in range(0, len(action_plan_ids), IN_CLAUSE_SIZE):
+                ids = action_plan_ids[start:start + IN_CLAUSE_SIZE]
+                _soft_delete(session, models.Action,
+                             models.Action.action_plan_id.in_(ids))
+                count += _soft_delete(session, models.ActionPlan,
+                                      models.ActionPlan.id.in_(ids))
+        return count
+
     def get_action_plan_by_uuid(self, context, action_plan__uuid):
         query = model_query(models.ActionPlan)
         query = query.filter_by(uuid=action_plan__uuid)
@@ -584,6 +844,33 @@ class Connection(api.BaseConnection):
 
             query.delete()
 
+    def claim_action_plan(self, action_plan_id, hostname, states,
+                          previous_hostname=None):
+        session = get_session()
+        with session.begin():
+            query = model_query(models.ActionPlan, session=session)
+            query = add_identity_filter(query, action_plan_id)
+            query = query.filter(models.ActionPlan.state.in_(states))
+            if previous_hostname is not None:
+                query = query.filter_by(hostname=previous_hostname)
+            # the WHERE clause on the state makes the update a compare and
+            # swap, only one of the concurrent claims changes the row
+            count = query.update({'state': 'ONGOING', 'hostname': hostname},
+                                 synchronize_session=False)
+        return count == 1
+
+    def claim_next_action_plan(self, hostname, states):
+        while True:
+            query = model_query(models.ActionPlan.uuid)
+            query = query.filter(models.ActionPlan.state.in_(states))
+            query = query.order_by(models.ActionPlan.id.asc())
+            row = query.first()
+            if row is None:
+                return None
+            if self.claim_action_plan(row.uuid, hostname, states):
+                return row.uuid
+            # claimed by another applier in the meantime, try the next one
+
     def update_action_plan(self, action_plan_id, values):
         if 'uuid' in values:
             raise exception.Invalid(
@@ -617,3 +904,29 @@ class Connection(api.BaseConnection):
                 raise exception.ActionPlanNotFound(node=action_plan_id)
 
             query.soft_delete()
+
+    def purge_rows(self, table, older_than, limit):
+        if table not in _PURGE_MODELS:
+            raise exception.Invalid(
+                message=_("Cannot purge the table %s") % table)
+        model = _PURGE_MODELS[table]
+
+        session = get_session()
+        with session.begin():
+            query = model_query(model.id, session=session)
+            query = _purgeable_query(query, table, older_than)
+            ids = [row.id for row in query.order_by(model.id).limit(limit)]
+            for start in range(0, len(ids), IN_CLAUSE_SIZE):
+                query = model_query(model, session=session)
+                query = query.filter(
+                    model.id.in_(ids[start:start + IN_CLAUSE_SIZE]))
+                query.delete(synchronize_session=False)
+        return len(ids)
+
+    def count_purgeable_rows(self, table, older_than):
+        if table not in _PURGE_MODELS:
+            raise exception.Invalid(
+                message=_("Cannot purge the table %s") % table)
+        query = model_query(_PURGE_MODELS[table].id)
+        return _purgeable_query(query, table, older_than,
+                                strict=False).count()
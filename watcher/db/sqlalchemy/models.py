@@ -117,6 +117,7 @@ class AuditTemplate(Base):
     __table_args__ = (
         schema.UniqueConstraint('uuid', name='uniq_audit_templates0uuid'),
         schema.UniqueConstraint('name', name='uniq_audit_templates0name'),
+        schema.Index('ix_audit_templates_deleted_at_id', 'deleted_at', 'id'),
         table_args()
     )
     id = Column(Integer, primary_key=True)
@@ -135,6 +136,10 @@ class Audit(Base):
     __tablename__ = 'audits'
     __table_args__ = (
         schema.UniqueConstraint('uuid', name='uniq_audits0uuid'),
+        schema.Index('ix_audits_audit_template_id_id',
+                     'audit_template_id', 'id'),
+        schema.Index('ix_audits_state_id', 'state', 'id'),
+        schema.Index('ix_audits_deleted_at_id', 'deleted_at', 'id'),
         table_args()
     )
     id = Column(Integer, primary_key=True)
@@ -152,6 +157,9 @@ class Action(Base):
     __tablename__ = 'actions'
     __table_args__ = (
         schema.UniqueConstraint('uuid', name='uniq_actions0uuid'),
+        schema.Index('ix_actions_action_plan_id_id', 'action_plan_id', 'id'),
+        schema.Index('ix_actions_state_id', 'state', 'id'),
+        schema.Index('ix_actions_deleted_at_id', 'deleted_at', 'id'),
         table_args()
     )
     id = Column(Integer, primary_key=True)
@@ -173,6 +181,9 @@ class ActionPlan(Base):
     __tablename__ = 'action_plans'
     __table_args__ = (
         schema.UniqueConstraint('uuid', name='uniq_action_plans0uuid'),
+        schema.Index('ix_action_plans_audit_id_id', 'audit_id', 'id'),
+        schema.Index('ix_action_plans_state_id', 'state', 'id'),
+        schema.Index('ix_action_plans_deleted_at_id', 'deleted_at', 'id'),
         table_args()
     )
     id = Column(Integer, primary_key=True)
@@ -184,3 +195,4 @@ class ActionPlan(Base):
     audit_id = Column(Integer, ForeignKey('audits.id'),
                       nullable=True)
     state = Column(String(20), nullable=True)
+    hostname = Column(String(255), nullable=True)
@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from oslo_log import log
+import six
 from threading import Lock
 
 LOG = log.getLogger(__name__)
@@ -25,6 +26,37 @@ class Mapping(object):
         self._mapping_hypervisors = {}
         self.mapping_vm = {}
         self.lock = Lock()
+        # hypervisors whose list of VMs is shared with a fork
+        self._shared_nodes = set()
+        # {node_uuid: {usage_key: total}} of the VMs mapped on each node,
+        # computed on first use and then kept up to date by map/unmap
+        self._usage = {}
+        # {usage_key: get_vm_value} of the metric-based usages
+        self._usage_sources = {}
+
+    def fork(self, model):
+        """Return a copy-on-write copy of the mapping for a forked model
+
+        The per-hypervisor lists of VMs are shared by both mappings until
+        one of them maps or unmaps a VM on that hypervisor.
+        """
+        mapping = Mapping(model)
+        with self.lock:
+            mapping._mapping_hypervisors = dict(self._mapping_hypervisors)
+            mapping.mapping_vm = dict(self.mapping_vm)
+            self._shared_nodes = set(self._mapping_hypervisors)
+            mapping._shared_nodes = set(self._mapping_hypervisors)
+            mapping._usage = dict((node_uuid, dict(usage)) for node_uuid, usage
+                                  in self._usage.items())
+            mapping._usage_sources = dict(self._usage_sources)
+        return mapping
+
+    def _get_node_vms_for_update(self, node_uuid):
+        if node_uuid in self._shared_nodes:
+            self._mapping_hypervisors[node_uuid] = list(
+                self._mapping_hypervisors[node_uuid])
+            self._shared_nodes.discard(node_uuid)
+        return self._mapping_hypervisors[node_uuid]
 
     def map(self, hypervisor, vm):
         """Select the hypervisor where the instance are launched
@@ -41,12 +73,13 @@ class Mapping(object):
                 self._mapping_hypervisors[hypervisor.uuid] = []
 
             # map node => vms
-            self._mapping_hypervisors[hypervisor.uuid].append(
-                vm.uuid)
+            self._get_node_vms_for_update(hypervisor.uuid).append(vm.uuid)
 
             # map vm => node
             self.mapping_vm[vm.uuid] = hypervisor.uuid
 
+            self._update_usage(hypervisor.uuid, vm.uuid, 1)
+
         finally:
             self.lock.release()
 
@@ -68,9 +101,11 @@ class Mapping(object):
         try:
             self.lock.acquire()
             if str(node_uuid) in self._mapping_hypervisors:
-                self._mapping_hypervisors[str(node_uuid)].remove(str(vm_uuid))
+                self._get_node_vms_for_update(str(node_uuid)).remove(
+                    str(vm_uuid))
                 # remove vm
                 self.mapping_vm.pop(vm_uuid)
+                self._update_usage(str(node_uuid), str(vm_uuid), -1)
             else:
                 LOG.warning(
                     "trying to delete the virtual machine {0}  but it was not "
@@ -79,6 +114,68 @@ class Mapping(object):
         finally:
             self.lock.release()
 
+    def register_usage(self, key, get_vm_value):
+        """Aggregate a metric-based usage of the VMs on each hypervisor
+
+        :param key: the name of the usage, given to get_node_usage
+        :param get_vm_value: callable returning the value of a VM given
+                             its uuid and the model
+        """
+        with self.lock:
+            if self._usage_sources.get(key) == get_vm_value:
+                return
+            self._usage_sources[key] = get_vm_value
+            for usage in self._usage.values():
+                usage.pop(key, None)
+
+    def _get_usage_source(self, key):
+        get_vm_value = self._usage_sources.get(key)
+        if get_vm_value is None:
+            resource = self.model.get_resource_from_id(key)
+
+            def get_vm_value(vm_uuid, model):
+                return resource.get_capacity_from_id(vm_uuid) or 0
+        return get_vm_value
+
+    def _update_usage(self, node_uuid, vm_uuid, sign):
+        usage = self._usage.get(node_uuid)
+        if not usage:
+            return
+        for key in usage:
+            usage[key] += sign * self._get_usage_source(key)(vm_uuid,
+                                                             self.model)
+
+    def get_node_usage(self, hypervisor, key):
+        return self.get_node_usage_from_id(hypervisor.uuid, key)
+
+    def get_node_usage_from_id(self, node_uuid, key):
+        """Total usage of the VMs running on a hypervisor
+
+        The total is computed the first time it is requested, then kept
+        up to date when VMs are mapped or unmapped, so that it can be read
+        in constant time. The capacities of a VM must therefore not be
+        changed while it is mapped.
+
+        :param node_uuid: the uuid of the hypervisor
+        :param key: a ResourceType, or a usage given to register_usage
+        :return: the sum of the values of the VMs of the hypervisor
+        """
+        if not isinstance(key, six.string_types):
+            key = str(key)
+        node_uuid = str(node_uuid)
+        with self.lock:
+            usage = self._usage.setdefault(node_uuid, {})
+            if key not in usage:
+                vm_uuids = self.get_node_vms_from_id(node_uuid)
+                get_vm_value = self._usage_sources.get(key)
+                if get_vm_value is None:
+                    usage[key] = self.model.get_resource_from_id(
+                        key).get_total_capacity_from_ids(vm_uuids)
+                else:
+                    usage[key] = sum(get_vm_value(vm_uuid, self.model)
+                                     for vm_uuid in vm_uuids)
+            return usage[key]
+
     def get_mapping(self):
         return self._mapping_hypervisors
 
@@ -13,6 +13,8 @@
 # implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import copy
+
 from oslo_log import log
 
 from watcher._i18n import _
@@ -56,6 +58,13 @@ class ModelRoot(object):
         self.assert_vm(vm)
         self._vms[vm.uuid] = vm
 
+    def remove_vm(self, vm):
+        self.assert_vm(vm)
+        if str(vm.uuid) not in self._vms.keys():
+            raise exception.InstanceNotFound(name=vm.uuid)
+        else:
+            del self._vms[vm.uuid]
+
     def get_all_hypervisors(self):
         return self._hypervisors
 
@@ -75,8 +84,38 @@ class ModelRoot(object):
     def get_mapping(self):
         return self.mapping
 
+    def fork(self):
+        """Return a copy-on-write snapshot of the model
+
+        The snapshot can be modified (placements, capacities, hypervisor
+        attributes) without affecting this model, while unchanged
+        structures stay shared. VMs are shared and must not be modified in
+        place: replace them with add_vm instead. Several snapshots of the
+        same model can be used at the same time.
+        """
+        model = ModelRoot()
+        model._hypervisors = dict((uuid, copy.copy(h)) for uuid, h
+                                  in self._hypervisors.items())
+        model._vms = dict(self._vms)
+        model.mapping = self.mapping.fork(model)
+        model.resource = dict((name, r.fork()) for name, r
+                              in self.resource.items())
+        return model
+
     def create_resource(self, r):
         self.resource[str(r.name)] = r
 
     def get_resource_from_id(self, id):
         return self.resource[str(id)]
+
+    def get_vms_capacities(self, resource_type):
+        """Return the {vm_uuid: capacity} of every VM for a resource type"""
+        uuids = list(self._vms.keys())
+        return dict(zip(uuids, self.get_resource_from_id(
+            resource_type).get_capacities_from_ids(uuids)))
+
+    def get_hypervisors_capacities(self, resource_type):
+        """Return the {uuid: capacity} of every hypervisor"""
+        uuids = list(self._hypervisors.keys())
+        return dict(zip(uuids, self.get_resource_from_id(
+            resource_type).get_capacities_from_ids(uuids)))
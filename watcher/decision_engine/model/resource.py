@@ -14,7 +14,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import array
+import collections
+
 from enum import Enum
+import six
 
 
 class ResourceType(Enum):
@@ -24,7 +28,44 @@ class ResourceType(Enum):
     disk_capacity = 'disk_capacity'
 
 
+class CapacityMapping(collections.MutableMapping):
+    """Dict-like view of the capacities stored by a Resource"""
+
+    def __init__(self, resource):
+        self._resource = resource
+
+    def __getitem__(self, uuid):
+        value = self._resource.get_capacity_from_id(uuid)
+        if value is None:
+            raise KeyError(uuid)
+        return value
+
+    def __setitem__(self, uuid, value):
+        self._resource.set_capacity_from_id(uuid, value)
+
+    def __delitem__(self, uuid):
+        if not self._resource.unset_capacity_from_id(uuid):
+            raise KeyError(uuid)
+
+    def __contains__(self, uuid):
+        return self._resource._key(uuid) in self._resource._indices
+
+    def __iter__(self):
+        return iter(list(self._resource._uuids))
+
+    def __len__(self):
+        return len(self._resource._uuids)
+
+
 class Resource(object):
+    """Capacities of the elements of the model for one type of resource
+
+    The capacities are stored in columns: each element gets a dense index
+    into a column of values, which stays an integer array as long as only
+    integers are stored, and turns into a list otherwise. numpy is not a
+    dependency of Watcher, the columns use the array module instead.
+    """
+
     def __init__(self, name, capacity=None):
         """Resource
 
@@ -34,7 +75,12 @@ class Resource(object):
         """
         self._name = name
         self.capacity = capacity
-        self.mapping = {}
+        self._indices = {}
+        self._uuids = []
+        self._values = array.array('l')
+        # whether the columns are shared with a fork and must be copied
+        # before being modified
+        self._shared = False
 
     @property
     def name(self):
@@ -44,15 +90,102 @@ class Resource(object):
     def name(self, n):
         self._name = n
 
+    @property
+    def mapping(self):
+        return CapacityMapping(self)
+
+    @staticmethod
+    def _key(uuid):
+        # the elements are indexed by the string form of their uuid
+        return str(uuid)
+
+    def fork(self):
+        """Return a copy of the resource sharing its columns until written"""
+        resource = Resource(self.name, self.capacity)
+        resource._indices = self._indices
+        resource._uuids = self._uuids
+        resource._values = self._values
+        resource._shared = self._shared = True
+        return resource
+
+    def _copy_on_write(self):
+        if self._shared:
+            self._indices = dict(self._indices)
+            self._uuids = list(self._uuids)
+            self._values = self._values[:]
+            self._shared = False
+
+    def _check_value(self, value):
+        # any value which is not an integer turns the column into a list
+        if (isinstance(self._values, array.array) and
+                (isinstance(value, bool) or
+                 not isinstance(value, six.integer_types) or
+                 not -2 ** 31 <= value < 2 ** 31)):
+            self._values = list(self._values)
+
     def set_capacity(self, element, value):
-        self.mapping[element.uuid] = value
+        self.set_capacity_from_id(element.uuid, value)
 
-    def get_capacity_from_id(self, uuid):
-        if str(uuid) in self.mapping.keys():
-            return self.mapping[str(uuid)]
+    def set_capacity_from_id(self, uuid, value):
+        key = self._key(uuid)
+        self._copy_on_write()
+        self._check_value(value)
+        index = self._indices.get(key)
+        if index is None:
+            self._indices[key] = len(self._uuids)
+            self._uuids.append(key)
+            self._values.append(value)
         else:
+            self._values[index] = value
+
+    def unset_capacity(self, element):
+        return self.unset_capacity_from_id(element.uuid)
+
+    def unset_capacity_from_id(self, uuid):
+        """Remove the capacity of an element
+
+        :return: False if the element has no capacity
+        """
+        key = self._key(uuid)
+        if key not in self._indices:
+            return False
+        self._copy_on_write()
+        # move the last element into the freed slot to keep indices dense
+        index = self._indices.pop(key)
+        last_uuid = self._uuids.pop()
+        last_value = self._values.pop()
+        if last_uuid != key:
+            self._indices[last_uuid] = index
+            self._uuids[index] = last_uuid
+            self._values[index] = last_value
+        return True
+
+    def get_capacity_from_id(self, uuid):
+        index = self._indices.get(self._key(uuid))
+        if index is None:
             # TODO(jed) throw exception
             return None
+        return self._values[index]
 
     def get_capacity(self, element):
         return self.get_capacity_from_id(element.uuid)
+
+    def get_capacities_from_ids(self, uuids):
+        """Capacities of several elements at once, None when unknown"""
+        get_index = self._indices.get
+        key = self._key
+        values = self._values
+        indices = [get_index(key(uuid)) for uuid in uuids]
+        return [None if index is None else values[index]
+                for index in indices]
+
+    def get_capacities(self, elements):
+        return self.get_capacities_from_ids([e.uuid for e in elements])
+
+    def get_total_capacity_from_ids(self, uuids):
+        """Sum of the capacities of several elements, 0 when unknown"""
+        get_index = self._indices.get
+        key = self._key
+        values = self._values
+        indices = [get_index(key(uuid)) for uuid in uuids]
+        return sum(values[index] for index in indices if index is not None)
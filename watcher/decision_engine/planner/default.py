@@ -19,6 +19,7 @@
 
 from oslo_log import log
 
+from watcher._i18n import _LE
 from watcher._i18n import _LW
 from watcher.common import utils
 from watcher.decision_engine.planner import base
@@ -73,21 +74,14 @@ class DefaultPlanner(base.BasePlanner):
             action_plan.first_action_id = None
             action_plan.save()
         else:
-            # create the first action
-            parent_action = self._create_action(context,
-                                                scheduled[0][1],
-                                                None)
-            # remove first
-            scheduled.pop(0)
+            # the whole plan is written in a single transaction, each
+            # action being followed by the next one
+            new_actions = self._create_actions(
+                context, action_plan, [s_action[1] for s_action in scheduled])
 
-            action_plan.first_action_id = parent_action.id
+            action_plan.first_action_id = new_actions[0].id
             action_plan.save()
 
-            for s_action in scheduled:
-                current_action = self._create_action(context, s_action[1],
-                                                     parent_action)
-                parent_action = current_action
-
         return action_plan
 
     def _create_action_plan(self, context, audit_id):
@@ -100,23 +94,20 @@ class DefaultPlanner(base.BasePlanner):
 
         new_action_plan = objects.ActionPlan(context, **action_plan_dict)
         new_action_plan.create(context)
-        new_action_plan.save()
         return new_action_plan
 
-    def _create_action(self, context, _action, parent_action):
+    def _create_actions(self, context, action_plan, _actions):
+        LOG.debug("Creating the %d actions of the action plan %s in "
+                  "watcher db", len(_actions), action_plan.uuid)
         try:
-            LOG.debug("Creating the %s in watcher db",
-                      _action.get("action_type"))
-
-            new_action = objects.Action(context, **_action)
-            new_action.create(context)
-            new_action.save()
-
-            if parent_action:
-                parent_action.next = new_action.id
-                parent_action.save()
-
-            return new_action
-        except Exception as exc:
-            LOG.exception(exc)
+            return objects.Action.bulk_create(
+                context,
+                [objects.Action(context, **_action) for _action in _actions],
+                chain=True)
+        except Exception:
+            LOG.exception(_LE("Could not create the %(count)d actions of "
+                              "the action plan %(action_plan)s in watcher "
+                              "db"),
+                          {'count': len(_actions),
+                           'action_plan': action_plan.uuid})
             raise
@@ -0,0 +1,198 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Placement engine used by the consolidation strategies to find the
+hypervisor where a VM fits without checking every hypervisor in turn.
+
+The hypervisors are kept in the order in which the strategy wants them to
+be tried, in a segment tree storing for each range of hypervisors the
+highest free capacity of every dimension (e.g. cpu, ram and disk). A
+first-fit query only goes down into the ranges where the VM may fit, and
+the tree is updated in logarithmic time when a migration is simulated.
+
+The best-fit queries bisect a list of the hypervisors sorted on the free
+capacity of the primary dimension, then scan it from there until a
+hypervisor fits, skipping those rejected on the other dimensions or by
+the check of the strategy. Keeping this list sorted after a migration
+takes linear time, a move of the list in memory, which is cheap compared
+to the checks it saves.
+
+The free capacities are only used to discard the hypervisors where a VM
+cannot fit; a strategy can give its own check to confirm the hypervisor
+found, so that its placement decisions are kept unchanged.
+"""
+
+import bisect
+
+# tolerance on the free capacities, which are computed by subtraction
+EPSILON = 1e-9
+
+
+class PlacementEngine(object):
+    """Free-capacity index of a list of hypervisors"""
+
+    def __init__(self, dimensions, hosts, primary=None):
+        """Build the index
+
+        :param dimensions: the names of the resources, e.g. ['cpu', 'ram']
+        :param hosts: (host_id, limits, used) of every hypervisor, in the
+                      order of the first-fit queries. limits and used are
+                      dicts giving the usable capacity and the current
+                      usage of the hypervisor for every dimension.
+        :param primary: the dimension used by the best-fit queries,
+                        defaults to the first one
+        """
+        self.dimensions = list(dimensions)
+        self.primary = primary or self.dimensions[0]
+        self._host_ids = []
+        self._positions = {}
+        self._limits = []
+        self._used = []
+        for host_id, limits, used in hosts:
+            self._positions[host_id] = len(self._host_ids)
+            self._host_ids.append(host_id)
+            self._limits.append(dict((d, limits[d]) for d in self.dimensions))
+            self._used.append(dict((d, used[d]) for d in self.dimensions))
+
+        self._size = 1
+        while self._size < len(self._host_ids):
+            self._size *= 2
+        # {dimension: [max free capacity of the range of each tree node]}
+        self._max_free = dict(
+            (d, [float('-inf')] * (2 * self._size)) for d in self.dimensions)
+        for position in range(len(self._host_ids)):
+            for d in self.dimensions:
+                self._max_free[d][self._size + position] = (
+                    self._free(position, d))
+        for node in range(self._size - 1, 0, -1):
+            for d in self.dimensions:
+                max_free = self._max_free[d]
+                max_free[node] = max(max_free[2 * node],
+                                     max_free[2 * node + 1])
+
+        self._by_free = sorted(
+            (self._free(position, self.primary), position)
+            for position in range(len(self._host_ids)))
+
+    def __len__(self):
+        return len(self._host_ids)
+
+    def _free(self, position, dimension):
+        return (self._limits[position][dimension] -
+                self._used[position][dimension])
+
+    def get_free(self, host_id):
+        """Free capacity of a hypervisor for every dimension"""
+        position = self._positions[host_id]
+        return dict((d, self._free(position, d)) for d in self.dimensions)
+
+    def get_used(self, host_id):
+        return dict(self._used[self._positions[host_id]])
+
+    def fits(self, host_id, demand):
+        """Whether the demand fits in the free capacity of a hypervisor"""
+        used = self._used[self._positions[host_id]]
+        limits = self._limits[self._positions[host_id]]
+        return all(used[d] + demand[d] <= limits[d] for d in self.dimensions)
+
+    def _may_fit(self, node, demand):
+        return all(self._max_free[d][node] >= demand[d] - EPSILON
+                   for d in self.dimensions)
+
+    def _accept(self, position, demand, exclude, check):
+        host_id = self._host_ids[position]
+        if exclude is not None and host_id in exclude:
+            return False
+        if check is not None:
+            return check(host_id)
+        return self.fits(host_id, demand)
+
+    def first_fit(self, demand, exclude=None, count=None, check=None):
+        """First hypervisor, in the order of the index, fitting a demand
+
+        :param demand: dict giving the demand for every dimension
+        :param exclude: host ids which must not be returned
+        :param count: only consider the first count hypervisors
+        :param check: callable confirming that a hypervisor given by its
+                      id can be used, instead of fits()
+        :return: a host id, or None if the demand fits nowhere
+        """
+        count = len(self._host_ids) if count is None else count
+        # depth-first search of the leftmost matching leaf
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, start, end = stack.pop()
+            if start >= count or not self._may_fit(node, demand):
+                continue
+            if node >= self._size:
+                if self._accept(start, demand, exclude, check):
+                    return self._host_ids[start]
+                continue
+            middle = (start + end) // 2
+            stack.append((2 * node + 1, middle, end))
+            stack.append((2 * node, start, middle))
+        return None
+
+    def best_fit(self, demand, exclude=None, check=None):
+        """Hypervisor fitting a demand with the least primary free capacity
+
+        :param demand: dict giving the demand for every dimension
+        :param exclude: host ids which must not be returned
+        :param check: callable confirming that a hypervisor given by its
+                      id can be used, instead of fits()
+        :return: a host id, or None if the demand fits nowhere
+        """
+        index = bisect.bisect_left(
+            self._by_free, (demand[self.primary] - EPSILON, -1))
+        for free, position in self._by_free[index:]:
+            if self._accept(position, demand, exclude, check):
+                return self._host_ids[position]
+        return None
+
+    def _update(self, position, demand, sign):
+        # the deletion and the insertion in the sorted list move its tail
+        primary_free = self._free(position, self.primary)
+        del self._by_free[bisect.bisect_left(self._by_free,
+                                             (primary_free, position))]
+        used = self._used[position]
+        for d in self.dimensions:
+            used[d] += sign * demand[d]
+        bisect.insort(self._by_free,
+                      (self._free(position, self.primary), position))
+
+        node = self._size + position
+        for d in self.dimensions:
+            self._max_free[d][node] = self._free(position, d)
+        node //= 2
+        while node:
+            for d in self.dimensions:
+                max_free = self._max_free[d]
+                max_free[node] = max(max_free[2 * node],
+                                     max_free[2 * node + 1])
+            node //= 2
+
+    def add(self, host_id, demand):
+        """Account for a VM placed on a hypervisor"""
+        self._update(self._positions[host_id], demand, 1)
+
+    def remove(self, host_id, demand):
+        """Account for a VM removed from a hypervisor"""
+        self._update(self._positions[host_id], demand, -1)
+
+    def move(self, src_host_id, dst_host_id, demand):
+        """Account for the migration of a VM"""
+        self.remove(src_host_id, demand)
+        self.add(dst_host_id, demand)
@@ -47,7 +47,7 @@ class DefaultStrategyContext(base.BaseStrategyContext):
         audit_template = objects.\
             AuditTemplate.get_by_id(request_context, audit.audit_template_id)
 
-        osc = clients.OpenStackClients()
+        osc = clients.get_clients()
 
         # todo(jed) retrieve in audit_template parameters (threshold,...)
         # todo(jed) create ActionPlan
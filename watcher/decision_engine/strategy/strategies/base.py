@@ -76,7 +76,7 @@ class BaseStrategy(object):
     @property
     def osc(self):
         if not self._osc:
-            self._osc = clients.OpenStackClients()
+            self._osc = clients.get_clients()
         return self._osc
 
     @property
@@ -24,7 +24,9 @@ from watcher.common import exception
 from watcher.decision_engine.model import hypervisor_state as hyper_state
 from watcher.decision_engine.model import resource
 from watcher.decision_engine.model import vm_state
+from watcher.decision_engine.strategy.common import placement
 from watcher.decision_engine.strategy.strategies import base
+from watcher.metrics_engine.cluster_history import cache
 from watcher.metrics_engine.cluster_history import ceilometer as \
     ceilometer_cluster_history
 
@@ -84,6 +86,8 @@ class BasicConsolidation(base.BaseStrategy):
         self.efficacy = 100
 
         self._ceilometer = None
+        # {(resource_id, meter_name): value} filled by prefetch_metrics
+        self.metrics = {}
 
         # TODO(jed) improve threshold overbooking ?,...
         self.threshold_mem = 1
@@ -104,14 +108,44 @@ class BasicConsolidation(base.BaseStrategy):
     @property
     def ceilometer(self):
         if self._ceilometer is None:
-            self._ceilometer = (ceilometer_cluster_history.
-                                CeilometerClusterHistory(osc=self.osc))
+            self._ceilometer = cache.CachedClusterHistory(
+                ceilometer_cluster_history.CeilometerClusterHistory(
+                    osc=self.osc))
         return self._ceilometer
 
     @ceilometer.setter
     def ceilometer(self, ceilometer):
         self._ceilometer = ceilometer
 
+    def get_node_resource_id(self, hypervisor):
+        return "%s_%s" % (hypervisor.uuid, hypervisor.hostname)
+
+    def prefetch_metrics(self, model):
+        """Fetch the CPU usage of every hypervisor and VM in one go
+
+        :param model: the cluster model
+        """
+        hypervisors = model.get_all_hypervisors().values()
+        self.metrics = self.ceilometer.statistic_aggregation_batch(
+            resource_ids=[self.get_node_resource_id(h) for h in hypervisors],
+            meter_names=[self.HOST_CPU_USAGE_METRIC_NAME],
+            period="7200",
+            aggregate='avg')
+        self.metrics.update(self.ceilometer.statistic_aggregation_batch(
+            resource_ids=list(model.get_all_vms().keys()),
+            meter_names=[self.INSTANCE_CPU_USAGE_METRIC_NAME],
+            period="7200",
+            aggregate='avg'))
+
+    def get_metric(self, resource_id, meter_name):
+        if (resource_id, meter_name) in self.metrics:
+            return self.metrics[(resource_id, meter_name)]
+        return self.ceilometer.statistic_aggregation(
+            resource_id=resource_id,
+            meter_name=meter_name,
+            period="7200",
+            aggregate='avg')
+
     def compute_attempts(self, size_cluster):
         """Upper bound of the number of migration
 
@@ -139,9 +173,6 @@ class BasicConsolidation(base.BaseStrategy):
                                                             dest_hypervisor,
                                                             ))
 
-        total_cores = 0
-        total_disk = 0
-        total_mem = 0
         cpu_capacity = cluster_data_model.get_resource_from_id(
             resource.ResourceType.cpu_cores)
         disk_capacity = cluster_data_model.get_resource_from_id(
@@ -149,12 +180,13 @@ class BasicConsolidation(base.BaseStrategy):
         memory_capacity = cluster_data_model.get_resource_from_id(
             resource.ResourceType.memory)
 
-        for vm_id in cluster_data_model. \
-                get_mapping().get_node_vms(dest_hypervisor):
-            vm = cluster_data_model.get_vm_from_id(vm_id)
-            total_cores += cpu_capacity.get_capacity(vm)
-            total_disk += disk_capacity.get_capacity(vm)
-            total_mem += memory_capacity.get_capacity(vm)
+        mapping = cluster_data_model.get_mapping()
+        total_cores = mapping.get_node_usage(dest_hypervisor,
+                                             resource.ResourceType.cpu_cores)
+        total_disk = mapping.get_node_usage(dest_hypervisor,
+                                            resource.ResourceType.disk)
+        total_mem = mapping.get_node_usage(dest_hypervisor,
+                                           resource.ResourceType.memory)
 
         # capacity requested by hypervisor
         total_cores += cpu_capacity.get_capacity(vm_to_mig)
@@ -240,6 +272,13 @@ class BasicConsolidation(base.BaseStrategy):
         memory_capacity = cluster_data_model.get_resource_from_id(
             resource.ResourceType.memory).get_capacity(element)
 
+        return self._weight(cpu_capacity, disk_capacity, memory_capacity,
+                            total_cores_used, total_disk_used,
+                            total_memory_used)
+
+    @staticmethod
+    def _weight(cpu_capacity, disk_capacity, memory_capacity,
+                total_cores_used, total_disk_used, total_memory_used):
         score_cores = (1 - (float(cpu_capacity) - float(total_cores_used)) /
                        float(cpu_capacity))
 
@@ -256,6 +295,30 @@ class BasicConsolidation(base.BaseStrategy):
         # todo(jed) take in account weight
         return (score_cores + score_disk + score_memory) / 3
 
+    def calculate_weights(self, cluster_data_model, elements,
+                          total_cores_used, total_disk_used,
+                          total_memory_used):
+        """Calculate the weights of several elements at once
+
+        :param cluster_data_model:
+        :param elements: the hypervisors or virtual machines
+        :param total_cores_used: the cores used by each element
+        :param total_disk_used: the disk used by each element
+        :param total_memory_used: the memory used by each element
+        :return: the weight of each element
+        """
+        uuids = [element.uuid for element in elements]
+        cpu_capacities = cluster_data_model.get_resource_from_id(
+            resource.ResourceType.cpu_cores).get_capacities_from_ids(uuids)
+        disk_capacities = cluster_data_model.get_resource_from_id(
+            resource.ResourceType.disk).get_capacities_from_ids(uuids)
+        memory_capacities = cluster_data_model.get_resource_from_id(
+            resource.ResourceType.memory).get_capacities_from_ids(uuids)
+
+        return [self._weight(*values) for values in zip(
+            cpu_capacities, disk_capacities, memory_capacities,
+            total_cores_used, total_disk_used, total_memory_used)]
+
     def calculate_score_node(self, hypervisor, model):
         """calculate the score that represent the utilization level
 
@@ -263,30 +326,36 @@ class BasicConsolidation(base.BaseStrategy):
             :param model:
             :return:
             """
-        resource_id = "%s_%s" % (hypervisor.uuid, hypervisor.hostname)
-        vm_avg_cpu_util = self.ceilometer. \
-            statistic_aggregation(resource_id=resource_id,
-                                  meter_name=self.HOST_CPU_USAGE_METRIC_NAME,
-                                  period="7200",
-                                  aggregate='avg'
-                                  )
-        if vm_avg_cpu_util is None:
-            LOG.error(
-                _LE("No values returned by %(resource_id)s "
-                    "for %(metric_name)s"),
-                resource_id=resource_id,
-                metric_name=self.HOST_CPU_USAGE_METRIC_NAME,
-            )
-            vm_avg_cpu_util = 100
-
-        cpu_capacity = model.get_resource_from_id(
-            resource.ResourceType.cpu_cores).get_capacity(hypervisor)
-
-        total_cores_used = cpu_capacity * (vm_avg_cpu_util / 100)
-
-        return self.calculate_weight(model, hypervisor, total_cores_used,
-                                     0,
-                                     0)
+        return self.calculate_score_nodes([hypervisor], model)[0]
+
+    def calculate_score_nodes(self, hypervisors, model):
+        """Calculate the scores of several hypervisors at once
+
+        :param hypervisors:
+        :param model:
+        :return: the score of each hypervisor
+        """
+        cpu_capacities = model.get_resource_from_id(
+            resource.ResourceType.cpu_cores).get_capacities(hypervisors)
+
+        total_cores_used = []
+        for hypervisor, cpu_capacity in zip(hypervisors, cpu_capacities):
+            resource_id = self.get_node_resource_id(hypervisor)
+            vm_avg_cpu_util = self.get_metric(
+                resource_id, self.HOST_CPU_USAGE_METRIC_NAME)
+            if vm_avg_cpu_util is None:
+                LOG.error(
+                    _LE("No values returned by %(resource_id)s "
+                        "for %(metric_name)s"),
+                    resource_id=resource_id,
+                    metric_name=self.HOST_CPU_USAGE_METRIC_NAME,
+                )
+                vm_avg_cpu_util = 100
+            total_cores_used.append(cpu_capacity * (vm_avg_cpu_util / 100))
+
+        nothing_used = [0] * len(hypervisors)
+        return self.calculate_weights(model, hypervisors, total_cores_used,
+                                      nothing_used, nothing_used)
 
     def calculate_migration_efficacy(self):
         """Calculate migration efficacy
@@ -307,32 +376,40 @@ class BasicConsolidation(base.BaseStrategy):
         :param cluster_data_model: the cluster model
         :return: score
         """
-        if cluster_data_model is None:
-            raise exception.ClusterStateNotDefined()
+        return self.calculate_score_vms([vm], cluster_data_model)[0]
 
-        vm_cpu_utilization = self.ceilometer. \
-            statistic_aggregation(
-                resource_id=vm.uuid,
-                meter_name=self.INSTANCE_CPU_USAGE_METRIC_NAME,
-                period="7200",
-                aggregate='avg'
-            )
-        if vm_cpu_utilization is None:
-            LOG.error(
-                _LE("No values returned by %(resource_id)s "
-                    "for %(metric_name)s"),
-                resource_id=vm.uuid,
-                metric_name=self.INSTANCE_CPU_USAGE_METRIC_NAME,
-            )
-            vm_cpu_utilization = 100
+    def calculate_score_vms(self, vms, cluster_data_model):
+        """Calculate the scores of several virtual machines at once
 
-        cpu_capacity = cluster_data_model.get_resource_from_id(
-            resource.ResourceType.cpu_cores).get_capacity(vm)
-
-        total_cores_used = cpu_capacity * (vm_cpu_utilization / 100.0)
+        :param vms: the virtual machines
+        :param cluster_data_model: the cluster model
+        :return: the score of each virtual machine
+        """
+        if cluster_data_model is None:
+            raise exception.ClusterStateNotDefined()
 
-        return self.calculate_weight(cluster_data_model, vm,
-                                     total_cores_used, 0, 0)
+        cpu_capacities = cluster_data_model.get_resource_from_id(
+            resource.ResourceType.cpu_cores).get_capacities(vms)
+
+        total_cores_used = []
+        for vm, cpu_capacity in zip(vms, cpu_capacities):
+            vm_cpu_utilization = self.get_metric(
+                vm.uuid, self.INSTANCE_CPU_USAGE_METRIC_NAME)
+            if vm_cpu_utilization is None:
+                LOG.error(
+                    _LE("No values returned by %(resource_id)s "
+                        "for %(metric_name)s"),
+                    resource_id=vm.uuid,
+                    metric_name=self.INSTANCE_CPU_USAGE_METRIC_NAME,
+                )
+                vm_cpu_utilization = 100
+            total_cores_used.append(
+                cpu_capacity * (vm_cpu_utilization / 100.0))
+
+        nothing_used = [0] * len(vms)
+        return self.calculate_weights(cluster_data_model, vms,
+                                      total_cores_used, nothing_used,
+                                      nothing_used)
 
     def add_change_service_state(self, resource_id, state):
         parameters = {'state': state}
@@ -354,19 +431,15 @@ class BasicConsolidation(base.BaseStrategy):
 
     def score_of_nodes(self, cluster_data_model, score):
         """Calculate score of nodes based on load by VMs"""
-        for hypervisor_id in cluster_data_model.get_all_hypervisors():
-            hypervisor = cluster_data_model. \
-                get_hypervisor_from_id(hypervisor_id)
-            count = cluster_data_model.get_mapping(). \
-                get_node_vms_from_id(hypervisor_id)
-            if len(count) > 0:
-                result = self.calculate_score_node(hypervisor,
-                                                   cluster_data_model)
-            else:
-                ''' the hypervisor has not VMs '''
-                result = 0
-            if len(count) > 0:
-                score.append((hypervisor_id, result))
+        mapping = cluster_data_model.get_mapping()
+        # the hypervisors without VMs are not scored
+        hypervisors = [
+            cluster_data_model.get_hypervisor_from_id(hypervisor_id)
+            for hypervisor_id in cluster_data_model.get_all_hypervisors()
+            if len(mapping.get_node_vms_from_id(hypervisor_id)) > 0]
+        results = self.calculate_score_nodes(hypervisors, cluster_data_model)
+        score.extend(zip([hypervisor.uuid for hypervisor in hypervisors],
+                         results))
         return score
 
     def node_and_vm_score(self, sorted_score, score, current_model):
@@ -375,12 +448,10 @@ class BasicConsolidation(base.BaseStrategy):
         vms_to_mig = current_model.get_mapping().get_node_vms_from_id(
             node_to_release)
 
-        vm_score = []
-        for vm_id in vms_to_mig:
-            vm = current_model.get_vm_from_id(vm_id)
-            if vm.state == vm_state.VMState.ACTIVE.value:
-                vm_score.append(
-                    (vm_id, self.calculate_score_vm(vm, current_model)))
+        vms = [current_model.get_vm_from_id(vm_id) for vm_id in vms_to_mig]
+        vms = [vm for vm in vms if vm.state == vm_state.VMState.ACTIVE.value]
+        vm_score = list(zip([vm.uuid for vm in vms],
+                            self.calculate_score_vms(vms, current_model)))
 
         return node_to_release, vm_score
 
@@ -401,26 +472,68 @@ class BasicConsolidation(base.BaseStrategy):
                                           OFFLINE.value)
             self.number_of_released_nodes += 1
 
+    def get_placement_engine(self, current_model, sorted_score):
+        """Index the free capacity of the scored hypervisors
+
+        :param current_model: the cluster model
+        :param sorted_score: the hypervisors in the order they are tried
+        :return: a PlacementEngine
+        """
+        mapping = current_model.get_mapping()
+        thresholds = {
+            resource.ResourceType.cpu_cores: self.threshold_cores,
+            resource.ResourceType.disk: self.threshold_disk,
+            resource.ResourceType.memory: self.threshold_mem,
+        }
+        hosts = []
+        for hypervisor_id, score in sorted_score:
+            hypervisor = current_model.get_hypervisor_from_id(hypervisor_id)
+            limits = {}
+            used = {}
+            for resource_type, threshold in thresholds.items():
+                capacity = current_model.get_resource_from_id(
+                    resource_type).get_capacity(hypervisor)
+                limits[resource_type] = (capacity / float(threshold)
+                                         if threshold else float('inf'))
+                used[resource_type] = mapping.get_node_usage(hypervisor,
+                                                             resource_type)
+            hosts.append((hypervisor_id, limits, used))
+        return placement.PlacementEngine(
+            list(thresholds), hosts, primary=resource.ResourceType.cpu_cores)
+
+    def get_vm_demand(self, current_model, vm):
+        return dict((resource_type, current_model.get_resource_from_id(
+            resource_type).get_capacity(vm)) for resource_type in (
+            resource.ResourceType.cpu_cores, resource.ResourceType.disk,
+            resource.ResourceType.memory))
+
     def calculate_num_migrations(self, sorted_vms, current_model,
                                  node_to_release, sorted_score):
         number_migrations = 0
+        engine = self.get_placement_engine(current_model, sorted_score)
+        mig_src_hypervisor = current_model.get_hypervisor_from_id(
+            node_to_release)
         for vm in sorted_vms:
-            for j in range(0, len(sorted_score)):
-                mig_vm = current_model.get_vm_from_id(vm[0])
-                mig_src_hypervisor = current_model.get_hypervisor_from_id(
-                    node_to_release)
+            mig_vm = current_model.get_vm_from_id(vm[0])
+            demand = self.get_vm_demand(current_model, mig_vm)
+
+            def check(hypervisor_id):
+                return self.check_migration(
+                    current_model, mig_src_hypervisor,
+                    current_model.get_hypervisor_from_id(hypervisor_id),
+                    mig_vm)
+
+            # first hypervisor of sorted_score where the VM fits
+            dst_hypervisor_id = engine.first_fit(
+                demand, exclude=(node_to_release,), check=check)
+            if dst_hypervisor_id is not None:
                 mig_dst_hypervisor = current_model.get_hypervisor_from_id(
-                    sorted_score[j][0])
-
-                result = self.check_migration(current_model,
-                                              mig_src_hypervisor,
-                                              mig_dst_hypervisor, mig_vm)
-                if result:
-                    self.create_migration_vm(
-                        current_model, mig_vm,
-                        mig_src_hypervisor, mig_dst_hypervisor)
-                    number_migrations += 1
-                    break
+                    dst_hypervisor_id)
+                self.create_migration_vm(
+                    current_model, mig_vm,
+                    mig_src_hypervisor, mig_dst_hypervisor)
+                engine.move(node_to_release, dst_hypervisor_id, demand)
+                number_migrations += 1
         return number_migrations
 
     def unsuccessful_migration_actualization(self, number_migrations,
@@ -449,6 +562,7 @@ class BasicConsolidation(base.BaseStrategy):
             raise exception.ClusterEmpty()
 
         self.compute_attempts(size_cluster)
+        self.prefetch_metrics(current_model)
 
         for hypervisor_id in current_model.get_all_hypervisors():
             hypervisor = current_model.get_hypervisor_from_id(hypervisor_id)
@@ -23,6 +23,7 @@ from watcher.common import exception as wexc
 from watcher.decision_engine.model import resource
 from watcher.decision_engine.model import vm_state
 from watcher.decision_engine.strategy.strategies import base
+from watcher.metrics_engine.cluster_history import cache
 from watcher.metrics_engine.cluster_history import ceilometer as ceil
 
 
@@ -81,7 +82,8 @@ class OutletTempControl(base.BaseStrategy):
     @property
     def ceilometer(self):
         if self._ceilometer is None:
-            self._ceilometer = ceil.CeilometerClusterHistory(osc=self.osc)
+            self._ceilometer = cache.CachedClusterHistory(
+                ceil.CeilometerClusterHistory(osc=self.osc))
         return self._ceilometer
 
     @ceilometer.setter
@@ -91,16 +93,11 @@ class OutletTempControl(base.BaseStrategy):
     def calc_used_res(self, cluster_data_model, hypervisor, cpu_capacity,
                       memory_capacity, disk_capacity):
         '''calculate the used vcpus, memory and disk based on VM flavors'''
-        vms = cluster_data_model.get_mapping().get_node_vms(hypervisor)
-        vcpus_used = 0
-        memory_mb_used = 0
-        disk_gb_used = 0
-        if len(vms) > 0:
-            for vm_id in vms:
-                vm = cluster_data_model.get_vm_from_id(vm_id)
-                vcpus_used += cpu_capacity.get_capacity(vm)
-                memory_mb_used += memory_capacity.get_capacity(vm)
-                disk_gb_used += disk_capacity.get_capacity(vm)
+        mapping = cluster_data_model.get_mapping()
+        vcpus_used = mapping.get_node_usage(hypervisor, cpu_capacity.name)
+        memory_mb_used = mapping.get_node_usage(hypervisor,
+                                                memory_capacity.name)
+        disk_gb_used = mapping.get_node_usage(hypervisor, disk_capacity.name)
 
         return vcpus_used, memory_mb_used, disk_gb_used
 
@@ -114,16 +111,17 @@ class OutletTempControl(base.BaseStrategy):
 
         hosts_need_release = []
         hosts_target = []
+        outlet_temps = self.ceilometer.statistic_aggregation_batch(
+            resource_ids=[h.uuid for h in hypervisors.values()],
+            meter_names=[self._meter],
+            period="30",
+            aggregate='avg')
         for hypervisor_id in hypervisors:
             hypervisor = cluster_data_model.get_hypervisor_from_id(
                 hypervisor_id)
             resource_id = hypervisor.uuid
 
-            outlet_temp = self.ceilometer.statistic_aggregation(
-                resource_id=resource_id,
-                meter_name=self._meter,
-                period="30",
-                aggregate='avg')
+            outlet_temp = outlet_temps.get((resource_id, self._meter))
             # some hosts may not have outlet temp meters, remove from target
             if outlet_temp is None:
                 LOG.warning(_LE("%s: no outlet temp data"), resource_id)
@@ -177,15 +175,19 @@ class OutletTempControl(base.BaseStrategy):
 
         # filter hypervisors without enough resource
         dest_servers = []
-        for hvmap in hosts:
+        hvs = [hvmap['hv'] for hvmap in hosts]
+        for hvmap, host_cores, host_disk, host_memory in zip(
+                hosts, cpu_capacity.get_capacities(hvs),
+                disk_capacity.get_capacities(hvs),
+                memory_capacity.get_capacities(hvs)):
             host = hvmap['hv']
             # available
             cores_used, mem_used, disk_used = self.calc_used_res(
                 cluster_data_model, host, cpu_capacity, memory_capacity,
                 disk_capacity)
-            cores_available = cpu_capacity.get_capacity(host) - cores_used
-            disk_available = disk_capacity.get_capacity(host) - mem_used
-            mem_available = memory_capacity.get_capacity(host) - disk_used
+            cores_available = host_cores - cores_used
+            disk_available = host_disk - mem_used
+            mem_available = host_memory - disk_used
             if cores_available >= required_cores \
                     and disk_available >= required_disk \
                     and mem_available >= required_memory:
@@ -24,11 +24,12 @@ from watcher.common.exception import NoDataFound, WatcherException
 from watcher.decision_engine.model import hypervisor_state as hyper_state
 from watcher.decision_engine.model import vm_state
 from watcher.decision_engine.model import resource
+from watcher.decision_engine.strategy.common import placement
 from watcher.decision_engine.strategy.strategies import base
+from watcher.metrics_engine.cluster_history import cache
 from watcher.metrics_engine.cluster_history import ceilometer \
     as ceilometer_cluster_history
 
-from copy import deepcopy
 
 LOG = log.getLogger(__name__)
 
@@ -37,6 +38,9 @@ class SmartStrategy(base.BaseStrategy):
     DEFAULT_NAME = 'smart'
     DEFAULT_DESCRIPTION = 'Smart Strategy'
 
+    # cpu usage, ram usage, ram allocation and disk allocation
+    VM_METRICS = ['cpu_util', 'memory.usage', 'memory', 'disk.root.size']
+
     def __init__(self, name=DEFAULT_NAME, description=DEFAULT_DESCRIPTION,
                  osc=None):
         super(SmartStrategy, self).__init__(name, description, osc)
@@ -44,12 +48,15 @@ class SmartStrategy(base.BaseStrategy):
         self.number_of_migrations = 0
         self.number_of_released_hypervisors = 0
         self.ceilometer_vm_data_cache = dict()
+        # {(vm_uuid, meter_name): value} filled by prefetch_vm_metrics
+        self.ceilometer_vm_metrics = dict()
 
     @property
     def ceilometer(self):
         if self._ceilometer is None:
-            self._ceilometer = (ceilometer_cluster_history.
-                                CeilometerClusterHistory(osc=self.osc))
+            self._ceilometer = cache.CachedClusterHistory(
+                ceilometer_cluster_history.CeilometerClusterHistory(
+                    osc=self.osc))
         return self._ceilometer
 
     @ceilometer.setter
@@ -97,21 +104,18 @@ class SmartStrategy(base.BaseStrategy):
 
         vm = model.get_vm_from_id(vm_uuid)
 
-        if vm.state != vm_state.VMState.ACTIVE:
-            '''
-            Watcher curently only supports live VM migration which
-            requires VM to be active and both hypervisors to share
-            storage. When supported, the block migration may be used
-            as a fallback migration mechanism.
-
-            TODO check whether this works and consider better exception
-            '''
-            LOG.error('Cannot live migrate VM %s in state %s.' %
-                      (vm_uuid, vm.state.value))
+        # the collectors give the value of the state
+        state = getattr(vm.state, 'value', vm.state)
+        if state == vm_state.VMState.ACTIVE.value:
+            migration_type = 'live'
+        elif state == vm_state.VMState.STOPPED.value:
+            # a stopped VM is rebuilt from its image on the destination
+            migration_type = 'non_live'
+        else:
+            LOG.error('Cannot migrate VM %s in state %s.' %
+                      (vm_uuid, state))
             raise WatcherException
 
-        migration_type = 'live'
-
         if dst_hypervisor.state == hyper_state.HypervisorState.OFFLINE:
             self.activate_hypervisor(dst_hypervisor)
         model.get_mapping().unmap(src_hypervisor, vm)
@@ -138,12 +142,35 @@ class SmartStrategy(base.BaseStrategy):
 
     def get_prediction_model(self, model):
         """
-        Returns a deepcopy of a model representing current cluster state.
+        Returns a copy-on-write snapshot of a model representing current
+        cluster state.
         :param model: model_root object
         :return: model_root object
         """
 
-        return deepcopy(model)
+        return model.fork()
+
+    def prefetch_vm_metrics(self, model, period=3600, aggr='avg'):
+        """Fetch the utilization metrics of every VM in one go
+
+        :param model: model_root object
+        :param period: seconds
+        :param aggr: string
+        """
+        self.ceilometer_vm_metrics = \
+            self.ceilometer.statistic_aggregation_batch(
+                resource_ids=list(model.get_all_vms().keys()),
+                meter_names=self.VM_METRICS,
+                period=period,
+                aggregate=aggr)
+
+    def get_vm_metric(self, vm_uuid, meter_name, period, aggr):
+        if (vm_uuid, meter_name) in self.ceilometer_vm_metrics:
+            return self.ceilometer_vm_metrics[(vm_uuid, meter_name)]
+        return self.ceilometer.statistic_aggregation(resource_id=vm_uuid,
+                                                     meter_name=meter_name,
+                                                     period=period,
+                                                     aggregate=aggr)
 
     def get_vm_utilization(self, vm_uuid, model, period=3600, aggr='avg'):
         """
@@ -158,16 +185,10 @@ class SmartStrategy(base.BaseStrategy):
         if vm_uuid in self.ceilometer_vm_data_cache.keys():
             return self.ceilometer_vm_data_cache.get(vm_uuid)
 
-        cpu_util_metric = 'cpu_util'
-        ram_util_metric = 'memory.usage'
-
-        ram_alloc_metric = 'memory'
-        disk_alloc_metric = 'disk.root.size'
-        vm_cpu_util = \
-            self.ceilometer.statistic_aggregation(resource_id=vm_uuid,
-                                                  meter_name=cpu_util_metric,
-                                                  period=period,
-                                                  aggregate=aggr)
+        cpu_util_metric, ram_util_metric, ram_alloc_metric, \
+            disk_alloc_metric = self.VM_METRICS
+        vm_cpu_util = self.get_vm_metric(vm_uuid, cpu_util_metric,
+                                         period, aggr)
         vm_cpu_cores = model.get_resource_from_id(
             resource.ResourceType.cpu_cores).\
             get_capacity(model.get_vm_from_id(vm_uuid))
@@ -177,26 +198,15 @@ class SmartStrategy(base.BaseStrategy):
         else:
             total_cpu_utilization = vm_cpu_cores
 
-        vm_ram_util = \
-            self.ceilometer.statistic_aggregation(resource_id=vm_uuid,
-                                                  meter_name=ram_util_metric,
-                                                  period=period,
-                                                  aggregate=aggr)
+        vm_ram_util = self.get_vm_metric(vm_uuid, ram_util_metric,
+                                         period, aggr)
 
         if not vm_ram_util:
-            vm_ram_util = \
-                self.ceilometer.statistic_aggregation(
-                    resource_id=vm_uuid,
-                    meter_name=ram_alloc_metric,
-                    period=period,
-                    aggregate=aggr)
-
-        vm_disk_util = \
-            self.ceilometer.statistic_aggregation(
-                resource_id=vm_uuid,
-                meter_name=disk_alloc_metric,
-                period=period,
-                aggregate=aggr)
+            vm_ram_util = self.get_vm_metric(vm_uuid, ram_alloc_metric,
+                                             period, aggr)
+
+        vm_disk_util = self.get_vm_metric(vm_uuid, disk_alloc_metric,
+                                          period, aggr)
 
         if not vm_ram_util or not vm_disk_util:
             LOG.error(
@@ -222,19 +232,24 @@ class SmartStrategy(base.BaseStrategy):
         :return: dict(cpu(number of cores used), ram(MB used), disk(B used))
         """
 
-        hypervisor_vms = \
-            model.get_mapping().get_node_vms_from_id(hypervisor.uuid)
-        hypervisor_ram_util = 0
-        hypervisor_disk_util = 0
-        hypervisor_cpu_util = 0
-        for vm_uuid in hypervisor_vms:
-            vm_util = self.get_vm_utilization(vm_uuid, model)
-            hypervisor_cpu_util += vm_util['cpu']
-            hypervisor_ram_util += vm_util['ram']
-            hypervisor_disk_util += vm_util['disk']
+        # the totals are kept up to date by the mapping as VMs are migrated
+        mapping = model.get_mapping()
+        mapping.register_usage('smart.cpu', self.get_vm_cpu_utilization)
+        mapping.register_usage('smart.ram', self.get_vm_ram_utilization)
+        mapping.register_usage('smart.disk', self.get_vm_disk_utilization)
+
+        return dict(cpu=mapping.get_node_usage(hypervisor, 'smart.cpu'),
+                    ram=mapping.get_node_usage(hypervisor, 'smart.ram'),
+                    disk=mapping.get_node_usage(hypervisor, 'smart.disk'))
+
+    def get_vm_cpu_utilization(self, vm_uuid, model):
+        return self.get_vm_utilization(vm_uuid, model)['cpu']
 
-        return dict(cpu=hypervisor_cpu_util, ram=hypervisor_ram_util,
-                    disk=hypervisor_disk_util)
+    def get_vm_ram_utilization(self, vm_uuid, model):
+        return self.get_vm_utilization(vm_uuid, model)['ram']
+
+    def get_vm_disk_utilization(self, vm_uuid, model):
+        return self.get_vm_utilization(vm_uuid, model)['disk']
 
     def get_hypervisor_capacity(self, hypervisor, model):
         """
@@ -371,6 +386,56 @@ class SmartStrategy(base.BaseStrategy):
                 if src != dst:
                     self.add_migration(vm_uuid, src, dst, model)
 
+    def get_placement_engine(self, hypervisors, model, cc):
+        """Index the free capacity of hypervisors
+
+        :param hypervisors: hypervisor objects, in the order they are tried
+        :param model: model_root object
+        :param cc: dictionary containing resource capacity coefficients
+        :return: a PlacementEngine
+        """
+
+        # the capacities of all the hypervisors, read once per resource
+        capacities = dict(
+            (m, model.get_hypervisors_capacities(resource_type))
+            for m, resource_type in (
+                ('cpu', resource.ResourceType.cpu_cores),
+                ('ram', resource.ResourceType.memory),
+                ('disk', resource.ResourceType.disk_capacity)))
+        hosts = []
+        for hypervisor in hypervisors:
+            limits = dict((m, capacities[m][hypervisor.uuid] * cc[m])
+                          for m in capacities)
+            hosts.append((hypervisor.uuid, limits,
+                          self.get_hypervisor_utilization(hypervisor, model)))
+        return placement.PlacementEngine(['cpu', 'ram', 'disk'], hosts)
+
+    def place_vm(self, engine, vm_uuid, hypervisor, model, cc, count=None):
+        """Migrate a VM to the first hypervisor of the engine fitting it
+
+        :param engine: PlacementEngine of the destination hypervisors
+        :param vm_uuid: string
+        :param hypervisor: the hypervisor hosting the VM
+        :param model: model_root object
+        :param cc: dictionary containing resource capacity coefficients
+        :param count: only consider the first count hypervisors
+        :return: the destination hypervisor or None
+        """
+
+        def vm_fits(hypervisor_uuid):
+            return self.vm_fits(
+                vm_uuid, model.get_hypervisor_from_id(hypervisor_uuid),
+                model, cc)
+
+        demand = self.get_vm_utilization(vm_uuid, model)
+        dst_uuid = engine.first_fit(demand, count=count, check=vm_fits)
+        if dst_uuid is None:
+            return None
+        dst_hypervisor = model.get_hypervisor_from_id(dst_uuid)
+        self.add_migration(vm_uuid, hypervisor, dst_hypervisor, model)
+        engine.move(hypervisor.uuid, dst_uuid, demand)
+        return dst_hypervisor
+
     def offload_phase(self, model, cc):
         """
         Performs offloading phase considering provided resource
@@ -395,16 +460,14 @@ class SmartStrategy(base.BaseStrategy):
         sorted_hypervisors = sorted(
             model.get_all_hypervisors().values(),
             key=lambda x: self.get_hypervisor_utilization(x, model)['cpu'])
+        engine = self.get_placement_engine(
+            list(reversed(sorted_hypervisors)), model, cc)
         for hypervisor in reversed(sorted_hypervisors):
             if self.is_overloaded(hypervisor, model, cc):
                 for vm in sorted(model.get_mapping().get_node_vms(hypervisor),
                                  key=lambda x: self.get_vm_utilization(
                         x, model)['cpu']):
-                    for dst_hypervisor in reversed(sorted_hypervisors):
-                        if self.vm_fits(vm, dst_hypervisor, model, cc):
-                            self.add_migration(vm, hypervisor,
-                                               dst_hypervisor, model)
-                            break
+                    self.place_vm(engine, vm, hypervisor, model, cc)
                     if not self.is_overloaded(hypervisor, model, cc):
                         break
 
@@ -427,20 +490,17 @@ class SmartStrategy(base.BaseStrategy):
         sorted_hypervisors = sorted(
             model.get_all_hypervisors().values(),
             key=lambda x: self.get_hypervisor_utilization(x, model)['cpu'])
+        engine = self.get_placement_engine(
+            list(reversed(sorted_hypervisors)), model, cc)
         asc = 0
         for hypervisor in sorted_hypervisors:
             vms = sorted(model.get_mapping().get_node_vms(hypervisor),
                          key=lambda x: self.get_vm_utilization(x,
                          model)['cpu'])
             for vm in reversed(vms):
-                dsc = len(sorted_hypervisors) - 1
-                for dst_hypervisor in reversed(sorted_hypervisors):
-                    if asc >= dsc:
-                        break
-                    if self.vm_fits(vm, dst_hypervisor, model, cc):
-                        self.add_migration(vm, hypervisor,
-                                           dst_hypervisor, model)
-                    dsc -= 1
+                # only the hypervisors more utilized than this one
+                self.place_vm(engine, vm, hypervisor, model, cc,
+                              count=len(sorted_hypervisors) - 1 - asc)
             asc += 1
 
     def execute(self, original_model):
@@ -472,6 +532,7 @@ class SmartStrategy(base.BaseStrategy):
 
         LOG.info("Executing Smart Strategy")
         model = self.get_prediction_model(original_model)
+        self.prefetch_vm_metrics(model)
         cru = self.get_relative_cluster_utilization(model)
         self.ceilometer_vm_data_cache = dict()
 
@@ -69,6 +69,18 @@ class BaseClusterHistory(object):
                               aggregate='avg'):
         raise NotImplementedError()
 
+    def statistic_aggregation_batch(self, resource_ids, meter_names, period,
+                                    aggregate='avg'):
+        """Statistic aggregates of several resources and meters at once
+
+        :return: a {(resource_id, meter_name): value} dict
+        """
+        return dict(((resource_id, meter_name),
+                     self.statistic_aggregation(resource_id, meter_name,
+                                                period, aggregate))
+                    for resource_id in resource_ids
+                    for meter_name in meter_names)
+
     @abc.abstractmethod
     def get_last_sample_values(self, resource_id, meter_name, limit=1):
         raise NotImplementedError()
@@ -0,0 +1,144 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import threading
+
+from oslo_config import cfg
+from oslo_log import log
+
+from watcher.common import cache as common_cache
+from watcher.metrics_engine.cluster_history import api
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+METRICS_CACHE_OPTS = [
+    cfg.BoolOpt('enabled',
+                default=True,
+                help='Cache the statistic aggregates fetched from the '
+                     'cluster history so that successive audits do not '
+                     'query the same metrics again'),
+    cfg.IntOpt('ttl',
+               default=300,
+               min=0,
+               help='Number of seconds a cached statistic aggregate is '
+                    'considered valid'),
+    cfg.IntOpt('max_size',
+               default=100000,
+               min=1,
+               help='Maximum number of statistic aggregates kept in cache, '
+                    'the least recently used ones are evicted first'),
+]
+metrics_cache_opt_group = cfg.OptGroup(
+    name='watcher_metrics_cache',
+    title='Options for the cache of the cluster history metrics')
+CONF.register_group(metrics_cache_opt_group)
+CONF.register_opts(METRICS_CACHE_OPTS, metrics_cache_opt_group)
+
+MetricsCache = common_cache.TTLCache
+
+_METRICS_CACHE = None
+_METRICS_CACHE_LOCK = threading.Lock()
+
+
+def get_metrics_cache():
+    """Return the cache shared by every audit of this process"""
+    global _METRICS_CACHE
+    with _METRICS_CACHE_LOCK:
+        if _METRICS_CACHE is None:
+            _METRICS_CACHE = MetricsCache(
+                ttl=CONF.watcher_metrics_cache.ttl,
+                max_size=CONF.watcher_metrics_cache.max_size)
+        return _METRICS_CACHE
+
+
+class CachedClusterHistory(api.BaseClusterHistory):
+    """Cluster history caching the statistic aggregates of another one
+
+    Only the statistic aggregates are cached, keyed by
+    (resource_id, meter_name, period, aggregate). Missing values are not
+    cached so that they are queried again by the next audit.
+    """
+
+    def __init__(self, history, cache=None):
+        super(CachedClusterHistory, self).__init__()
+        self.history = history
+        if cache is None and CONF.watcher_metrics_cache.enabled:
+            cache = get_metrics_cache()
+        self.cache = cache
+
+    @staticmethod
+    def _key(resource_id, meter_name, period, aggregate):
+        return resource_id, meter_name, str(period), aggregate
+
+    def statistic_aggregation(self, resource_id, meter_name, period,
+                              aggregate='avg'):
+        if self.cache is None:
+            return self.history.statistic_aggregation(
+                resource_id, meter_name, period, aggregate)
+
+        key = self._key(resource_id, meter_name, period, aggregate)
+        value = self.cache.get(key)
+        if value is None:
+            value = self.history.statistic_aggregation(
+                resource_id, meter_name, period, aggregate)
+            if value is not None:
+                self.cache.set(key, value)
+        return value
+
+    def statistic_aggregation_batch(self, resource_ids, meter_names, period,
+                                    aggregate='avg'):
+        if self.cache is None:
+            return self.history.statistic_aggregation_batch(
+                resource_ids, meter_names, period, aggregate)
+
+        values = {}
+        missing_resource_ids = set()
+        missing_meter_names = set()
+        for resource_id in resource_ids:
+            for meter_name in meter_names:
+                value = self.cache.get(
+                    self._key(resource_id, meter_name, period, aggregate))
+                values[(resource_id, meter_name)] = value
+                if value is None:
+                    missing_resource_ids.add(resource_id)
+                    missing_meter_names.add(meter_name)
+
+        if missing_resource_ids:
+            fetched = self.history.statistic_aggregation_batch(
+                list(missing_resource_ids), list(missing_meter_names),
+                period, aggregate)
+            for (resource_id, meter_name), value in fetched.items():
+                if values.get((resource_id, meter_name), 0) is not None:
+                    # already cached or not requested
+                    continue
+                values[(resource_id, meter_name)] = value
+                if value is not None:
+                    self.cache.set(
+                        self._key(resource_id, meter_name, period,
+                                  aggregate), value)
+
+        LOG.debug("Metrics cache statistics: %s", self.cache.get_stats())
+        return values
+
+    def get_last_sample_values(self, resource_id, meter_name, limit=1):
+        return self.history.get_last_sample_values(resource_id, meter_name,
+                                                   limit)
+
+    def query_sample(self, meter_name, query, limit=1):
+        return self.history.query_sample(meter_name, query, limit)
+
+    def statistic_list(self, meter_name, query=None, period=None):
+        return self.history.statistic_list(meter_name, query, period)
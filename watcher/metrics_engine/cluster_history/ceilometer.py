@@ -49,3 +49,8 @@ class CeilometerClusterHistory(api.BaseClusterHistory):
         return self.ceilometer.statistic_aggregation(resource_id, meter_name,
                                                      period,
                                                      aggregate)
+
+    def statistic_aggregation_batch(self, resource_ids, meter_names, period,
+                                    aggregate='avg'):
+        return self.ceilometer.statistic_aggregation_batch(
+            resource_ids, meter_names, period, aggregate)
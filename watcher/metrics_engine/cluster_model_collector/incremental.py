@@ -0,0 +1,238 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import copy
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+import oslo_messaging as om
+from oslo_service import loopingcall
+
+from watcher._i18n import _LE, _LI
+from watcher.common.messaging import notification_handler
+from watcher.decision_engine.model import hypervisor_state
+from watcher.decision_engine.model import resource
+from watcher.decision_engine.model import vm as obj_vm
+from watcher.metrics_engine.cluster_model_collector import api
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+WATCHER_CLUSTER_MODEL_OPTS = [
+    cfg.BoolOpt('use_notifications',
+                default=False,
+                help='Keep the cluster data model in memory and update it '
+                     'from the Nova versioned notifications instead of '
+                     'rebuilding it from the Nova API for every audit'),
+    cfg.ListOpt('notification_topics',
+                default=['versioned_notifications'],
+                help='The topics Nova publishes its versioned '
+                     'notifications on'),
+    cfg.IntOpt('reconciliation_interval',
+               default=600,
+               min=1,
+               help='Number of seconds between two full synchronizations '
+                    'of the in-memory cluster data model with the Nova API'),
+]
+cluster_model_opt_group = cfg.OptGroup(
+    name='watcher_cluster_model',
+    title='Options for the in-memory cluster data model')
+CONF.register_group(cluster_model_opt_group)
+CONF.register_opts(WATCHER_CLUSTER_MODEL_OPTS, cluster_model_opt_group)
+
+
+def _unwrap(payload):
+    """Return the fields of a versioned notification payload"""
+    return payload.get('nova_object.data', payload)
+
+
+class IncrementalClusterModelCollector(api.BaseClusterModelCollector):
+    """In-memory cluster data model kept current from Nova notifications
+
+    The model is seeded with a full synchronization done by the wrapped
+    collector, then updated from the instance and service notifications.
+    A full synchronization is periodically run to correct any drift, or
+    on the next request when a notification cannot be applied.
+    """
+
+    def __init__(self, collector):
+        super(IncrementalClusterModelCollector, self).__init__()
+        self.collector = collector
+        self.handler = notification_handler.NovaNotificationHandler()
+        self.handler.register_observer(self)
+        self.last_sync = None
+        self._model = None
+        self._out_of_sync = True
+        self._lock = threading.RLock()
+        # the notifications received by each ongoing synchronization
+        self._recordings = []
+        self._listener = None
+        self._reconciliation = None
+        self._event_handlers = {
+            'instance.create.end': self.update_instance,
+            'instance.live_migration_post_dest.end': self.update_instance,
+            'instance.delete.end': self.delete_instance,
+            'service.update': self.update_service,
+        }
+
+    def start(self, transport=None):
+        transport = transport or om.get_transport(CONF)
+        targets = [om.Target(topic=topic)
+                   for topic in CONF.watcher_cluster_model.notification_topics]
+        self._listener = om.get_notification_listener(
+            transport, targets, [self.handler], executor='eventlet')
+        self._listener.start()
+
+        interval = CONF.watcher_cluster_model.reconciliation_interval
+        self._reconciliation = loopingcall.FixedIntervalLoopingCall(
+            self.synchronize)
+        self._reconciliation.start(interval=interval, initial_delay=interval)
+
+    def stop(self):
+        if self._reconciliation is not None:
+            self._reconciliation.stop()
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener.wait()
+
+    def synchronize(self):
+        """Rebuild the whole model from the Nova API
+
+        The notifications received while the Nova API is crawled are
+        recorded and replayed on the new model, since the crawl may have
+        missed their effect. Replaying one already seen by the crawl is
+        harmless: the event handlers are idempotent.
+        """
+        LOG.info(_LI("Synchronizing the cluster data model"))
+        events = []
+        with self._lock:
+            self._recordings.append(events)
+        try:
+            model = self.collector.get_latest_cluster_data_model()
+        finally:
+            with self._lock:
+                self._recordings.remove(events)
+        with self._lock:
+            self._model = model
+            self._out_of_sync = False
+            self.last_sync = time.time()
+            for event_type, payload in events:
+                self._apply(event_type, payload)
+
+    def get_latest_cluster_data_model(self):
+        with self._lock:
+            out_of_sync = self._out_of_sync
+        if out_of_sync:
+            # the notifications are still applied during the crawl
+            self.synchronize()
+        with self._lock:
+            # strategies modify the model they are given
+            return self._model.fork()
+
+    def update(self, observable, ctx, metadata, publisher_id, event_type,
+               payload):
+        if event_type not in self._event_handlers:
+            return
+        with self._lock:
+            for events in self._recordings:
+                events.append((event_type, payload))
+            if self._model is None:
+                # not seeded yet, the first synchronization will catch up
+                return
+            self._apply(event_type, payload)
+
+    def _apply(self, event_type, payload):
+        try:
+            self._event_handlers[event_type](_unwrap(payload))
+        except Exception:
+            LOG.exception(_LE("Cannot apply the '%s' notification to "
+                              "the cluster data model"), event_type)
+            self._out_of_sync = True
+
+    def _get_hypervisor(self, host):
+        hypervisor = self._model.get_all_hypervisors().get(host)
+        if hypervisor is None:
+            # a new compute node: its capacities are only known from the API
+            LOG.info(_LI("Unknown hypervisor %s, the cluster data model "
+                         "will be synchronized"), host)
+            self._out_of_sync = True
+        return hypervisor
+
+    def update_instance(self, payload):
+        """Add an instance or move it to the host of the payload"""
+        hypervisor = self._get_hypervisor(payload['host'])
+        flavor = payload.get('flavor')
+        if hypervisor is None:
+            return
+        mapping = self._model.get_mapping()
+        vm = self._model.get_all_vms().get(payload['uuid'])
+        if vm is None:
+            if flavor is None:
+                # the payload of older Nova releases has no flavor
+                self._out_of_sync = True
+                return
+            vm = obj_vm.VM()
+            vm.uuid = payload['uuid']
+            self._model.add_vm(vm)
+        else:
+            if vm.uuid in mapping.get_mapping_vm():
+                mapping.unmap_from_id(mapping.get_mapping_vm()[vm.uuid],
+                                      vm.uuid)
+            # the VM may be shared with the snapshots given to the audits
+            vm = copy.copy(vm)
+            self._model.add_vm(vm)
+
+        vm.state = payload.get('state', vm.state)
+        if flavor is not None:
+            flavor = _unwrap(flavor)
+            self._model.get_resource_from_id(
+                resource.ResourceType.memory).set_capacity(
+                    vm, flavor['memory_mb'])
+            self._model.get_resource_from_id(
+                resource.ResourceType.disk).set_capacity(
+                    vm, flavor['root_gb'])
+            self._model.get_resource_from_id(
+                resource.ResourceType.cpu_cores).set_capacity(
+                    vm, flavor['vcpus'])
+        mapping.map(hypervisor, vm)
+
+    def delete_instance(self, payload):
+        vm = self._model.get_all_vms().get(payload['uuid'])
+        if vm is None:
+            return
+        mapping = self._model.get_mapping()
+        node_uuid = mapping.get_mapping_vm().get(vm.uuid)
+        if node_uuid is not None:
+            mapping.unmap_from_id(node_uuid, vm.uuid)
+        for r in self._model.resource.values():
+            r.unset_capacity(vm)
+        self._model.remove_vm(vm)
+
+    def update_service(self, payload):
+        if payload.get('binary') != 'nova-compute':
+            return
+        hypervisor = self._get_hypervisor(payload['host'])
+        if hypervisor is None:
+            return
+        if payload.get('disabled'):
+            hypervisor.status = hypervisor_state.HypervisorState.DISABLED.value
+        else:
+            hypervisor.status = hypervisor_state.HypervisorState.ENABLED.value
+        if payload.get('forced_down'):
+            hypervisor.state = hypervisor_state.HypervisorState.OFFLINE.value
+        else:
+            hypervisor.state = hypervisor_state.HypervisorState.ONLINE.value
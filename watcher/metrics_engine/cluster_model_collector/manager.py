@@ -17,10 +17,14 @@
 # limitations under the License.
 #
 
+import threading
+
 from oslo_config import cfg
 from oslo_log import log
 
+from watcher.common import clients
 from watcher.common import nova_helper
+from watcher.metrics_engine.cluster_model_collector import incremental
 from watcher.metrics_engine.cluster_model_collector import nova as cnova
 
 
@@ -29,7 +33,23 @@ CONF = cfg.CONF
 
 
 class CollectorManager(object):
+    # shared by every audit of the process when notifications are used
+    _incremental_collector = None
+    _lock = threading.Lock()
+
     def get_cluster_model_collector(self, osc=None):
         """:param osc: an OpenStackClients instance"""
+        if CONF.watcher_cluster_model.use_notifications:
+            return self.get_incremental_cluster_model_collector()
         nova = nova_helper.NovaHelper(osc=osc)
         return cnova.NovaClusterModelCollector(nova)
+
+    def get_incremental_cluster_model_collector(self):
+        with CollectorManager._lock:
+            if CollectorManager._incremental_collector is None:
+                nova = nova_helper.NovaHelper(osc=clients.get_clients())
+                collector = incremental.IncrementalClusterModelCollector(
+                    cnova.NovaClusterModelCollector(nova))
+                collector.start()
+                CollectorManager._incremental_collector = collector
+            return CollectorManager._incremental_collector
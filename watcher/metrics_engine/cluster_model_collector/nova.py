@@ -17,8 +17,12 @@
 # limitations under the License.
 #
 
+import collections
+import time
+
 from oslo_log import log
 
+from watcher._i18n import _LI
 from watcher.decision_engine.model import hypervisor as obj_hypervisor
 from watcher.decision_engine.model import model_root
 from watcher.decision_engine.model import resource
@@ -29,12 +33,45 @@ LOG = log.getLogger(__name__)
 
 
 class NovaClusterModelCollector(api.BaseClusterModelCollector):
+    """Build the cluster data model from the Nova API
+
+    Services, hypervisors, instances and flavors are each listed in bulk
+    and joined locally by host, so the number of requests sent to Nova does
+    not grow with the number of hypervisors.
+    """
+
+    # Page size used to list the instances, matches Nova osapi_max_limit
+    INSTANCE_PAGE_SIZE = 1000
+
     def __init__(self, wrapper):
         super(NovaClusterModelCollector, self).__init__()
         self.wrapper = wrapper
+        self.stats = {'requests': 0, 'duration': 0.0}
+
+    def _list_instances(self):
+        instances = []
+        marker = None
+        while True:
+            page = self.wrapper.get_instance_list(
+                marker=marker, limit=self.INSTANCE_PAGE_SIZE)
+            self.stats['requests'] += 1
+            if not page:
+                break
+            instances.extend(page)
+            marker = page[-1].id
+        return instances
+
+    def _get_service(self, services, service_id):
+        service = services.get(service_id)
+        if service is None:
+            service = self.wrapper.nova.services.find(id=service_id)
+            self.stats['requests'] += 1
+        return service
 
     def get_latest_cluster_data_model(self):
         LOG.debug("Getting latest cluster data model")
+        start = time.time()
+        self.stats = {'requests': 0, 'duration': 0.0}
 
         cluster = model_root.ModelRoot()
         mem = resource.Resource(resource.ResourceType.memory)
@@ -46,10 +83,17 @@ class NovaClusterModelCollector(api.BaseClusterModelCollector):
         cluster.create_resource(disk)
         cluster.create_resource(disk_capacity)
 
-        flavor_cache = {}
+        services = dict((s.id, s) for s in self.wrapper.get_service_list())
         hypervisors = self.wrapper.get_hypervisors_list()
+        flavor_cache = dict((f.id, f) for f in self.wrapper.get_flavor_list())
+        self.stats['requests'] += 3
+
+        vms_by_host = collections.defaultdict(list)
+        for v in self._list_instances():
+            vms_by_host[self.wrapper.get_hostname(v)].append(v)
+
         for h in hypervisors:
-            service = self.wrapper.nova.services.find(id=h.service['id'])
+            service = self._get_service(services, h.service['id'])
             # create hypervisor in cluster_model_collector
             hypervisor = obj_hypervisor.Hypervisor()
             hypervisor.uuid = service.host
@@ -62,15 +106,17 @@ class NovaClusterModelCollector(api.BaseClusterModelCollector):
             hypervisor.state = h.state
             hypervisor.status = h.status
             cluster.add_hypervisor(hypervisor)
-            vms = self.wrapper.get_vms_by_hypervisor(str(service.host))
-            for v in vms:
+            for v in vms_by_host.get(str(service.host), []):
                 # create VM in cluster_model_collector
                 vm = obj_vm.VM()
                 vm.uuid = v.id
                 # nova/nova/compute/vm_states.py
                 vm.state = getattr(v, 'OS-EXT-STS:vm_state')
 
-                # set capacity
+                # set capacity, flavors missing from the bulk listing
+                # (e.g. deleted ones) are fetched one by one
+                if v.flavor['id'] not in flavor_cache:
+                    self.stats['requests'] += 1
                 self.wrapper.get_flavor_instance(v, flavor_cache)
                 mem.set_capacity(vm, v.flavor['ram'])
                 disk.set_capacity(vm, v.flavor['disk'])
@@ -78,4 +124,8 @@ class NovaClusterModelCollector(api.BaseClusterModelCollector):
 
                 cluster.get_mapping().map(hypervisor, vm)
                 cluster.add_vm(vm)
+
+        self.stats['duration'] = time.time() - start
+        LOG.info(_LI("Cluster data model collected in %(duration).3fs "
+                     "using %(requests)d Nova API requests"), self.stats)
         return cluster
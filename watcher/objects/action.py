@@ -101,6 +101,17 @@ class Action(base.WatcherObject):
         action = Action._from_db_object(cls(context), db_action)
         return action
 
+    @classmethod
+    def list_by_ids(cls, context, ids):
+        """Return the actions of the given ids, looked up at once.
+
+        :param context: Security context.
+        :param ids: the ids of the actions.
+        :returns: a list of :class:`Action` object, in no particular order.
+        """
+        db_actions = cls.dbapi.get_actions_by_ids(context, ids)
+        return Action._from_db_object_list(db_actions, cls, context)
+
     @classmethod
     def list(cls, context, limit=None, marker=None, filters=None,
              sort_key=None, sort_dir=None):
@@ -136,8 +147,36 @@ class Action(base.WatcherObject):
         """
         values = self.obj_get_changes()
         db_action = self.dbapi.create_action(values)
+        base.notify_write(self.obj_name())
         self._from_db_object(self, db_action)
 
+    @classmethod
+    def bulk_create(cls, context, actions, chain=False):
+        """Create several Action records in the DB in a single transaction.
+
+        :param context: Security context.
+        :param actions: A list of Action objects not created yet.
+        :param chain: Whether each action must be followed by the next
+                      one of the list.
+        :returns: The list of the actions, updated from the DB.
+        """
+        db_actions = cls.dbapi.create_actions(
+            [action.obj_get_changes() for action in actions], chain=chain)
+        base.notify_write(cls.obj_name())
+        for action, db_action in zip(actions, db_actions):
+            cls._from_db_object(action, db_action)
+        return actions
+
+    @classmethod
+    def update_states(cls, context, states):
+        """Update the state of several Action records in the DB at once.
+
+        :param context: Security context.
+        :param states: A dict giving the new state of every action uuid.
+        """
+        cls.dbapi.update_action_states(states)
+        base.notify_write(cls.obj_name())
+
     def destroy(self, context=None):
         """Delete the Action from the DB.
 
@@ -149,6 +188,7 @@ class Action(base.WatcherObject):
                         object, e.g.: Action(context)
         """
         self.dbapi.destroy_action(self.uuid)
+        base.notify_write(self.obj_name())
         self.obj_reset_changes()
 
     def save(self, context=None):
@@ -166,6 +206,7 @@ class Action(base.WatcherObject):
         """
         updates = self.obj_get_changes()
         self.dbapi.update_action(self.uuid, updates)
+        base.notify_write(self.obj_name())
 
         self.obj_reset_changes()
 
@@ -200,5 +241,6 @@ class Action(base.WatcherObject):
                         object, e.g.: Audit(context)
         """
         self.dbapi.soft_delete_action(self.uuid)
+        base.notify_write(self.obj_name())
         self.state = "DELETED"
         self.save()
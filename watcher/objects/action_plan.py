@@ -98,6 +98,7 @@ class ActionPlan(base.WatcherObject):
         'audit_id': obj_utils.int_or_none,
         'first_action_id': obj_utils.int_or_none,
         'state': obj_utils.str_or_none,
+        'hostname': obj_utils.str_or_none,
     }
 
     @staticmethod
@@ -154,6 +155,17 @@ class ActionPlan(base.WatcherObject):
         action_plan = ActionPlan._from_db_object(cls(context), db_action_plan)
         return action_plan
 
+    @classmethod
+    def list_by_ids(cls, context, ids):
+        """Return the action plans of the given ids, looked up at once.
+
+        :param context: Security context.
+        :param ids: the ids of the action plans.
+        :returns: a list of :class:`ActionPlan` object, in no particular order.
+        """
+        db_action_plans = cls.dbapi.get_action_plans_by_ids(context, ids)
+        return ActionPlan._from_db_object_list(db_action_plans, cls, context)
+
     @classmethod
     def list(cls, context, limit=None, marker=None, filters=None,
              sort_key=None, sort_dir=None):
@@ -176,6 +188,44 @@ class ActionPlan(base.WatcherObject):
                                                          sort_dir=sort_dir)
         return ActionPlan._from_db_object_list(db_action_plans, cls, context)
 
+    @classmethod
+    def claim(cls, context, uuid, hostname, states=(State.TRIGGERED,),
+              previous_hostname=None):
+        """Atomically take the ownership of an action plan.
+
+        :param context: Security context
+        :param uuid: the uuid of an action_plan.
+        :param hostname: the identifier of the applier executing the action
+                         plan.
+        :param states: the states the action plan can be claimed from.
+        :param previous_hostname: if set, the action plan is only claimed
+                                  from this applier.
+        :returns: True if the action plan is now ONGOING on this applier,
+                  False if it was claimed by another applier or is no
+                  longer in one of the given states.
+        """
+        claimed = cls.dbapi.claim_action_plan(uuid, hostname, list(states),
+                                              previous_hostname)
+        if claimed:
+            base.notify_write(cls.obj_name())
+        return claimed
+
+    @classmethod
+    def claim_next(cls, context, hostname, states=(State.TRIGGERED,)):
+        """Atomically take the ownership of the oldest waiting action plan.
+
+        :param context: Security context
+        :param hostname: the identifier of the applier executing the action
+                         plan.
+        :param states: the states the action plan can be claimed from.
+        :returns: the uuid of the claimed action plan or None.
+        """
+        action_plan_uuid = cls.dbapi.claim_next_action_plan(hostname,
+                                                            list(states))
+        if action_plan_uuid is not None:
+            base.notify_write(cls.obj_name())
+        return action_plan_uuid
+
     def create(self, context=None):
         """Create a Action record in the DB.
 
@@ -189,6 +239,7 @@ class ActionPlan(base.WatcherObject):
         """
         values = self.obj_get_changes()
         db_action_plan = self.dbapi.create_action_plan(values)
+        base.notify_write(self.obj_name())
         self._from_db_object(self, db_action_plan)
 
     def destroy(self, context=None):
@@ -202,6 +253,7 @@ class ActionPlan(base.WatcherObject):
                         object, e.g.: Action(context)
         """
         self.dbapi.destroy_action_plan(self.uuid)
+        base.notify_write(self.obj_name())
         self.obj_reset_changes()
 
     def save(self, context=None):
@@ -219,6 +271,7 @@ class ActionPlan(base.WatcherObject):
         """
         updates = self.obj_get_changes()
         self.dbapi.update_action_plan(self.uuid, updates)
+        base.notify_write(self.obj_name())
 
         self.obj_reset_changes()
 
@@ -252,14 +305,9 @@ class ActionPlan(base.WatcherObject):
                         A context should be set when instantiating the
                         object, e.g.: Audit(context)
         """
-        related_actions = action_objects.Action.list(
-            context=self._context,
-            filters={"action_plan_uuid": self.uuid})
-
-        # Cascade soft_delete of related actions
-        for related_action in related_actions:
-            related_action.soft_delete()
-
-        self.dbapi.soft_delete_action_plan(self.uuid)
+        # the related actions are soft deleted along with the action plan
+        self.dbapi.soft_delete_action_plans([self.id])
+        base.notify_write(self.obj_name())
+        base.notify_write(action_objects.Action.obj_name())
         self.state = State.DELETED
-        self.save()
+        self.obj_reset_changes(['state'])
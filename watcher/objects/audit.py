@@ -51,6 +51,8 @@ be one of the following:
 from watcher.common import exception
 from watcher.common import utils
 from watcher.db import api as dbapi
+from watcher.objects import action as action_objects
+from watcher.objects import action_plan as action_plan_objects
 from watcher.objects import base
 from watcher.objects import utils as obj_utils
 
@@ -155,6 +157,17 @@ class Audit(base.WatcherObject):
         audit = Audit._from_db_object(cls(context), db_audit)
         return audit
 
+    @classmethod
+    def list_by_ids(cls, context, ids):
+        """Return the audits of the given ids, looked up at once.
+
+        :param context: Security context.
+        :param ids: the ids of the audits.
+        :returns: a list of :class:`Audit` object, in no particular order.
+        """
+        db_audits = cls.dbapi.get_audits_by_ids(context, ids)
+        return Audit._from_db_object_list(db_audits, cls, context)
+
     @classmethod
     def list(cls, context, limit=None, marker=None, filters=None,
              sort_key=None, sort_dir=None):
@@ -195,6 +208,7 @@ class Audit(base.WatcherObject):
         """
         values = self.obj_get_changes()
         db_audit = self.dbapi.create_audit(values)
+        base.notify_write(self.obj_name())
         self._from_db_object(self, db_audit)
 
     def destroy(self, context=None):
@@ -208,6 +222,7 @@ class Audit(base.WatcherObject):
                         object, e.g.: Audit(context)
         """
         self.dbapi.destroy_audit(self.uuid)
+        base.notify_write(self.obj_name())
         self.obj_reset_changes()
 
     def save(self, context=None):
@@ -225,6 +240,7 @@ class Audit(base.WatcherObject):
         """
         updates = self.obj_get_changes()
         self.dbapi.update_audit(self.uuid, updates)
+        base.notify_write(self.obj_name())
 
         self.obj_reset_changes()
 
@@ -258,6 +274,11 @@ class Audit(base.WatcherObject):
                         A context should be set when instantiating the
                         object, e.g.: Audit(context)
         """
-        self.dbapi.soft_delete_audit(self.uuid)
-        self.state = "DELETED"
-        self.save()
+        # the related action plans and actions are soft deleted along with
+        # the audit
+        self.dbapi.soft_delete_audits([self.id])
+        base.notify_write(self.obj_name())
+        base.notify_write(action_plan_objects.ActionPlan.obj_name())
+        base.notify_write(action_objects.Action.obj_name())
+        self.state = State.DELETED
+        self.obj_reset_changes(['state'])
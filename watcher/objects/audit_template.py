@@ -163,6 +163,20 @@ class AuditTemplate(base.WatcherObject):
                                                        db_audit_template)
         return audit_template
 
+    @classmethod
+    def list_by_ids(cls, context, ids):
+        """Return the audit templates of the given ids, looked up at once.
+
+        :param context: Security context.
+        :param ids: the ids of the audit templates.
+        :returns: a list of :class:`AuditTemplate` object, in no particular
+                  order.
+        """
+        db_audit_templates = cls.dbapi.get_audit_templates_by_ids(context,
+                                                                  ids)
+        return AuditTemplate._from_db_object_list(db_audit_templates, cls,
+                                                  context)
+
     @classmethod
     def list(cls, context, filters=None, limit=None, marker=None,
              sort_key=None, sort_dir=None):
@@ -208,6 +222,7 @@ class AuditTemplate(base.WatcherObject):
         if goal not in cfg.CONF.watcher_goals.goals.keys():
             raise exception.InvalidGoal(goal=goal)
         db_audit_template = self.dbapi.create_audit_template(values)
+        base.notify_write(self.obj_name())
         self._from_db_object(self, db_audit_template)
 
     def destroy(self, context=None):
@@ -222,6 +237,7 @@ class AuditTemplate(base.WatcherObject):
         """
 
         self.dbapi.destroy_audit_template(self.uuid)
+        base.notify_write(self.obj_name())
         self.obj_reset_changes()
 
     def save(self, context=None):
@@ -240,6 +256,7 @@ class AuditTemplate(base.WatcherObject):
 
         updates = self.obj_get_changes()
         self.dbapi.update_audit_template(self.uuid, updates)
+        base.notify_write(self.obj_name())
 
         self.obj_reset_changes()
 
@@ -276,3 +293,4 @@ class AuditTemplate(base.WatcherObject):
         """
 
         self.dbapi.soft_delete_audit_template(self.uuid)
+        base.notify_write(self.obj_name())
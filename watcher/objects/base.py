@@ -31,6 +31,27 @@ from watcher.objects import utils as obj_utils
 LOG = logging.getLogger('object')
 
 
+# the callables notified with the name of an object class each time
+# objects of this class are written, e.g. to invalidate the API responses
+# built from them
+_write_listeners = []
+
+
+def add_write_listener(listener):
+    """Register a callable notified of the writes of the objects.
+
+    :param listener: a callable taking the name of the object class.
+    """
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def notify_write(obj_name):
+    """Notify the listeners that objects of a class were written."""
+    for listener in _write_listeners:
+        listener(obj_name)
+
+
 class NotSpecifiedSentinel(object):
     pass
 
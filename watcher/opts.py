@@ -18,22 +18,38 @@
 from keystoneauth1 import loading as ka_loading
 
 import watcher.api.app
+from watcher.api.middleware import response_cache
 from watcher.applier import manager as applier_manager
+from watcher.applier import precondition
+from watcher.applier.workflow_engine import default as workflow_engine
+from watcher.applier.workflow_engine import state_writer
 from watcher.common import clients
+from watcher.common import instance_waiter
+from watcher.common import nova_helper
 from watcher.decision_engine import manager as decision_engine_manger
 from watcher.decision_engine.planner import manager as planner_manager
 from watcher.decision_engine.strategy.selection import default \
     as strategy_selector
+from watcher.metrics_engine.cluster_history import cache as metrics_cache
+from watcher.metrics_engine.cluster_model_collector import incremental
 
 
 def list_opts():
     return [
-        ('api', watcher.api.app.API_SERVICE_OPTS),
+        ('api', (watcher.api.app.API_SERVICE_OPTS +
+                 response_cache.RESPONSE_CACHE_OPTS)),
         ('watcher_goals', strategy_selector.WATCHER_GOALS_OPTS),
         ('watcher_decision_engine',
          decision_engine_manger.WATCHER_DECISION_ENGINE_OPTS),
-        ('watcher_applier', applier_manager.APPLIER_MANAGER_OPTS),
+        ('watcher_applier', (applier_manager.APPLIER_MANAGER_OPTS +
+                             workflow_engine.WORKFLOW_ENGINE_OPTS +
+                             state_writer.STATE_WRITER_OPTS +
+                             precondition.PRECONDITION_OPTS)),
         ('watcher_planner', planner_manager.WATCHER_PLANNER_OPTS),
+        ('watcher_metrics_cache', metrics_cache.METRICS_CACHE_OPTS),
+        ('watcher_cluster_model', incremental.WATCHER_CLUSTER_MODEL_OPTS),
+        ('watcher_instance_waiter', instance_waiter.INSTANCE_WAITER_OPTS),
+        ('watcher_instance_cache', nova_helper.INSTANCE_CACHE_OPTS),
         ('nova_client', clients.NOVA_CLIENT_OPTS),
         ('glance_client', clients.GLANCE_CLIENT_OPTS),
         ('cinder_client', clients.CINDER_CLIENT_OPTS),
@@ -27,8 +27,10 @@ from oslo_config import cfg
 import pecan
 import pecan.testing
 from six.moves.urllib import parse as urlparse
+import sqlalchemy
 
 from watcher.api import hooks
+from watcher.db.sqlalchemy import api as sqla_api
 from watcher.tests.db import base
 
 PATH_PREFIX = '/v1'
@@ -111,6 +113,27 @@ class FunctionalTest(base.DbTestCase):
         print('GOT:%s' % response)
         return response
 
+    def get_json_queries(self, path, **kwargs):
+        """Send a GET request and count the SQL queries it runs
+
+        :returns: the response and the number of queries
+        """
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters,
+                                  context, executemany):
+            statements.append(statement)
+
+        engine = sqla_api.get_engine()
+        sqlalchemy.event.listen(engine, 'before_cursor_execute',
+                                before_cursor_execute)
+        try:
+            response = self.get_json(path, **kwargs)
+        finally:
+            sqlalchemy.event.remove(engine, 'before_cursor_execute',
+                                    before_cursor_execute)
+        return response, len(statements)
+
     def put_json(self, path, params, expect_errors=False, headers=None,
                  extra_environ=None, status=None):
         """Sends simulated HTTP PUT request to Pecan test app.
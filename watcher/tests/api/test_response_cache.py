@@ -0,0 +1,121 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from oslo_config import cfg
+
+from watcher import objects
+from watcher.tests.api import base as api_base
+from watcher.tests.objects import utils as obj_utils
+
+
+class TestResponseCache(api_base.FunctionalTest):
+
+    def setUp(self):
+        super(TestResponseCache, self).setUp()
+        self.audit_template = obj_utils.create_test_audit_template(
+            self.context)
+
+    def get(self, path, **kwargs):
+        return self.app.get(api_base.PATH_PREFIX + path, **kwargs)
+
+    def test_goals_etag(self):
+        response = self.get('/goals')
+        self.assertTrue(response.etag)
+        self.assertIsNotNone(response.last_modified)
+
+        response2 = self.get('/goals')
+        self.assertEqual(response.etag, response2.etag)
+        self.assertEqual(response.json, response2.json)
+
+        response3 = self.get('/goals',
+                             headers={'If-None-Match': response.etag})
+        self.assertEqual(304, response3.status_int)
+        self.assertEqual(b'', response3.body)
+
+        response4 = self.get('/goals', headers={'If-None-Match': '"other"'})
+        self.assertEqual(200, response4.status_int)
+
+    def test_audit_templates_cached(self):
+        path = '/audit_templates/%s' % self.audit_template.uuid
+        _, num_queries = self.get_json_queries(path)
+        self.assertNotEqual(0, num_queries)
+        response, num_queries = self.get_json_queries(path)
+        self.assertEqual(0, num_queries)
+        self.assertEqual(self.audit_template.uuid, response['uuid'])
+
+        # the cached responses depend on the identity of the caller
+        _, num_queries = self.get_json_queries(
+            path, headers={'X-Roles': 'admin'})
+        self.assertNotEqual(0, num_queries)
+
+    def test_audit_templates_invalidated_on_write(self):
+        path = '/audit_templates/%s' % self.audit_template.uuid
+        etag = self.get(path).etag
+        self.patch_json(path, [{'path': '/description', 'value': 'new',
+                                'op': 'replace'}])
+
+        response = self.get(path, headers={'If-None-Match': etag})
+        self.assertEqual(200, response.status_int)
+        self.assertNotEqual(etag, response.etag)
+        self.assertEqual('new', response.json['description'])
+
+        obj_utils.create_test_audit_template(
+            self.context, id=2, uuid='f8e47706-efcf-49a4-a5c4-af604eb492f2',
+            name='other')
+        response = self.get_json('/audit_templates')
+        self.assertEqual(2, len(response['audit_templates']))
+
+    def test_action_plans_only_finished(self):
+        action_plan = obj_utils.create_action_plan_without_audit(
+            self.context, state=objects.action_plan.State.ONGOING)
+        path = '/action_plans/%s' % action_plan.uuid
+        self.get_json(path)
+        _, num_queries = self.get_json_queries(path)
+        self.assertNotEqual(0, num_queries)
+        self.assertIsNone(self.get(path).etag)
+
+        action_plan.state = objects.action_plan.State.SUCCEEDED
+        action_plan.save()
+        self.get_json(path)
+        response, num_queries = self.get_json_queries(path)
+        self.assertEqual(0, num_queries)
+        self.assertEqual('SUCCEEDED', response['state'])
+
+        action_plan.soft_delete()
+        response = self.get_json(path, expect_errors=True)
+        self.assertEqual(404, response.status_int)
+
+    def test_action_plans_xml(self):
+        action_plan = obj_utils.create_action_plan_without_audit(
+            self.context, state=objects.action_plan.State.SUCCEEDED)
+        path = '/action_plans/%s' % action_plan.uuid
+        for _ in range(2):
+            response = self.get(path, headers={'Accept': 'application/xml'})
+            self.assertEqual(200, response.status_int)
+            self.assertEqual('application/xml', response.content_type)
+            self.assertIn(action_plan.uuid, response.text)
+            self.assertIsNone(response.etag)
+
+        self.assertEqual(action_plan.uuid, self.get_json(path)['uuid'])
+
+
+class TestResponseCacheDisabled(api_base.FunctionalTest):
+
+    def _make_app(self, enable_acl=False):
+        cfg.CONF.set_override('enable_response_cache', False, group='api')
+        return super(TestResponseCacheDisabled, self)._make_app(enable_acl)
+
+    def test_goals_not_cached(self):
+        response = self.app.get(api_base.PATH_PREFIX + '/goals')
+        self.assertIsNone(response.etag)
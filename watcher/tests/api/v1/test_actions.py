@@ -134,6 +134,29 @@ class TestListAction(api_base.FunctionalTest):
         uuids = [s['uuid'] for s in response['actions']]
         self.assertEqual(sorted(action_list), sorted(uuids))
 
+    def test_detail_queries_do_not_grow_with_the_list(self):
+        def create_actions(ids):
+            for id_ in ids:
+                obj_utils.create_test_action(
+                    self.context, id=id_, uuid=utils.generate_uuid(),
+                    next=id_ + 1 if id_ < ids[-1] else None)
+
+        create_actions(range(1, 3))
+        _, num_queries = self.get_json_queries('/actions/detail')
+
+        create_actions(range(3, 13))
+        response, num_more_queries = self.get_json_queries(
+            '/actions/detail')
+        self.assertEqual(12, len(response['actions']))
+        self.assertEqual(num_queries, num_more_queries)
+        by_uuid = dict((a['uuid'], a) for a in response['actions'])
+        action = objects.Action.get_by_id(self.context, 3)
+        next_action = objects.Action.get_by_id(self.context, 4)
+        self.assertEqual(next_action.uuid, by_uuid[action.uuid]['next_uuid'])
+        action_plan = objects.ActionPlan.get_by_id(self.context, 1)
+        self.assertEqual(action_plan.uuid,
+                         by_uuid[action.uuid]['action_plan_uuid'])
+
     def test_many_with_action_plan_uuid(self):
         action_plan = obj_utils.create_test_action_plan(
             self.context,
@@ -134,6 +134,36 @@ class TestListActionPlan(api_base.FunctionalTest):
         uuids = [s['uuid'] for s in response['action_plans']]
         self.assertEqual(sorted(action_plan_list), sorted(uuids))
 
+    def test_detail_queries_do_not_grow_with_the_list(self):
+        obj_utils.create_test_audit_template(self.context)
+
+        def create_action_plans(ids):
+            for id_ in ids:
+                obj_utils.create_test_audit(
+                    self.context, id=id_, uuid=utils.generate_uuid())
+                obj_utils.create_test_action(
+                    self.context, id=id_, uuid=utils.generate_uuid(),
+                    action_plan_id=id_, next=None)
+                obj_utils.create_test_action_plan(
+                    self.context, id=id_, uuid=utils.generate_uuid(),
+                    audit_id=id_, first_action_id=id_)
+
+        create_action_plans(range(1, 3))
+        _, num_queries = self.get_json_queries('/action_plans/detail')
+
+        create_action_plans(range(3, 13))
+        response, num_more_queries = self.get_json_queries(
+            '/action_plans/detail')
+        self.assertEqual(12, len(response['action_plans']))
+        self.assertEqual(num_queries, num_more_queries)
+        by_uuid = dict((p['uuid'], p) for p in response['action_plans'])
+        action_plan = objects.ActionPlan.get_by_id(self.context, 5)
+        audit = objects.Audit.get_by_id(self.context, 5)
+        action = objects.Action.get_by_id(self.context, 5)
+        self.assertEqual(audit.uuid, by_uuid[action_plan.uuid]['audit_uuid'])
+        self.assertEqual(action.uuid,
+                         by_uuid[action_plan.uuid]['first_action_uuid'])
+
     def test_many_with_soft_deleted_audit_uuid(self):
         action_plan_list = []
         audit1 = obj_utils.create_test_audit(self.context,
@@ -159,14 +189,10 @@ class TestListActionPlan(api_base.FunctionalTest):
 
         response = self.get_json('/action_plans')
 
-        self.assertEqual(len(action_plan_list), len(response['action_plans']))
-
-        for id_ in range(0, 2):
-            action_plan = response['action_plans'][id_]
-            self.assertEqual(None, action_plan['audit_uuid'])
-
-        for id_ in range(2, 4):
-            action_plan = response['action_plans'][id_]
+        # the action plans of the deleted audit are deleted along with it
+        self.assertEqual(action_plan_list[2:],
+                         [ap['uuid'] for ap in response['action_plans']])
+        for action_plan in response['action_plans']:
             self.assertEqual(audit2.uuid, action_plan['audit_uuid'])
 
     def test_many_with_audit_uuid(self):
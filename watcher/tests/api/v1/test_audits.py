@@ -132,6 +132,31 @@ class TestListAudit(api_base.FunctionalTest):
         uuids = [s['uuid'] for s in response['audits']]
         self.assertEqual(sorted(audit_list), sorted(uuids))
 
+    def test_detail_queries_do_not_grow_with_the_list(self):
+        def create_audits(ids):
+            for id_ in ids:
+                obj_utils.create_test_audit_template(
+                    self.context, id=id_ + 1, uuid=utils.generate_uuid(),
+                    name='template %d' % id_)
+                obj_utils.create_test_audit(
+                    self.context, id=id_, uuid=utils.generate_uuid(),
+                    audit_template_id=id_ + 1)
+
+        create_audits(range(1, 3))
+        _, num_queries = self.get_json_queries('/audits/detail')
+
+        create_audits(range(3, 13))
+        response, num_more_queries = self.get_json_queries('/audits/detail')
+        self.assertEqual(12, len(response['audits']))
+        self.assertEqual(num_queries, num_more_queries)
+        by_uuid = dict((a['uuid'], a) for a in response['audits'])
+        audit = objects.Audit.get_by_id(self.context, 5)
+        audit_template = objects.AuditTemplate.get_by_id(self.context, 6)
+        self.assertEqual(audit_template.uuid,
+                         by_uuid[audit.uuid]['audit_template_uuid'])
+        self.assertEqual('template 5',
+                         by_uuid[audit.uuid]['audit_template_name'])
+
     def test_many_without_soft_deleted(self):
         audit_list = []
         for id_ in [1, 2, 3]:
@@ -19,7 +19,12 @@
 import mock
 
 from watcher.applier.action_plan import default
+from watcher.applier.actions import migration
+from watcher.applier.actions import nop
 from watcher.applier.messaging import event_types as ev
+from watcher.applier import precondition
+from watcher.common import utils
+from watcher import objects
 from watcher.objects import action_plan as ap_objects
 from watcher.tests.db import base
 from watcher.tests.objects import utils as obj_utils
@@ -57,3 +62,78 @@ class TestDefaultActionPlanHandler(base.DbTestCase):
         messaging.status_topic_handler.publish_event.assert_has_calls(calls)
         self.assertEqual(
             2, messaging.status_topic_handler.publish_event.call_count)
+
+    def test_actions_written_before_action_plan(self):
+        self.config(state_batch_size=100, state_flush_interval=60,
+                    group='watcher_applier')
+        actions = [obj_utils.create_test_action(
+            self.context, id=i, uuid=utils.generate_uuid(),
+            action_type='nop', input_parameters={'message': 'hello'},
+            next=None) for i in range(1, 4)]
+        command = default.DefaultActionPlanHandler(self.context,
+                                                   mock.MagicMock(),
+                                                   self.action_plan.uuid)
+        states = []
+
+        def notify(uuid, event_type, state):
+            states.append([objects.Action.get_by_uuid(self.context,
+                                                      a.uuid).state
+                           for a in actions])
+
+        with mock.patch.object(command, 'notify', side_effect=notify):
+            command.execute()
+        self.assertEqual([objects.action.State.PENDING] * 3, states[0])
+        self.assertEqual([objects.action.State.SUCCEEDED] * 3, states[1])
+
+    @mock.patch.object(nop.Nop, 'execute', return_value=True)
+    def test_resume_action_plan(self, m_execute):
+        self.action_plan.state = ap_objects.State.ONGOING
+        self.action_plan.save()
+        states = [objects.action.State.SUCCEEDED,
+                  objects.action.State.SUCCEEDED,
+                  objects.action.State.ONGOING,
+                  objects.action.State.PENDING]
+        actions = [obj_utils.create_test_action(
+            self.context, id=i, uuid=utils.generate_uuid(),
+            action_type='nop', input_parameters={'message': 'hello'},
+            state=state, next=None) for i, state in enumerate(states, 1)]
+
+        command = default.DefaultActionPlanHandler(self.context,
+                                                   mock.MagicMock(),
+                                                   self.action_plan.uuid)
+        command.execute()
+
+        # only the interrupted and the pending actions are executed
+        self.assertEqual(2, m_execute.call_count)
+        self.assertEqual(
+            [objects.action.State.SUCCEEDED] * 4,
+            [objects.Action.get_by_uuid(self.context, a.uuid).state
+             for a in actions])
+        action_plan = ap_objects.ActionPlan.get_by_uuid(self.context,
+                                                        self.action_plan.uuid)
+        self.assertEqual(ap_objects.State.SUCCEEDED, action_plan.state)
+
+    @mock.patch.object(migration.Migrate, 'execute')
+    @mock.patch.object(precondition.nova_helper, 'NovaHelper')
+    def test_preconditions_not_met(self, m_nova_helper, m_execute):
+        instance_uuid = utils.generate_uuid()
+        m_nova_helper.return_value.find_instances.return_value = {
+            instance_uuid: None}
+        action = obj_utils.create_test_action(
+            self.context, action_type='migrate', next=None,
+            input_parameters={'resource_id': instance_uuid,
+                              'migration_type': 'live',
+                              'src_hypervisor': 'Node_1',
+                              'dst_hypervisor': 'Node_2'})
+        command = default.DefaultActionPlanHandler(self.context,
+                                                   mock.MagicMock(),
+                                                   self.action_plan.uuid)
+        command.execute()
+
+        self.assertFalse(m_execute.called)
+        self.assertEqual(
+            objects.action.State.FAILED,
+            objects.Action.get_by_uuid(self.context, action.uuid).state)
+        action_plan = ap_objects.ActionPlan.get_by_uuid(self.context,
+                                                        self.action_plan.uuid)
+        self.assertEqual(ap_objects.State.FAILED, action_plan.state)
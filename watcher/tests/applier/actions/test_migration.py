@@ -173,3 +173,15 @@ class TestMigration(base.TestCase):
             instance_id=self.INSTANCE_UUID,
             dest_hostname="hypervisor1-hostname"
         )
+
+    def test_execute_non_live_migration(self):
+        self.m_helper.find_instance.return_value = self.INSTANCE_UUID
+        self.action.input_parameters['migration_type'] = 'non_live'
+        self.assertTrue(self.action.validate_parameters())
+
+        self.action.execute()
+
+        self.m_helper.watcher_non_live_migrate_instance.\
+            assert_called_once_with(instance_id=self.INSTANCE_UUID,
+                                    hypervisor_id="hypervisor2-hostname")
+        self.assertFalse(self.m_helper.live_migrate_instance.called)
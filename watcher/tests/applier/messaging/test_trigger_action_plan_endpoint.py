@@ -17,12 +17,17 @@
 # limitations under the License.
 #
 
+import os
+import subprocess
 
 import mock
 
 from watcher.applier.messaging import trigger
 from watcher.common import utils
+from watcher.objects import action_plan as ap_objects
 from watcher.tests import base
+from watcher.tests.db import base as db_base
+from watcher.tests.objects import utils as obj_utils
 
 
 class TestTriggerActionPlan(base.TestCase):
@@ -39,3 +44,160 @@ class TestTriggerActionPlan(base.TestCase):
         expected_uuid = self.endpoint.launch_action_plan(self.context,
                                                          action_plan_uuid)
         self.assertEqual(action_plan_uuid, expected_uuid)
+
+    def test_is_running(self):
+        self.assertTrue(self.endpoint._is_running(os.getpid()))
+        child = subprocess.Popen(['true'])
+        child.wait()
+        self.assertFalse(self.endpoint._is_running(child.pid))
+
+
+class TestResumeActionPlans(db_base.DbTestCase):
+
+    # the pids of the appliers which are no longer running
+    STOPPED = (100, 101)
+
+    def setUp(self):
+        super(TestResumeActionPlans, self).setUp()
+        self.endpoint = trigger.TriggerActionPlan(
+            mock.MagicMock(host='node-1', applier_id='node-1:200'))
+        p = mock.patch.object(trigger.TriggerActionPlan, '_is_running',
+                              side_effect=lambda pid: pid not in self.STOPPED)
+        p.start()
+        self.addCleanup(p.stop)
+        self.action_plans = {}
+        for i, (state, hostname) in enumerate([
+                (ap_objects.State.ONGOING, 'node-1:100'),
+                (ap_objects.State.SUCCEEDED, 'node-1:100'),
+                (ap_objects.State.RECOMMENDED, None),
+                # executed by a running applier of the same host
+                (ap_objects.State.ONGOING, 'node-1:300'),
+                # the applier of another host cannot be checked
+                (ap_objects.State.ONGOING, 'node-2:101'),
+                # executed by a previous run with the same pid
+                (ap_objects.State.ONGOING, 'node-1:200'),
+                # claimed before the appliers were identified by pid
+                (ap_objects.State.ONGOING, 'node-1')], 1):
+            self.action_plans[i] = obj_utils.create_test_action_plan(
+                self.context, id=i, uuid=utils.generate_uuid(),
+                state=state, hostname=hostname)
+
+    def _get_hostname(self, i):
+        return ap_objects.ActionPlan.get_by_uuid(
+            self.context, self.action_plans[i].uuid).hostname
+
+    @mock.patch.object(trigger.TriggerActionPlan, 'do_launch_action_plan')
+    def test_resume_action_plans(self, m_launch):
+        resumed = [self.action_plans[i].uuid for i in (1, 6, 7)]
+        self.assertEqual(resumed,
+                         self.endpoint.resume_action_plans(self.context))
+        self.endpoint.executor.shutdown()
+        self.assertEqual([mock.call(self.context, uuid) for uuid in resumed],
+                         m_launch.call_args_list)
+        for i in (1, 6, 7):
+            self.assertEqual('node-1:200', self._get_hostname(i))
+        self.assertEqual('node-1:300', self._get_hostname(4))
+        self.assertEqual('node-2:101', self._get_hostname(5))
+
+    @mock.patch.object(trigger.TriggerActionPlan, 'do_launch_action_plan')
+    def test_resume_on_reserved_workers(self, m_launch):
+        self.config(workers=1, group='watcher_applier')
+        endpoint = trigger.TriggerActionPlan(self.endpoint.applier_manager)
+        triggered = obj_utils.create_test_action_plan(
+            self.context, id=8, uuid=utils.generate_uuid(),
+            state=ap_objects.State.TRIGGERED)
+        # the single worker is busy
+        self.assertTrue(endpoint._reserve_worker())
+
+        resumed = endpoint.resume_action_plans(self.context)
+        endpoint.claim_action_plans(self.context)
+        self.assertFalse(m_launch.called)
+        self.assertEqual(ap_objects.State.TRIGGERED,
+                         ap_objects.ActionPlan.get_by_uuid(
+                             self.context, triggered.uuid).state)
+
+        # the worker runs the resumed action plans first
+        endpoint._release_worker()
+        endpoint.claim_action_plans(self.context)
+        endpoint.executor.shutdown()
+        self.assertEqual(
+            [mock.call(self.context, uuid)
+             for uuid in resumed + [triggered.uuid]],
+            m_launch.call_args_list)
+        self.assertEqual(0, endpoint._running)
+
+    @mock.patch.object(trigger.TriggerActionPlan, 'do_launch_action_plan')
+    def test_resume_taken_over_by_another_applier(self, m_launch):
+        # another applier of this host resumed it in the meantime
+        original_claim = ap_objects.ActionPlan.claim
+
+        def claim(context, uuid, *args, **kwargs):
+            if uuid == self.action_plans[1].uuid:
+                original_claim(context, uuid, 'node-1:400',
+                               states=(ap_objects.State.ONGOING,))
+            return original_claim(context, uuid, *args, **kwargs)
+
+        with mock.patch.object(ap_objects.ActionPlan, 'claim',
+                               side_effect=claim):
+            self.assertNotIn(self.action_plans[1].uuid,
+                             self.endpoint.resume_action_plans(self.context))
+        self.endpoint.executor.shutdown()
+        self.assertEqual('node-1:400', self._get_hostname(1))
+
+
+class TestClaimActionPlans(db_base.DbTestCase):
+
+    def setUp(self):
+        super(TestClaimActionPlans, self).setUp()
+        self.config(workers=1, group='watcher_applier')
+        self.endpoint = trigger.TriggerActionPlan(
+            mock.MagicMock(host='node-1', applier_id='applier-1'))
+        self.action_plans = [
+            obj_utils.create_test_action_plan(
+                self.context, id=i, uuid=utils.generate_uuid(),
+                state=ap_objects.State.TRIGGERED)
+            for i in range(1, 4)]
+
+    def _get_action_plan(self, action_plan):
+        return ap_objects.ActionPlan.get_by_uuid(self.context,
+                                                 action_plan.uuid)
+
+    @mock.patch.object(trigger.TriggerActionPlan, 'do_launch_action_plan')
+    def test_launch_claims_waiting_action_plans(self, m_launch):
+        self.endpoint.launch_action_plan(self.context,
+                                         self.action_plans[1].uuid)
+        self.endpoint.executor.shutdown()
+        self.assertEqual(
+            [mock.call(self.context, self.action_plans[i].uuid)
+             for i in (1, 0, 2)],
+            m_launch.call_args_list)
+        for action_plan in self.action_plans:
+            action_plan = self._get_action_plan(action_plan)
+            self.assertEqual(ap_objects.State.ONGOING, action_plan.state)
+            self.assertEqual('applier-1', action_plan.hostname)
+
+    @mock.patch.object(trigger.TriggerActionPlan, 'do_launch_action_plan')
+    def test_launch_already_claimed(self, m_launch):
+        ap_objects.ActionPlan.claim(self.context, self.action_plans[0].uuid,
+                                    'applier-2')
+        self.endpoint.launch_action_plan(self.context,
+                                         self.action_plans[0].uuid)
+        self.endpoint.executor.shutdown()
+        self.assertEqual(
+            [mock.call(self.context, self.action_plans[i].uuid)
+             for i in (1, 2)],
+            m_launch.call_args_list)
+        self.assertEqual(
+            'applier-2', self._get_action_plan(self.action_plans[0]).hostname)
+
+    @mock.patch.object(trigger.TriggerActionPlan, 'do_launch_action_plan')
+    def test_launch_all_workers_busy(self, m_launch):
+        self.assertTrue(self.endpoint._reserve_worker())
+        self.endpoint.launch_action_plan(self.context,
+                                         self.action_plans[0].uuid)
+        self.endpoint.claim_action_plans(self.context)
+        self.endpoint.executor.shutdown()
+        self.assertFalse(m_launch.called)
+        self.assertEqual(
+            ap_objects.State.TRIGGERED,
+            self._get_action_plan(self.action_plans[0]).state)
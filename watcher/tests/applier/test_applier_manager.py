@@ -17,12 +17,25 @@
 # limitations under the License.
 #
 
+import time
+
+import mock
 from mock import patch
+from oslo_config import cfg
+import oslo_messaging as om
 from threading import Thread
 
+from watcher.applier.actions import nop
 from watcher.applier.manager import ApplierManager
+from watcher.applier.messaging import trigger
+from watcher.applier import rpcapi
 from watcher.common.messaging.messaging_core import MessagingCore
+from watcher.common import utils
+from watcher import objects
+from watcher.objects import action_plan as ap_objects
 from watcher.tests import base
+from watcher.tests.db import base as db_base
+from watcher.tests.objects import utils as obj_utils
 
 
 class TestApplierManager(base.TestCase):
@@ -30,10 +43,82 @@ class TestApplierManager(base.TestCase):
         super(TestApplierManager, self).setUp()
         self.applier = ApplierManager()
 
+    @patch.object(trigger.TriggerActionPlan, "start")
     @patch.object(MessagingCore, "connect")
     @patch.object(Thread, "join")
-    def test_connect(self, m_messaging, m_thread):
+    def test_connect(self, m_messaging, m_thread, m_start):
         self.applier.connect()
         self.applier.join()
         self.assertEqual(m_messaging.call_count, 2)
         self.assertEqual(m_thread.call_count, 1)
+        self.assertEqual(m_start.call_count, 1)
+
+
+class TestSeveralAppliers(db_base.DbTestCase):
+
+    def setUp(self):
+        super(TestSeveralAppliers, self).setUp()
+        self.config(rpc_backend='fake')
+        self.config(workers=1, claim_interval=0.1, group='watcher_applier')
+        # the appliers and the API share the same fake broker
+        transport = om.get_transport(cfg.CONF)
+        p_transport = mock.patch.object(om, 'get_transport',
+                                        return_value=transport)
+        p_transport.start()
+        self.addCleanup(p_transport.stop)
+
+        self.appliers = [ApplierManager(host='applier-%d' % i)
+                         for i in (1, 2)]
+        for applier in self.appliers:
+            applier.connect()
+            self.addCleanup(applier.disconnect)
+
+        self.action_plans = []
+        for i in range(1, 5):
+            action_plan = obj_utils.create_test_action_plan(
+                self.context, id=i, uuid=utils.generate_uuid(),
+                state=ap_objects.State.TRIGGERED, first_action_id=None)
+            obj_utils.create_test_action(
+                self.context, id=i, uuid=utils.generate_uuid(),
+                action_plan_id=i, action_type='nop',
+                input_parameters={'message': action_plan.uuid},
+                state=objects.action.State.PENDING, next=None)
+            self.action_plans.append(action_plan)
+
+    def _wait_for_action_plans(self, timeout=10):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            action_plans = [
+                ap_objects.ActionPlan.get_by_uuid(self.context, ap.uuid)
+                for ap in self.action_plans]
+            if all(ap.state == ap_objects.State.SUCCEEDED
+                   for ap in action_plans):
+                break
+            time.sleep(0.05)
+        return action_plans
+
+    @mock.patch.object(nop.Nop, 'execute', autospec=True)
+    def test_action_plans_executed_once(self, m_execute):
+        executed = []
+
+        def execute(action):
+            executed.append(action.message)
+            time.sleep(0.2)
+            return True
+
+        m_execute.side_effect = execute
+        api = rpcapi.ApplierAPI()
+        for action_plan in self.action_plans:
+            # launched twice, as when the API request is retried
+            api.launch_action_plan(self.context, action_plan.uuid)
+            api.launch_action_plan(self.context, action_plan.uuid)
+
+        action_plans = self._wait_for_action_plans()
+        self.assertEqual([ap_objects.State.SUCCEEDED] * 4,
+                         [ap.state for ap in action_plans])
+        self.assertEqual(sorted(ap.uuid for ap in self.action_plans),
+                         sorted(executed))
+        # a busy applier does not hold the action plans it receives
+        self.assertEqual(set(applier.applier_id
+                             for applier in self.appliers),
+                         set(ap.hostname for ap in action_plans))
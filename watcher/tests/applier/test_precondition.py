@@ -0,0 +1,160 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import mock
+
+from watcher.applier import precondition
+from watcher.common import exception
+from watcher.common import utils
+from watcher import objects
+from watcher.tests.db import base
+from watcher.tests.objects import utils as obj_utils
+
+
+def fake_instance(uuid, host):
+    instance = mock.MagicMock(id=uuid)
+    setattr(instance, 'OS-EXT-SRV-ATTR:host', host)
+    return instance
+
+
+def fake_service(host, status='enabled', state='up'):
+    return mock.MagicMock(host=host, status=status, state=state)
+
+
+class TestActionPlanValidator(base.DbTestCase):
+
+    def setUp(self):
+        super(TestActionPlanValidator, self).setUp()
+        self.vm_1 = utils.generate_uuid()
+        self.vm_2 = utils.generate_uuid()
+        self.nova = mock.MagicMock()
+        self.nova.find_instances.side_effect = lambda ids, refresh: dict(
+            (uuid, {self.vm_1: fake_instance(self.vm_1, 'Node_1'),
+                    self.vm_2: fake_instance(self.vm_2, 'Node_2')}.get(uuid))
+            for uuid in ids)
+        self.nova.get_service_list.return_value = [
+            fake_service('Node_1'), fake_service('Node_2'),
+            fake_service('Node_3', status='disabled'),
+            fake_service('Node_4', state='down')]
+        p_nova = mock.patch.object(precondition.nova_helper, 'NovaHelper',
+                                   return_value=self.nova)
+        p_nova.start()
+        self.addCleanup(p_nova.stop)
+        self.validator = precondition.ActionPlanValidator(
+            self.context, osc=mock.MagicMock())
+
+    def _create_actions(self, *actions):
+        return [obj_utils.create_test_action(
+            self.context, id=i, uuid=utils.generate_uuid(),
+            action_type=action_type, input_parameters=parameters, next=None)
+            for i, (action_type, parameters) in enumerate(actions, 1)]
+
+    def _migrate(self, instance, src, dst):
+        return ('migrate', {'resource_id': instance,
+                            'migration_type': 'live',
+                            'src_hypervisor': src,
+                            'dst_hypervisor': dst})
+
+    def _change_state(self, host, state):
+        return ('change_nova_service_state', {'resource_id': host,
+                                              'state': state})
+
+    def _get_states(self, actions):
+        return [objects.Action.get_by_uuid(self.context, a.uuid).state
+                for a in actions]
+
+    def test_validate(self):
+        actions = self._create_actions(
+            self._change_state('Node_3', 'up'),
+            self._migrate(self.vm_1, 'Node_1', 'Node_3'),
+            self._migrate(self.vm_1, 'Node_3', 'Node_2'),
+            self._migrate(self.vm_2, 'Node_2', 'Node_1'),
+            self._change_state('Node_3', 'down'),
+            ('nop', {'message': 'done'}))
+
+        self.assertEqual(actions, self.validator.validate('plan', actions))
+        self.nova.find_instances.assert_called_once_with(
+            set([self.vm_1, self.vm_2]), refresh=True)
+        self.nova.get_service_list.assert_called_once_with()
+        self.assertEqual(6, self.validator.report['actions'])
+        self.assertEqual(2, self.validator.report['instances'])
+        self.assertEqual(0, self.validator.report['invalid'])
+        self.assertIn('duration', self.validator.report)
+
+    def _create_invalid_plan(self):
+        return self._create_actions(
+            # the instance does not exist
+            self._migrate(utils.generate_uuid(), 'Node_1', 'Node_2'),
+            # the instance is not on the source hypervisor
+            self._migrate(self.vm_1, 'Node_2', 'Node_3'),
+            # the destination hypervisor is disabled
+            self._migrate(self.vm_1, 'Node_1', 'Node_3'),
+            # the destination hypervisor is down
+            self._migrate(self.vm_2, 'Node_2', 'Node_4'),
+            # the hypervisor does not exist
+            self._change_state('Node_5', 'down'),
+            # the parameters are invalid
+            ('nop', {}),
+            self._migrate(self.vm_1, 'Node_1', 'Node_2'),
+            self._change_state('Node_1', 'down'))
+
+    def test_validate_fail(self):
+        actions = self._create_invalid_plan()
+        self.assertRaises(exception.ActionPlanPreconditionFailed,
+                          self.validator.validate, 'plan', actions)
+        self.assertEqual([objects.action.State.FAILED] * 6 +
+                         [objects.action.State.PENDING] * 2,
+                         self._get_states(actions))
+        self.assertEqual(6, self.validator.report['invalid'])
+
+    def test_validate_prune(self):
+        self.config(precondition_policy='prune', group='watcher_applier')
+        actions = self._create_invalid_plan()
+        self.assertEqual(actions[6:],
+                         self.validator.validate('plan', actions))
+        self.assertEqual([objects.action.State.CANCELLED] * 6 +
+                         [objects.action.State.PENDING] * 2,
+                         self._get_states(actions))
+
+    def test_validate_already_migrated(self):
+        # the first migration was executed by the previous run of the
+        # resumed action plan
+        actions = self._create_actions(
+            self._migrate(self.vm_1, 'Node_2', 'Node_1'),
+            self._migrate(self.vm_2, 'Node_2', 'Node_1'),
+            self._migrate(self.vm_1, 'Node_1', 'Node_2'))
+
+        self.assertEqual(actions[1:],
+                         self.validator.validate('plan', actions))
+        self.assertEqual([objects.action.State.SUCCEEDED,
+                          objects.action.State.PENDING,
+                          objects.action.State.PENDING],
+                         self._get_states(actions))
+        self.assertEqual(0, self.validator.report['invalid'])
+        self.assertEqual(1, self.validator.report['done'])
+
+    def test_validate_disabled(self):
+        self.config(precondition_policy='none', group='watcher_applier')
+        actions = self._create_invalid_plan()
+        self.assertEqual(actions, self.validator.validate('plan', actions))
+        self.assertFalse(self.nova.find_instances.called)
+        self.assertFalse(self.nova.get_service_list.called)
+
+    def test_validate_without_nova_actions(self):
+        actions = self._create_actions(('nop', {'message': 'hello'}),
+                                       ('sleep', {'duration': 0.0}))
+        self.assertEqual(actions, self.validator.validate('plan', actions))
+        self.assertFalse(self.nova.find_instances.called)
+        self.assertFalse(self.nova.get_service_list.called)
@@ -17,8 +17,9 @@
 # limitations under the License.
 #
 import abc
-import mock
+import time
 
+import mock
 import six
 from stevedore import driver
 from stevedore import extension
@@ -56,6 +57,79 @@ class FakeAction(abase.BaseAction):
         return 'fake_action'
 
 
+class SleepingAction(abase.BaseAction):
+    """Stub action recording when it runs"""
+
+    DURATION = 0.1
+
+    def __init__(self, db_action, runs):
+        super(SleepingAction, self).__init__()
+        self.input_parameters = db_action.input_parameters
+        self.runs = runs
+
+    def schema(self):
+        pass
+
+    def postcondition(self):
+        pass
+
+    def precondition(self):
+        pass
+
+    def revert(self):
+        pass
+
+    def execute(self):
+        start = time.time()
+        time.sleep(self.DURATION)
+        self.runs.append((self.resource_id, start, time.time()))
+        return True
+
+
+class SleepingMigrate(SleepingAction):
+    @property
+    def hypervisors(self):
+        return [self.input_parameters['src_hypervisor'],
+                self.input_parameters['dst_hypervisor']]
+
+    @property
+    def exclusive(self):
+        return False
+
+
+class SleepingChangeNovaServiceState(SleepingAction):
+    @property
+    def hypervisors(self):
+        return [self.resource_id]
+
+
+class FakeActionFactory(object):
+    actions = {'migrate': SleepingMigrate,
+               'change_nova_service_state': SleepingChangeNovaServiceState,
+               'sleep': SleepingAction}
+
+    def __init__(self):
+        self.runs = []
+
+    def make_action(self, db_action, osc=None):
+        return self.actions[db_action.action_type](db_action, self.runs)
+
+    def max_overlap(self, resource_ids=None):
+        events = []
+        for resource_id, start, end in self.runs:
+            if resource_ids is None or resource_id in resource_ids:
+                events.append((start, 1))
+                events.append((end, -1))
+        overlap = max_overlap = 0
+        for _, delta in sorted(events):
+            overlap += delta
+            max_overlap = max(max_overlap, overlap)
+        return max_overlap
+
+    def get_run(self, resource_id):
+        return next(run for run in self.runs if run[0] == resource_id)
+
+
 class TestDefaultWorkFlowEngine(base.DbTestCase):
     def setUp(self):
         super(TestDefaultWorkFlowEngine, self).setUp()
@@ -164,3 +238,100 @@ class TestDefaultWorkFlowEngine(base.DbTestCase):
         result = self.engine.execute(actions)
         self.assertEqual(result, False)
         self.check_action_state(actions[0], objects.action.State.FAILED)
+
+
+class TestDefaultWorkFlowEngineConcurrency(base.DbTestCase):
+    def setUp(self):
+        super(TestDefaultWorkFlowEngineConcurrency, self).setUp()
+        self.engine = tflow.DefaultWorkFlowEngine(
+            context=self.context,
+            applier_manager=mock.MagicMock())
+        self.factory = FakeActionFactory()
+        self.engine._action_factory = self.factory
+
+    def create_action(self, action_type, parameters):
+        action = {
+            'uuid': utils.generate_uuid(),
+            'action_plan_id': 0,
+            'action_type': action_type,
+            'input_parameters': parameters,
+            'state': objects.action.State.PENDING,
+            'alarm': None,
+            'next': None,
+        }
+        new_action = objects.Action(self.context, **action)
+        new_action.create(self.context)
+        return new_action
+
+    def create_migration(self, vm, src, dst):
+        return self.create_action('migrate', {'resource_id': vm,
+                                              'src_hypervisor': src,
+                                              'dst_hypervisor': dst})
+
+    def create_change_state(self, hypervisor):
+        return self.create_action('change_nova_service_state',
+                                  {'resource_id': hypervisor,
+                                   'state': 'DISABLED'})
+
+    def test_build_flow(self):
+        actions = [self.create_migration('VM_1', 'Node_1', 'Node_0'),
+                   self.create_migration('VM_2', 'Node_2', 'Node_0'),
+                   self.create_migration('VM_3', 'Node_1', 'Node_3'),
+                   self.create_change_state('Node_1'),
+                   self.create_action('sleep', {'duration': 0.0}),
+                   self.create_migration('VM_4', 'Node_4', 'Node_5')]
+        tasks = [tflow.TaskFlowActionContainer(a, self.engine)
+                 for a in actions]
+        flow = self.engine.build_flow(tasks)
+        links = set((tasks.index(u), tasks.index(v))
+                    for u, v, _ in flow.iter_links())
+        # the migrations run concurrently, the service of Node_1 is
+        # disabled once it has been drained and the sleep waits for all
+        self.assertEqual(set([(0, 3), (2, 3), (0, 4), (1, 4), (2, 4), (3, 4),
+                              (4, 5)]),
+                         links)
+
+    def test_execute_concurrently(self):
+        self.config(max_concurrent_actions=10,
+                    max_concurrent_actions_per_hypervisor=1,
+                    group='watcher_applier')
+        actions = [self.create_migration('VM_%d' % i, 'Node_%d' % i,
+                                         'Node_%d' % (i + 10))
+                   for i in range(6)]
+        actions.append(self.create_change_state('Node_0'))
+
+        start = time.time()
+        self.assertTrue(self.engine.execute(actions))
+        duration = time.time() - start
+
+        self.assertEqual(7, len(self.factory.runs))
+        self.assertEqual(6, self.factory.max_overlap())
+        # 2 steps of 0.1s instead of 7 when run one by one
+        self.assertTrue(duration < 0.6, duration)
+        self.assertTrue(self.factory.get_run('Node_0')[1] >=
+                        self.factory.get_run('VM_0')[2])
+        for action in actions:
+            self.assertEqual(objects.action.State.SUCCEEDED,
+                             objects.Action.get_by_uuid(
+                                 self.context, action.uuid).state)
+
+    def test_execute_max_concurrent_actions(self):
+        self.config(max_concurrent_actions=2, group='watcher_applier')
+        actions = [self.create_migration('VM_%d' % i, 'Node_%d' % i,
+                                         'Node_%d' % (i + 10))
+                   for i in range(4)]
+        self.assertTrue(self.engine.execute(actions))
+        self.assertEqual(2, self.factory.max_overlap())
+
+    def test_execute_max_concurrent_actions_per_hypervisor(self):
+        self.config(max_concurrent_actions=10,
+                    max_concurrent_actions_per_hypervisor=2,
+                    group='watcher_applier')
+        actions = [self.create_migration('VM_%d' % i, 'Node_0',
+                                         'Node_%d' % (i + 10))
+                   for i in range(4)]
+        actions.append(self.create_migration('VM_4', 'Node_1', 'Node_2'))
+        self.assertTrue(self.engine.execute(actions))
+        self.assertEqual(
+            2, self.factory.max_overlap(['VM_0', 'VM_1', 'VM_2', 'VM_3']))
+        self.assertEqual(3, self.factory.max_overlap())
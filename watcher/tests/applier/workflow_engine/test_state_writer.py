@@ -0,0 +1,113 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import time
+
+import mock
+
+from watcher.applier.messaging import event_types
+from watcher.applier.workflow_engine import state_writer
+from watcher.common import utils
+from watcher import objects
+from watcher.tests.db import base
+from watcher.tests.objects import utils as obj_utils
+
+
+class TestActionStateWriter(base.DbTestCase):
+
+    def setUp(self):
+        super(TestActionStateWriter, self).setUp()
+        self.applier_manager = mock.MagicMock()
+        self.actions = [
+            obj_utils.create_test_action(self.context, id=i,
+                                         uuid=utils.generate_uuid())
+            for i in range(1, 4)]
+
+    def get_state(self, action):
+        return objects.Action.get_by_uuid(self.context, action.uuid).state
+
+    @property
+    def published(self):
+        return self.applier_manager.status_topic_handler.publish_event
+
+    def test_coalesce_transitions(self):
+        writer = state_writer.ActionStateWriter(
+            self.context, self.applier_manager, batch_size=10,
+            flush_interval=60)
+        writer.update(self.actions[0].uuid, objects.action.State.ONGOING)
+        writer.update(self.actions[1].uuid, objects.action.State.ONGOING)
+        writer.update(self.actions[0].uuid, objects.action.State.SUCCEEDED)
+        self.assertEqual(objects.action.State.PENDING,
+                         self.get_state(self.actions[0]))
+
+        with mock.patch.object(objects.Action, 'update_states',
+                               wraps=objects.Action.update_states) as m_upd:
+            writer.flush()
+            self.assertEqual(1, m_upd.call_count)
+        self.assertEqual(objects.action.State.SUCCEEDED,
+                         self.get_state(self.actions[0]))
+        self.assertEqual(objects.action.State.ONGOING,
+                         self.get_state(self.actions[1]))
+        self.assertEqual(objects.action.State.PENDING,
+                         self.get_state(self.actions[2]))
+        self.published.assert_called_once_with(
+            event_types.EventTypes.LAUNCH_ACTIONS.name,
+            {'actions': [
+                {'action_uuid': self.actions[1].uuid,
+                 'action_state': objects.action.State.ONGOING},
+                {'action_uuid': self.actions[0].uuid,
+                 'action_state': objects.action.State.SUCCEEDED}]})
+
+        # nothing left to write
+        writer.flush()
+        self.assertEqual(1, self.published.call_count)
+
+    def test_flush_on_batch_size(self):
+        writer = state_writer.ActionStateWriter(
+            self.context, self.applier_manager, batch_size=2,
+            flush_interval=60)
+        writer.update(self.actions[0].uuid, objects.action.State.ONGOING)
+        self.assertFalse(self.published.called)
+        writer.update(self.actions[1].uuid, objects.action.State.ONGOING)
+        self.assertEqual(1, self.published.call_count)
+        self.assertEqual(objects.action.State.ONGOING,
+                         self.get_state(self.actions[1]))
+
+    def test_flush_on_interval(self):
+        writer = state_writer.ActionStateWriter(
+            self.context, self.applier_manager, batch_size=10,
+            flush_interval=0.05)
+        writer.update(self.actions[0].uuid, objects.action.State.FAILED)
+        for _ in range(100):
+            if self.published.called:
+                break
+            time.sleep(0.01)
+        self.assertEqual(1, self.published.call_count)
+        self.assertEqual(objects.action.State.FAILED,
+                         self.get_state(self.actions[0]))
+
+    def test_flush_failure_keeps_states(self):
+        writer = state_writer.ActionStateWriter(
+            self.context, self.applier_manager, batch_size=10,
+            flush_interval=60)
+        writer.update(self.actions[0].uuid, objects.action.State.ONGOING)
+        with mock.patch.object(objects.Action, 'update_states',
+                               side_effect=ValueError('db is down')):
+            self.assertRaises(ValueError, writer.flush)
+        self.assertFalse(self.published.called)
+
+        writer.flush()
+        self.assertEqual(objects.action.State.ONGOING,
+                         self.get_state(self.actions[0]))
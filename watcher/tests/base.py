@@ -26,6 +26,7 @@ import pecan
 from pecan import testing
 import testscenarios
 
+from watcher.common import clients
 from watcher.common import context as watcher_context
 from watcher.objects import base as objects_base
 from watcher.tests import conf_fixture
@@ -42,6 +43,10 @@ class BaseTestCase(testscenarios.WithScenarios, base.BaseTestCase):
     def setUp(self):
         super(BaseTestCase, self).setUp()
         self.addCleanup(cfg.CONF.reset)
+        # each test gets its own process-wide OpenStack clients
+        p_clients = mock.patch.object(clients, '_CLIENTS', None)
+        p_clients.start()
+        self.addCleanup(p_clients.stop)
 
 
 class TestCase(BaseTestCase):
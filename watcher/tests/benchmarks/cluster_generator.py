@@ -0,0 +1,109 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Synthetic cluster data models used by the benchmarks"""
+
+import bisect
+import random
+
+from watcher.decision_engine.model import hypervisor
+from watcher.decision_engine.model import hypervisor_state
+from watcher.decision_engine.model import model_root
+from watcher.decision_engine.model import resource
+from watcher.decision_engine.model import vm as modelvm
+from watcher.decision_engine.model import vm_state
+
+# (vcpus, ram in MB, disk in GB)
+FLAVORS = [(1, 512, 1), (1, 2048, 20), (2, 4096, 40), (4, 8192, 80),
+           (8, 16384, 160)]
+
+# (cores, ram in MB, disk in GB)
+HYPERVISOR_CAPACITY = (40, 131072, 2048)
+
+
+def _flavor_picker(rand, flavor_mix):
+    if flavor_mix is None:
+        return lambda: rand.choice(FLAVORS)
+
+    flavors = [flavor for flavor, weight in flavor_mix]
+    cumulated_weights = []
+    total = 0
+    for flavor, weight in flavor_mix:
+        total += weight
+        cumulated_weights.append(total)
+    return lambda: flavors[bisect.bisect_right(cumulated_weights,
+                                               rand.random() * total)]
+
+
+def generate_cluster(num_vms, vms_per_hypervisor=20, seed=0,
+                     num_hypervisors=None, flavor_mix=None,
+                     hypervisor_capacity=HYPERVISOR_CAPACITY):
+    """Build a cluster of num_vms VMs spread over hypervisors
+
+    Each VM gets a random flavor and is placed on a random hypervisor.
+
+    :param num_vms: the number of VMs
+    :param vms_per_hypervisor: the average number of VMs of a hypervisor,
+                               used when num_hypervisors is not given
+    :param seed: the seed of the random generator
+    :param num_hypervisors: the number of hypervisors
+    :param flavor_mix: list of ((vcpus, ram, disk), weight) to pick the
+                       flavors from, by default all the FLAVORS are
+                       equally likely
+    :param hypervisor_capacity: (cores, ram, disk) of every hypervisor
+    """
+    rand = random.Random(seed)
+    pick_flavor = _flavor_picker(rand, flavor_mix)
+    model = model_root.ModelRoot()
+    mem = resource.Resource(resource.ResourceType.memory)
+    num_cores = resource.Resource(resource.ResourceType.cpu_cores)
+    disk = resource.Resource(resource.ResourceType.disk)
+    disk_capacity = resource.Resource(resource.ResourceType.disk_capacity)
+    for r in (mem, num_cores, disk, disk_capacity):
+        model.create_resource(r)
+
+    hypervisors = []
+    if num_hypervisors is None:
+        num_hypervisors = max(1, num_vms // vms_per_hypervisor)
+    cores, ram, disk_gb = hypervisor_capacity
+    for i in range(num_hypervisors):
+        node = hypervisor.Hypervisor()
+        node.uuid = "Node_%d" % i
+        node.hostname = "hostname_%d" % i
+        mem.set_capacity(node, ram)
+        num_cores.set_capacity(node, cores)
+        disk.set_capacity(node, disk_gb)
+        disk_capacity.set_capacity(node, disk_gb)
+        model.add_hypervisor(node)
+        hypervisors.append(node)
+
+    for i in range(num_vms):
+        vm = modelvm.VM()
+        vm.uuid = "VM_%d" % i
+        vcpus, ram, root_gb = pick_flavor()
+        mem.set_capacity(vm, ram)
+        num_cores.set_capacity(vm, vcpus)
+        disk.set_capacity(vm, root_gb)
+        model.add_vm(vm)
+        model.get_mapping().map(rand.choice(hypervisors), vm)
+    return model
+
+
+def prepare_for_smart_strategy(model):
+    """Use the types of states compared by the smart strategy"""
+    for vm in model.get_all_vms().values():
+        vm.state = vm_state.VMState.ACTIVE
+    for node in model.get_all_hypervisors().values():
+        node.state = hypervisor_state.HypervisorState.ONLINE.value
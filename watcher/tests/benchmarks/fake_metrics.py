@@ -0,0 +1,107 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Synthetic cluster history used by the benchmarks"""
+
+import collections
+import random
+
+from watcher.metrics_engine.cluster_history import api
+
+# (min, max) of the values returned for each meter
+METER_RANGES = {
+    'cpu_util': (0.0, 100.0),
+    'compute.node.cpu.percent': (0.0, 100.0),
+    'hardware.ipmi.node.outlet_temperature': (20.0, 40.0),
+    'memory.usage': (256.0, 8192.0),
+    'memory': (512.0, 16384.0),
+    'disk.root.size': (1.0, 160.0),
+}
+
+
+def uniform():
+    """Values spread evenly over the range of the meter"""
+    return lambda rand: rand.random()
+
+
+def normal(mean, stddev):
+    """Values around a fraction of the range of the meter"""
+    return lambda rand: min(1.0, max(0.0, rand.gauss(mean, stddev)))
+
+
+def beta(alpha, beta):
+    """Values following a beta law, e.g. beta(2, 5) for lightly loaded"""
+    return lambda rand: rand.betavariate(alpha, beta)
+
+
+DISTRIBUTIONS = {
+    'uniform': uniform,
+    'normal': normal,
+    'beta': beta,
+}
+
+
+def parse_distribution(spec):
+    """Build a distribution from 'name[:param[:param]]', e.g. 'beta:2:5'"""
+    name, _, params = spec.partition(':')
+    params = [float(param) for param in params.split(':') if param]
+    return DISTRIBUTIONS[name](*params)
+
+
+class FakeClusterHistory(api.BaseClusterHistory):
+    """Cluster history returning a stable random value per resource
+
+    The value of a (resource, meter) pair only depends on the seed, so
+    that several runs of a strategy see the same metrics. The values are
+    drawn from a distribution over [0, 1] scaled to the range of the
+    meter, uniform unless given in distributions.
+    """
+
+    def __init__(self, seed=0, distributions=None):
+        super(FakeClusterHistory, self).__init__()
+        self.seed = seed
+        self.distributions = distributions or {}
+        # number of queries, as they would be sent to Ceilometer
+        self.requests = 0
+        # number of calls of each method
+        self.calls = collections.Counter()
+
+    def _value(self, resource_id, meter_name):
+        low, high = METER_RANGES.get(meter_name, (0.0, 100.0))
+        distribution = self.distributions.get(meter_name, uniform())
+        rand = random.Random("%s:%s:%s" % (self.seed, resource_id,
+                                           meter_name))
+        return low + (high - low) * distribution(rand)
+
+    def statistic_aggregation(self, resource_id, meter_name, period,
+                              aggregate='avg'):
+        self.calls['statistic_aggregation'] += 1
+        self.requests += 1
+        return self._value(resource_id, meter_name)
+
+    def statistic_aggregation_batch(self, resource_ids, meter_names, period,
+                                    aggregate='avg'):
+        self.calls['statistic_aggregation_batch'] += 1
+        # a single query per meter, as done by Ceilometer
+        self.requests += len(meter_names)
+        return dict(((resource_id, meter_name),
+                     self._value(resource_id, meter_name))
+                    for resource_id in resource_ids
+                    for meter_name in meter_names)
+
+    def get_last_sample_values(self, resource_id, meter_name, limit=1):
+        self.calls['get_last_sample_values'] += 1
+        self.requests += 1
+        return [self._value(resource_id, meter_name)]
@@ -0,0 +1,195 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Latency of the pages of the action lists against SQLite
+
+Synthetic actions, grouped in action plans, are written in a SQLite
+database. The actions of one action plan are then listed page by page, as
+the API does, sorted by id and by state:
+
+- oslo_db: with oslo_db.paginate_query and without the list indexes, as
+  it was done before;
+- keyset: with the keyset pagination of the SQLAlchemy backend and the
+  list indexes.
+
+The time taken by the pages found at growing depths of the list, and by
+the whole list, are printed as JSON.
+
+Usage: python -m watcher.tests.benchmarks.list_pagination --help
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from oslo_config import cfg
+from oslo_db.sqlalchemy import utils as db_utils
+
+from watcher.common import utils
+from watcher.db.sqlalchemy import api as sqla_api
+from watcher.db.sqlalchemy import models
+
+CONF = cfg.CONF
+
+MODES = ['oslo_db', 'keyset']
+STATES = ['PENDING', 'ONGOING', 'SUCCEEDED', 'FAILED', 'CANCELLED']
+INSERT_BATCH_SIZE = 10000
+
+
+def _populate(engine, num_actions, plan_size):
+    now = datetime.datetime.utcnow()
+    common = {'created_at': now, 'deleted': 0}
+    engine.execute(models.AuditTemplate.__table__.insert(),
+                   dict(common, id=1, uuid=utils.generate_uuid(),
+                        name='bench', goal='DUMMY', extra={}))
+    engine.execute(models.Audit.__table__.insert(),
+                   dict(common, id=1, uuid=utils.generate_uuid(),
+                        type='ONESHOT', state='SUCCEEDED',
+                        audit_template_id=1))
+    num_plans = (num_actions + plan_size - 1) // plan_size
+    engine.execute(models.ActionPlan.__table__.insert(),
+                   [dict(common, id=plan_id, uuid=utils.generate_uuid(),
+                         audit_id=1, state='SUCCEEDED')
+                    for plan_id in range(1, num_plans + 1)])
+
+    # the actions of the plans are interleaved as if they were created
+    # by concurrent audits
+    rows = []
+    for action_id in range(1, num_actions + 1):
+        rows.append(dict(common, id=action_id, uuid=utils.generate_uuid(),
+                         action_plan_id=action_id % num_plans + 1,
+                         action_type='nop',
+                         input_parameters={'message': 'bench'},
+                         state=random.choice(STATES)))
+        if len(rows) == INSERT_BATCH_SIZE:
+            engine.execute(models.Action.__table__.insert(), rows)
+            rows = []
+    if rows:
+        engine.execute(models.Action.__table__.insert(), rows)
+    return num_plans
+
+
+def _paginate_oslo_db(query, limit, marker, sort_key, sort_dir):
+    sort_keys = ['id']
+    if sort_key and sort_key not in sort_keys:
+        sort_keys.insert(0, sort_key)
+    return db_utils.paginate_query(query, models.Action, limit, sort_keys,
+                                   marker=marker, sort_dir=sort_dir).all()
+
+
+def _paginate_keyset(query, limit, marker, sort_key, sort_dir):
+    return sqla_api._paginate_query(models.Action, limit, marker, sort_key,
+                                    sort_dir, query)
+
+
+def _list_query(action_plan_id):
+    return sqla_api.model_query(models.Action).filter_by(
+        action_plan_id=action_plan_id).filter(
+        ~(models.Action.state == 'DELETED'))
+
+
+def _time_list(paginate, action_plan_id, limit, sort_key, sort_dir, depths):
+    """Time the pages starting at the given depths and the whole list"""
+    ordered = sorted(
+        sqla_api.model_query(models.Action).filter_by(
+            action_plan_id=action_plan_id).all(),
+        key=lambda action: (getattr(action, sort_key or 'id'), action.id),
+        reverse=sort_dir == 'desc')
+    pages = {}
+    for depth in depths:
+        marker = ordered[depth - 1] if depth else None
+        start = time.time()
+        paginate(_list_query(action_plan_id), limit, marker, sort_key,
+                 sort_dir)
+        pages[depth] = time.time() - start
+
+    start = time.time()
+    marker = None
+    while True:
+        page = paginate(_list_query(action_plan_id), limit, marker,
+                        sort_key, sort_dir)
+        if not page:
+            break
+        marker = page[-1]
+    return {'pages': pages, 'whole_list': time.time() - start}
+
+
+def run(num_actions, plan_size, limit, modes):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        CONF.set_override('connection',
+                          'sqlite:///%s' % os.path.join(tmp_dir, 'bench.db'),
+                          group='database')
+        engine = sqla_api.get_engine()
+        models.Base.metadata.create_all(engine)
+        start = time.time()
+        num_plans = _populate(engine, num_actions, plan_size)
+        results = [{'actions': num_actions, 'action_plans': num_plans,
+                    'populate_time': time.time() - start}]
+
+        depths = [depth for depth in (0, 100, 1000, plan_size // 2,
+                                      plan_size - limit)
+                  if 0 <= depth < plan_size]
+        indexes = models.Action.__table__.indexes
+        for mode in modes:
+            if mode == 'oslo_db':
+                paginate = _paginate_oslo_db
+                for index in indexes:
+                    index.drop(engine)
+            else:
+                paginate = _paginate_keyset
+            for sort_key in (None, 'state'):
+                for sort_dir in ('asc', 'desc'):
+                    result = _time_list(paginate, num_plans // 2, limit,
+                                        sort_key, sort_dir, depths)
+                    result.update({'mode': mode, 'sort_key': sort_key,
+                                   'sort_dir': sort_dir})
+                    results.append(result)
+            if mode == 'oslo_db':
+                for index in indexes:
+                    index.create(engine)
+        return results
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Time the pages of the action lists in SQLite')
+    parser.add_argument('--mode', action='append', dest='modes',
+                        choices=MODES, help='all of them by default')
+    parser.add_argument('--actions', type=int, default=1000000)
+    parser.add_argument('--plan-size', type=int, default=10000,
+                        help='number of actions of an action plan')
+    parser.add_argument('--limit', type=int, default=100,
+                        help='number of actions of a page')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    random.seed(args.seed)
+    print(json.dumps(run(args.actions, args.plan_size, args.limit,
+                         args.modes or MODES), indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Latency and Nova API load of the migration completion waits
+
+Concurrent live migrations are run through the NovaHelper against a fake
+novaclient, whose migrations last a random duration. The end of the
+migrations is detected:
+
+- polling: by polling the API every second, as it was done before;
+- backoff: by polling with exponentially growing intervals;
+- notifications: by the notifications sent on a fake transport, with the
+  backoff polling as fallback.
+
+For each mode, the number of API calls and the delay between the end of
+the migrations and the return of the NovaHelper are printed as JSON.
+
+Usage: python -m watcher.tests.benchmarks.migration_waiter --help
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import random
+import sys
+import time
+
+import eventlet
+# as in the applier service
+eventlet.monkey_patch()
+
+import mock  # noqa
+from oslo_config import cfg  # noqa
+import oslo_messaging as om  # noqa
+
+from watcher.common import instance_waiter  # noqa
+from watcher.common import nova_helper  # noqa
+
+CONF = cfg.CONF
+
+MODES = ['polling', 'backoff', 'notifications']
+
+
+class FakeServer(object):
+    def __init__(self, nova, uuid, host):
+        self.nova = nova
+        self.id = uuid
+        setattr(self, 'OS-EXT-SRV-ATTR:host', host)
+
+    def live_migrate(self, host, block_migration, disk_over_commit):
+        self.nova.start_migration(self.id, host)
+
+
+class FakeNova(object):
+    """novaclient whose live migrations last a random duration"""
+
+    def __init__(self, num_servers, min_duration, max_duration, seed,
+                 notifier=None):
+        self.servers = self
+        self.calls = collections.Counter()
+        self.hosts = dict(('VM_%d' % i, 'Node_%d' % i)
+                          for i in range(num_servers))
+        self.completed = {}
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.notifier = notifier
+        self._random = random.Random(seed)
+
+    def list(self, detailed=True, search_opts=None):
+        self.calls['list'] += 1
+        return [FakeServer(self, uuid, host)
+                for uuid, host in self.hosts.items()]
+
+    def get(self, uuid):
+        self.calls['get'] += 1
+        return FakeServer(self, uuid, self.hosts[uuid])
+
+    def start_migration(self, uuid, host):
+        duration = self._random.uniform(self.min_duration, self.max_duration)
+        eventlet.spawn_after(duration, self._complete_migration, uuid, host)
+
+    def _complete_migration(self, uuid, host):
+        self.hosts[uuid] = host
+        self.completed[uuid] = time.time()
+        if self.notifier is not None:
+            self.notifier.info(
+                {}, 'instance.live_migration_post.end',
+                {'nova_object.name': 'InstanceActionPayload',
+                 'nova_object.data': {'uuid': uuid, 'host': host}})
+
+
+def run_mode(mode, num_migrations, min_duration, max_duration, seed):
+    if mode == 'polling':
+        waiter = instance_waiter.InstanceWaiter(
+            initial_interval=1, max_interval=1, jitter=0)
+    else:
+        waiter = instance_waiter.InstanceWaiter()
+
+    notifier = None
+    if mode == 'notifications':
+        transport = om.get_transport(CONF, url='fake://')
+        waiter.start(transport)
+        notifier = om.Notifier(transport,
+                               publisher_id='nova-compute:fake',
+                               driver='messaging',
+                               topics=CONF.watcher_instance_waiter.
+                               notification_topics)
+
+    nova = FakeNova(num_migrations, min_duration, max_duration, seed,
+                    notifier)
+    osc = mock.MagicMock()
+    osc.nova.return_value = nova
+    helper = nova_helper.NovaHelper(osc=osc, waiter=waiter)
+    returned = {}
+
+    def migrate(uuid):
+        helper.live_migrate_instance(uuid, 'Node_dst')
+        returned[uuid] = time.time()
+
+    start = time.time()
+    pool = eventlet.GreenPool(num_migrations)
+    for uuid in sorted(nova.hosts):
+        pool.spawn(migrate, uuid)
+    pool.waitall()
+    wall_time = time.time() - start
+    waiter.stop()
+
+    delays = sorted(returned[uuid] - nova.completed[uuid]
+                    for uuid in returned)
+    return {'mode': mode,
+            'migrations': num_migrations,
+            'wall_time': wall_time,
+            'api_calls': dict(nova.calls),
+            'mean_delay': sum(delays) / len(delays),
+            'max_delay': delays[-1],
+            'notified': waiter.notified}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compare the ways to wait for the live migrations')
+    parser.add_argument('--mode', action='append', dest='modes',
+                        choices=MODES, help='all of them by default')
+    parser.add_argument('--migrations', type=int, default=50)
+    parser.add_argument('--min-duration', type=float, default=5.0,
+                        help='minimum duration of a migration, in seconds')
+    parser.add_argument('--max-duration', type=float, default=30.0,
+                        help='maximum duration of a migration, in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    random.seed(args.seed)
+    results = [run_mode(mode, args.migrations, args.min_duration,
+                        args.max_duration, args.seed)
+               for mode in args.modes or MODES]
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
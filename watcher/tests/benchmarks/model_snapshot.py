@@ -0,0 +1,71 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Compare ModelRoot.fork with copy.deepcopy
+
+Usage: python -m watcher.tests.benchmarks.model_snapshot [NUM_VMS ...]
+"""
+
+from __future__ import print_function
+
+import copy
+import json
+import sys
+import timeit
+
+import eventlet
+# as in the decision engine service, otherwise deepcopy cannot copy the
+# native lock of the Mapping
+eventlet.monkey_patch()
+
+from watcher.tests.benchmarks import cluster_generator  # noqa
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+
+
+def _snapshot_and_migrate(model, snapshot):
+    """Take a snapshot and move a VM in it, as a strategy would"""
+    fork = snapshot(model)
+    mapping = fork.get_mapping()
+    vm_uuid, node_uuid = next(iter(mapping.get_mapping_vm().items()))
+    src = fork.get_hypervisor_from_id(node_uuid)
+    dst = next(h for h in fork.get_all_hypervisors().values() if h != src)
+    mapping.migrate_vm(fork.get_vm_from_id(vm_uuid), src, dst)
+
+
+def run(sizes, repeat=3):
+    results = []
+    for num_vms in sizes:
+        model = cluster_generator.generate_cluster(num_vms)
+        result = {'vms': num_vms,
+                  'hypervisors': len(model.get_all_hypervisors())}
+        for name, snapshot in (('deepcopy', copy.deepcopy),
+                               ('fork', lambda m: m.fork())):
+            result[name] = min(timeit.repeat(
+                lambda: _snapshot_and_migrate(model, snapshot),
+                number=1, repeat=repeat))
+        result['speedup'] = result['deepcopy'] / result['fork']
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(arg) for arg in argv] or DEFAULT_SIZES
+    print(json.dumps(run(sizes), indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Latency of the action plan persistence against SQLite
+
+Action plans of growing size are written by the DefaultPlanner, in a
+single transaction, and by creating and linking the actions one by one
+as it was done before. The time taken and the number of SQL statements
+are printed as JSON.
+
+Usage: python -m watcher.tests.benchmarks.planner_persistence [SIZE ...]
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from oslo_config import cfg
+import sqlalchemy
+
+from watcher.common import context as watcher_context
+from watcher.common import utils
+from watcher.db.sqlalchemy import api as sqla_api
+from watcher.db.sqlalchemy import models
+from watcher.decision_engine.planner import default
+from watcher.decision_engine.solution import default as dsol
+from watcher import objects
+
+CONF = cfg.CONF
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+
+
+def _schedule_one_by_one(planner, context, audit_id, solution):
+    """Previous DefaultPlanner.schedule, writing one action at a time"""
+    action_plan = planner._create_action_plan(context, audit_id)
+    action_plan.save()
+    scheduled = sorted(
+        ((planner.priorities[a['action_type']],
+          planner.create_action(action_plan.id, a['action_type'],
+                                a['input_parameters']))
+         for a in solution.actions), key=lambda x: x[0])
+    parent_action = None
+    for _, values in scheduled:
+        new_action = objects.Action(context, **values)
+        new_action.create(context)
+        new_action.save()
+        if parent_action is None:
+            action_plan.first_action_id = new_action.id
+            action_plan.save()
+        else:
+            parent_action.next = new_action.id
+            parent_action.save()
+        parent_action = new_action
+    return action_plan
+
+
+def _build_solution(size):
+    solution = dsol.DefaultSolution()
+    for _ in range(size):
+        solution.add_action(action_type='migrate',
+                            resource_id=utils.generate_uuid(),
+                            input_parameters={'src_hypervisor': 'Node_0',
+                                              'dst_hypervisor': 'Node_1'})
+    return solution
+
+
+def run(sizes):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        CONF.set_override('connection',
+                          'sqlite:///%s' % os.path.join(tmp_dir, 'bench.db'),
+                          group='database')
+        engine = sqla_api.get_engine()
+        models.Base.metadata.create_all(engine)
+
+        statements = []
+        sqlalchemy.event.listen(
+            engine, 'before_cursor_execute',
+            lambda *args: statements.append(1))
+
+        context = watcher_context.make_context(is_admin=True)
+        connection = sqla_api.get_backend()
+        audit_template = connection.create_audit_template(
+            {'uuid': utils.generate_uuid(), 'name': 'bench',
+             'goal': 'DUMMY'})
+        audit = connection.create_audit(
+            {'uuid': utils.generate_uuid(), 'type': 'ONESHOT',
+             'state': 'SUCCEEDED', 'audit_template_id': audit_template.id})
+
+        planner = default.DefaultPlanner()
+        results = []
+        for size in sizes:
+            solution = _build_solution(size)
+            for name, schedule in (('one_by_one', _schedule_one_by_one),
+                                   ('bulk', default.DefaultPlanner.schedule)):
+                del statements[:]
+                start = time.time()
+                schedule(planner, context, audit.id, solution)
+                results.append({'actions': size, 'mode': name,
+                                'time': time.time() - start,
+                                'statements': len(statements)})
+        return results
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Time the persistence of action plans in SQLite')
+    parser.add_argument('sizes', metavar='NUM_ACTIONS', type=int, nargs='*',
+                        default=DEFAULT_SIZES)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    print(json.dumps(run(args.sizes), indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Scaling of the strategies with the per-hypervisor usage totals
+
+Each strategy is run on clusters of growing size, once reading the usage
+of the hypervisors maintained by the mapping and once summing the VMs of
+a hypervisor each time its usage is read, as it was done before.
+
+Usage: python -m watcher.tests.benchmarks.strategy_scaling [NUM_VMS ...]
+"""
+
+from __future__ import print_function
+
+import contextlib
+import json
+import sys
+import time
+
+import eventlet
+# as in the decision engine service
+eventlet.monkey_patch()
+
+import mock  # noqa
+
+from watcher.decision_engine.model import mapping  # noqa
+from watcher.decision_engine.strategy import strategies  # noqa
+from watcher.tests.benchmarks import cluster_generator  # noqa
+from watcher.tests.benchmarks import fake_metrics  # noqa
+
+DEFAULT_SIZES = [250, 500, 1000]
+
+_get_node_usage_from_id = mapping.Mapping.get_node_usage_from_id
+
+
+def _walk_node_usage(self, node_uuid, key):
+    """Sum the VMs of the hypervisor for every read"""
+    with self.lock:
+        self._usage.pop(str(node_uuid), None)
+    return _get_node_usage_from_id(self, node_uuid, key)
+
+
+@contextlib.contextmanager
+def _walking_usage():
+    with mock.patch.object(mapping.Mapping, 'get_node_usage_from_id',
+                           _walk_node_usage):
+        yield
+
+
+def _execute(strategy):
+    return strategy.execute
+
+
+def _offload(strategy):
+    # the other phases of the smart strategy cannot be run on a random
+    # cluster, the offload phase is the one reading the utilizations
+    def offload(model):
+        strategy.prefetch_vm_metrics(model)
+        strategy.offload_phase(model, {'cpu': 0.6, 'ram': 1.0, 'disk': 1.0})
+        return strategy.solution
+    return offload
+
+
+STRATEGIES = [
+    (strategies.BasicConsolidation, _execute, None),
+    (strategies.OutletTempControl, _execute, None),
+    (strategies.SmartStrategy, _offload,
+     cluster_generator.prepare_for_smart_strategy),
+]
+
+
+def _run_strategy(strategy_cls, get_entry_point, model):
+    strategy = strategy_cls()
+    strategy.ceilometer = fake_metrics.FakeClusterHistory()
+    entry_point = get_entry_point(strategy)
+    start = time.time()
+    solution = entry_point(model.fork())
+    return time.time() - start, len(solution.actions)
+
+
+def run(sizes):
+    results = []
+    for num_vms in sizes:
+        for strategy_cls, get_entry_point, prepare in STRATEGIES:
+            model = cluster_generator.generate_cluster(num_vms)
+            if prepare is not None:
+                prepare(model)
+            result = {'strategy': strategy_cls.__name__, 'vms': num_vms,
+                      'hypervisors': len(model.get_all_hypervisors())}
+            result['totals'], actions = _run_strategy(
+                strategy_cls, get_entry_point, model)
+            with _walking_usage():
+                result['walk'], walk_actions = _run_strategy(
+                    strategy_cls, get_entry_point, model)
+            assert actions == walk_actions
+            result['actions'] = actions
+            result['speedup'] = result['walk'] / result['totals']
+            results.append(result)
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(arg) for arg in argv] or DEFAULT_SIZES
+    print(json.dumps(run(sizes), indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Run every registered strategy on synthetic clusters
+
+Each strategy of the watcher_strategies entry points is executed in a
+child process on the same synthetic cluster, with fake metrics. The
+results (wall time, peak memory, metric calls, number of migrations and
+efficacy) are printed as JSON so that they can be compared across
+commits.
+
+Usage: python -m watcher.tests.benchmarks.strategy_suite --help
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import eventlet
+# as in the decision engine service
+eventlet.monkey_patch()
+
+from watcher.decision_engine.strategy.loading import default  # noqa
+from watcher.tests.benchmarks import cluster_generator  # noqa
+from watcher.tests.benchmarks import fake_metrics  # noqa
+
+DEFAULT_SIZES = [1000, 5000]
+
+# the strategies expecting the model to be prepared
+MODEL_PREPARATIONS = {
+    'smart': cluster_generator.prepare_for_smart_strategy,
+}
+
+
+def _peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run_strategy(strategy_cls, model, seed, distributions):
+    history = fake_metrics.FakeClusterHistory(seed=seed,
+                                              distributions=distributions)
+    strategy = strategy_cls()
+    strategy.ceilometer = history
+    model = model.fork()
+
+    rss_before = _peak_rss_kb()
+    start = time.time()
+    result = {}
+    try:
+        solution = strategy.execute(model)
+    except Exception as exc:
+        result['error'] = "%s: %s" % (type(exc).__name__, exc)
+        solution = None
+    result['wall_time'] = time.time() - start
+    result['peak_rss_kb'] = _peak_rss_kb()
+    result['peak_rss_increase_kb'] = result['peak_rss_kb'] - rss_before
+    result['metric_requests'] = history.requests
+    result['metric_calls'] = dict(history.calls)
+    if solution is not None:
+        result['actions'] = len(solution.actions)
+        result['migrations'] = len([a for a in solution.actions
+                                    if a['action_type'] == 'migrate'])
+        result['efficacy'] = solution.efficacy
+    return result
+
+
+def _run_in_child(strategy_cls, model, seed, distributions):
+    """Run a strategy in a child process to measure its own peak memory"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            result = _run_strategy(strategy_cls, model, seed, distributions)
+            with os.fdopen(write_fd, 'w') as pipe:
+                json.dump(result, pipe, default=str)
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        output = pipe.read()
+    os.waitpid(pid, 0)
+    if not output:
+        return {'error': 'the benchmark process died'}
+    return json.loads(output)
+
+
+def _get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.STDOUT).strip().decode()
+    except Exception:
+        return None
+
+
+def run(sizes, strategy_names=None, num_hypervisors=None,
+        vms_per_hypervisor=20, seed=0, flavor_mix=None, distributions=None,
+        fork=True):
+    strategies = default.DefaultStrategyLoader().list_available()
+    strategy_names = strategy_names or sorted(strategies)
+    run_strategy = _run_in_child if fork else _run_strategy
+    results = []
+    for num_vms in sizes:
+        cluster = None
+        for name in strategy_names:
+            prepare = MODEL_PREPARATIONS.get(name)
+            if cluster is None or prepare is not None:
+                cluster = cluster_generator.generate_cluster(
+                    num_vms, vms_per_hypervisor=vms_per_hypervisor,
+                    seed=seed, num_hypervisors=num_hypervisors,
+                    flavor_mix=flavor_mix)
+            if prepare is not None:
+                prepare(cluster)
+            result = {'strategy': name, 'vms': num_vms,
+                      'hypervisors': len(cluster.get_all_hypervisors())}
+            result.update(run_strategy(strategies[name], cluster, seed,
+                                       distributions))
+            results.append(result)
+            if prepare is not None:
+                # the other strategies get an unprepared cluster
+                cluster = None
+    return {'commit': _get_commit(), 'seed': seed, 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run the strategies on synthetic clusters')
+    parser.add_argument('sizes', metavar='NUM_VMS', type=int, nargs='*',
+                        default=DEFAULT_SIZES,
+                        help='number of VMs of the clusters')
+    parser.add_argument('--strategy', action='append', dest='strategies',
+                        help='strategy to run, all of them by default')
+    parser.add_argument('--hypervisors', type=int,
+                        help='number of hypervisors of the clusters')
+    parser.add_argument('--vms-per-hypervisor', type=int, default=20,
+                        help='average number of VMs of a hypervisor, when '
+                             'the number of hypervisors is not given')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--flavor', action='append', dest='flavors',
+                        metavar='VCPUS:RAM:DISK:WEIGHT',
+                        help='flavor of the VMs and its weight in the mix, '
+                             'the default flavors are equally likely')
+    parser.add_argument('--metric', action='append', default=[],
+                        metavar='METER=DISTRIBUTION',
+                        help='distribution of a meter, among uniform, '
+                             'normal:MEAN:STDDEV and beta:ALPHA:BETA, '
+                             'e.g. cpu_util=beta:2:5')
+    parser.add_argument('--no-fork', action='store_false', dest='fork',
+                        help='run the strategies in this process')
+    parser.add_argument('--output', help='file to write the JSON to')
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    distributions = {}
+    for metric in args.metric:
+        meter_name, _, spec = metric.partition('=')
+        distributions[meter_name] = fake_metrics.parse_distribution(spec)
+
+    flavor_mix = None
+    if args.flavors:
+        flavor_mix = []
+        for flavor in args.flavors:
+            vcpus, ram, disk, weight = [int(v) for v in flavor.split(':')]
+            flavor_mix.append(((vcpus, ram, disk), weight))
+
+    results = run(args.sizes, args.strategies, args.hypervisors,
+                  args.vms_per_hypervisor, args.seed, flavor_mix,
+                  distributions, args.fork)
+    output = json.dumps(results, indent=2, sort_keys=True, default=str)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
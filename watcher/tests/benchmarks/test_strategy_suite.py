@@ -0,0 +1,56 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from watcher.tests import base
+from watcher.tests.benchmarks import cluster_generator
+from watcher.tests.benchmarks import fake_metrics
+from watcher.tests.benchmarks import strategy_suite
+
+
+class TestStrategySuite(base.TestCase):
+
+    def test_generate_cluster(self):
+        model = cluster_generator.generate_cluster(
+            100, num_hypervisors=4, flavor_mix=[((2, 4096, 40), 1)])
+        self.assertEqual(4, len(model.get_all_hypervisors()))
+        self.assertEqual(100, len(model.get_all_vms()))
+        self.assertEqual(set([2]), set(model.get_vms_capacities(
+            'ResourceType.cpu_cores').values()))
+
+    def test_fake_metrics(self):
+        history = fake_metrics.FakeClusterHistory(
+            distributions={'cpu_util': fake_metrics.parse_distribution(
+                'normal:0.5:0')})
+        self.assertEqual(50.0, history.statistic_aggregation(
+            'VM_0', 'cpu_util', '7200'))
+        values = history.statistic_aggregation_batch(
+            ['Node_0', 'Node_1'], ['compute.node.cpu.percent'], '7200')
+        self.assertEqual(values[('Node_0', 'compute.node.cpu.percent')],
+                         history.statistic_aggregation(
+                             'Node_0', 'compute.node.cpu.percent', '7200'))
+        self.assertEqual(3, history.requests)
+        self.assertEqual({'statistic_aggregation': 2,
+                          'statistic_aggregation_batch': 1},
+                         dict(history.calls))
+
+    def test_run(self):
+        results = strategy_suite.run([100], seed=1, fork=False)['results']
+        self.assertEqual(['basic', 'dummy', 'outlet_temp_control', 'smart'],
+                         [result['strategy'] for result in results])
+        for result in results:
+            self.assertEqual(100, result['vms'])
+            self.assertIn('wall_time', result)
+            self.assertIn('peak_rss_kb', result)
+            self.assertIn('metric_requests', result)
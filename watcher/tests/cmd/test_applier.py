@@ -43,9 +43,11 @@ class TestApplier(BaseTestCase):
         super(TestApplier, self).tearDown()
         self.conf._parse_cli_opts = self._parse_cli_opts
 
+    @patch.object(ApplierManager, "resume_action_plans")
     @patch.object(ApplierManager, "connect")
     @patch.object(ApplierManager, "join")
-    def test_run_applier_app(self, m_connect, m_join):
+    def test_run_applier_app(self, m_connect, m_join, m_resume):
         applier.main()
         self.assertEqual(m_connect.call_count, 1)
         self.assertEqual(m_join.call_count, 1)
+        self.assertEqual(m_resume.call_count, 1)
@@ -14,11 +14,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
+
 from mock import Mock
 from mock import patch
 from oslo_config import cfg
 from watcher.cmd import dbmanage
 from watcher.db import migration
+from watcher.db import purge
 from watcher.tests.base import TestCase
 
 
@@ -32,6 +35,7 @@ class TestDBManageRunApp(TestCase):
         ("version", {"command": "version", "expected": "version"}),
         ("create_schema", {"command": "create_schema",
                            "expected": "create_schema"}),
+        ("purge", {"command": "purge", "expected": "purge"}),
         ("no_param", {"command": None, "expected": "upgrade"}),
     )
 
@@ -98,3 +102,28 @@ class TestDBManageRunCommand(TestCase):
         dbmanage.DBCommand.version()
 
         self.assertEqual(m_version.call_count, 1)
+
+    @patch.object(purge, "purge")
+    def test_run_db_purge(self, m_purge):
+        cfg.CONF.register_opt(cfg.IntOpt("age"), group="command")
+        cfg.CONF.register_opt(cfg.IntOpt("batch_size"), group="command")
+        cfg.CONF.register_opt(cfg.IntOpt("max_rows"), group="command")
+        cfg.CONF.register_opt(cfg.BoolOpt("dry_run"), group="command")
+        cfg.CONF.set_default("age", 90, group="command")
+        cfg.CONF.set_default("batch_size", 100, group="command")
+        cfg.CONF.set_default("dry_run", True, group="command")
+        m_purge.return_value = dict((table, 0) for table in purge.TABLES)
+        dbmanage.DBCommand.purge()
+
+        m_purge.assert_called_once_with(90, 100, None, True)
+
+    def test_purge_parser_rejects_invalid_limits(self):
+        parser = argparse.ArgumentParser()
+        dbmanage.add_command_parsers(parser.add_subparsers())
+        args = parser.parse_args(['purge', '--batch-size', '1',
+                                  '--max-rows', '0'])
+        self.assertEqual((1, 0), (args.batch_size, args.max_rows))
+        for argv in (['--batch-size', '0'], ['--max-rows', '-1']):
+            with patch('sys.stderr'):
+                self.assertRaises(SystemExit, parser.parse_args,
+                                  ['purge'] + argv)
@@ -0,0 +1,223 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import threading
+
+import eventlet
+import mock
+from oslo_config import cfg
+import oslo_messaging as om
+
+from watcher.decision_engine.model import resource
+from watcher.metrics_engine.cluster_model_collector import incremental
+from watcher.metrics_engine.cluster_model_collector import manager
+from watcher.tests import base
+from watcher.tests.decision_engine.strategy.strategies \
+    import faker_cluster_state
+
+CONF = cfg.CONF
+
+
+def instance_payload(uuid, host, vcpus=2, memory_mb=512, root_gb=5):
+    return {
+        'nova_object.name': 'InstanceActionPayload',
+        'nova_object.data': {
+            'uuid': uuid,
+            'host': host,
+            'state': 'active',
+            'flavor': {
+                'nova_object.name': 'FlavorPayload',
+                'nova_object.data': {'vcpus': vcpus,
+                                     'memory_mb': memory_mb,
+                                     'root_gb': root_gb}}}}
+
+
+def service_payload(host, disabled=False, forced_down=False):
+    return {
+        'nova_object.name': 'ServiceStatusPayload',
+        'nova_object.data': {'host': host,
+                             'binary': 'nova-compute',
+                             'disabled': disabled,
+                             'forced_down': forced_down}}
+
+
+class TestIncrementalClusterModelCollector(base.TestCase):
+
+    def setUp(self):
+        super(TestIncrementalClusterModelCollector, self).setUp()
+        self.fake_collector = faker_cluster_state.FakerModelCollector()
+        self.fake_collector.get_latest_cluster_data_model = mock.Mock(
+            side_effect=self.fake_collector.generate_scenario_1)
+        self.collector = incremental.IncrementalClusterModelCollector(
+            self.fake_collector)
+        # seed the model
+        self.collector.get_latest_cluster_data_model()
+
+    def notify(self, event_type, payload,
+               publisher_id='nova-compute:Node_1'):
+        return self.collector.handler.info(
+            {}, publisher_id, event_type, payload, {})
+
+    def test_seeded_once(self):
+        model = self.collector.get_latest_cluster_data_model()
+        self.assertEqual(
+            1, self.fake_collector.get_latest_cluster_data_model.call_count)
+        # audits are given a copy of the model
+        model.get_mapping().unmap_from_id("Node_0", "VM_0")
+        self.assertIn("VM_0", self.collector.get_latest_cluster_data_model(
+        ).get_mapping().get_node_vms_from_id("Node_0"))
+
+    def test_instance_create(self):
+        self.assertEqual(om.NotificationResult.HANDLED, self.notify(
+            'instance.create.end', instance_payload("VM_new", "Node_1")))
+
+        model = self.collector.get_latest_cluster_data_model()
+        vm = model.get_vm_from_id("VM_new")
+        self.assertEqual("Node_1",
+                         model.get_mapping().get_node_from_vm(vm).uuid)
+        self.assertEqual(2, model.get_resource_from_id(
+            resource.ResourceType.cpu_cores).get_capacity(vm))
+        self.assertEqual(512, model.get_resource_from_id(
+            resource.ResourceType.memory).get_capacity(vm))
+        self.assertEqual(
+            1, self.fake_collector.get_latest_cluster_data_model.call_count)
+
+    def test_instance_delete(self):
+        self.notify('instance.delete.end', instance_payload("VM_0", "Node_0"))
+
+        model = self.collector.get_latest_cluster_data_model()
+        self.assertNotIn("VM_0", model.get_all_vms())
+        self.assertNotIn(
+            "VM_0", model.get_mapping().get_node_vms_from_id("Node_0"))
+
+    def test_instance_live_migration(self):
+        self.notify('instance.live_migration_post_dest.end',
+                    instance_payload("VM_0", "Node_2"))
+
+        model = self.collector.get_latest_cluster_data_model()
+        self.assertEqual("Node_2", model.get_mapping().get_node_from_vm_id(
+            "VM_0").uuid)
+        self.assertNotIn(
+            "VM_0", model.get_mapping().get_node_vms_from_id("Node_0"))
+
+    def test_service_update(self):
+        self.notify('service.update',
+                    service_payload("Node_1", disabled=True))
+
+        model = self.collector.get_latest_cluster_data_model()
+        self.assertEqual('disabled',
+                         model.get_hypervisor_from_id("Node_1").status)
+
+    def test_unknown_host_triggers_synchronization(self):
+        self.notify('instance.create.end',
+                    instance_payload("VM_new", "Node_unknown"))
+
+        model = self.collector.get_latest_cluster_data_model()
+        self.assertNotIn("VM_new", model.get_all_vms())
+        self.assertEqual(
+            2, self.fake_collector.get_latest_cluster_data_model.call_count)
+
+    def test_notifications_during_synchronization(self):
+        def crawl():
+            # the notifications received while Nova is crawled
+            self.notify('instance.create.end',
+                        instance_payload("VM_new", "Node_1"))
+            self.notify('instance.delete.end',
+                        instance_payload("VM_0", "Node_0"))
+            return self.fake_collector.generate_scenario_1()
+
+        self.fake_collector.get_latest_cluster_data_model.side_effect = crawl
+        self.collector.synchronize()
+
+        model = self.collector.get_latest_cluster_data_model()
+        self.assertEqual("Node_1", model.get_mapping().get_node_from_vm_id(
+            "VM_new").uuid)
+        self.assertNotIn("VM_0", model.get_all_vms())
+        self.assertEqual([], self.collector._recordings)
+
+    def test_notifications_not_blocked_by_synchronization(self):
+        self.notify('instance.create.end',
+                    instance_payload("VM_new", "Node_unknown"))
+        notified = []
+
+        def crawl():
+            # the listener runs in another thread
+            thread = threading.Thread(target=lambda: notified.append(
+                self.notify('instance.delete.end',
+                            instance_payload("VM_1", "Node_0"))))
+            thread.start()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            return self.fake_collector.generate_scenario_1()
+
+        self.fake_collector.get_latest_cluster_data_model.side_effect = crawl
+        model = self.collector.get_latest_cluster_data_model()
+        self.assertEqual([om.NotificationResult.HANDLED], notified)
+        self.assertNotIn("VM_1", model.get_all_vms())
+
+    def test_failed_synchronization(self):
+        self.fake_collector.get_latest_cluster_data_model.side_effect = (
+            RuntimeError)
+        self.assertRaises(RuntimeError, self.collector.synchronize)
+        self.assertEqual([], self.collector._recordings)
+        self.assertIn("VM_0", self.collector.get_latest_cluster_data_model(
+        ).get_all_vms())
+
+    def test_other_publisher_ignored(self):
+        self.assertIsNone(self.notify(
+            'instance.delete.end', instance_payload("VM_0", "Node_0"),
+            publisher_id='glance-api:host'))
+        model = self.collector.get_latest_cluster_data_model()
+        self.assertIn("VM_0", model.get_all_vms())
+
+    def test_fake_transport(self):
+        self.config(rpc_backend='fake')
+        self.config(reconciliation_interval=3600,
+                    group='watcher_cluster_model')
+        transport = om.get_transport(CONF)
+        self.collector.start(transport)
+        self.addCleanup(self.collector.stop)
+
+        notifier = om.Notifier(transport,
+                               publisher_id='nova-compute:Node_1',
+                               driver='messaging',
+                               topics=['versioned_notifications'])
+        notifier.info({}, 'instance.create.end',
+                      instance_payload("VM_new", "Node_1"))
+
+        for _ in range(100):
+            if "VM_new" in self.collector.get_latest_cluster_data_model(
+            ).get_all_vms():
+                break
+            eventlet.sleep(0.01)
+        self.assertIn("VM_new",
+                      self.collector.get_latest_cluster_data_model(
+                      ).get_all_vms())
+
+
+class TestCollectorManager(base.TestCase):
+
+    @mock.patch.object(incremental.IncrementalClusterModelCollector, 'start')
+    @mock.patch.object(manager.CollectorManager, '_incremental_collector',
+                       None)
+    def test_incremental_collector_shared(self, m_start):
+        self.config(use_notifications=True, group='watcher_cluster_model')
+        collector = manager.CollectorManager().get_cluster_model_collector()
+        self.assertIsInstance(
+            collector, incremental.IncrementalClusterModelCollector)
+        self.assertIs(
+            collector,
+            manager.CollectorManager().get_cluster_model_collector())
+        m_start.assert_called_once_with()
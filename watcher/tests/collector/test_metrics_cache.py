@@ -0,0 +1,115 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import time
+
+import mock
+
+from watcher.metrics_engine.cluster_history import cache
+from watcher.tests import base
+
+
+class TestMetricsCache(base.BaseTestCase):
+
+    @mock.patch.object(time, 'time')
+    def test_ttl(self, mock_time):
+        mock_time.return_value = 1000
+        metrics_cache = cache.MetricsCache(ttl=60, max_size=10)
+        metrics_cache.set("key", 42)
+        mock_time.return_value = 1060
+        self.assertEqual(42, metrics_cache.get("key"))
+        mock_time.return_value = 1061
+        self.assertIsNone(metrics_cache.get("key"))
+        self.assertEqual({'size': 0, 'hits': 1, 'misses': 1},
+                         metrics_cache.get_stats())
+
+    def test_lru_eviction(self):
+        metrics_cache = cache.MetricsCache(ttl=60, max_size=2)
+        metrics_cache.set("a", 1)
+        metrics_cache.set("b", 2)
+        # "a" becomes the most recently used entry
+        metrics_cache.get("a")
+        metrics_cache.set("c", 3)
+        self.assertEqual(2, len(metrics_cache))
+        self.assertIsNone(metrics_cache.get("b"))
+        self.assertEqual(1, metrics_cache.get("a"))
+        self.assertEqual(3, metrics_cache.get("c"))
+
+    def test_delete(self):
+        metrics_cache = cache.MetricsCache(ttl=60, max_size=2)
+        metrics_cache.set("a", 1)
+        metrics_cache.delete("a")
+        metrics_cache.delete("b")
+        self.assertEqual(0, len(metrics_cache))
+        self.assertIsNone(metrics_cache.get("a"))
+
+
+class TestCachedClusterHistory(base.TestCase):
+
+    def setUp(self):
+        super(TestCachedClusterHistory, self).setUp()
+        self.history = mock.MagicMock()
+        self.metrics_cache = cache.MetricsCache(ttl=60, max_size=100)
+        self.cached_history = cache.CachedClusterHistory(
+            self.history, cache=self.metrics_cache)
+
+    def test_statistic_aggregation(self):
+        self.history.statistic_aggregation.return_value = 10.0
+        for _ in range(3):
+            self.assertEqual(10.0, self.cached_history.statistic_aggregation(
+                "VM_1", "cpu_util", 7200))
+        self.assertEqual(1, self.history.statistic_aggregation.call_count)
+        # the period given as a string shares the same entry
+        self.cached_history.statistic_aggregation("VM_1", "cpu_util", "7200")
+        self.assertEqual(1, self.history.statistic_aggregation.call_count)
+        self.cached_history.statistic_aggregation("VM_1", "cpu_util", 3600)
+        self.assertEqual(2, self.history.statistic_aggregation.call_count)
+
+    def test_statistic_aggregation_no_data_not_cached(self):
+        self.history.statistic_aggregation.return_value = None
+        self.cached_history.statistic_aggregation("VM_1", "cpu_util", 7200)
+        self.cached_history.statistic_aggregation("VM_1", "cpu_util", 7200)
+        self.assertEqual(2, self.history.statistic_aggregation.call_count)
+
+    def test_statistic_aggregation_batch(self):
+        self.metrics_cache.set(("VM_1", "cpu_util", "7200", "avg"), 10.0)
+        self.history.statistic_aggregation_batch.return_value = {
+            ("VM_2", "cpu_util"): 20.0}
+
+        values = self.cached_history.statistic_aggregation_batch(
+            ["VM_1", "VM_2"], ["cpu_util"], 7200)
+
+        self.assertEqual({("VM_1", "cpu_util"): 10.0,
+                          ("VM_2", "cpu_util"): 20.0}, values)
+        self.history.statistic_aggregation_batch.assert_called_once_with(
+            ["VM_2"], ["cpu_util"], 7200, 'avg')
+
+        values = self.cached_history.statistic_aggregation_batch(
+            ["VM_1", "VM_2"], ["cpu_util"], 7200)
+        self.assertEqual(20.0, values[("VM_2", "cpu_util")])
+        self.assertEqual(
+            1, self.history.statistic_aggregation_batch.call_count)
+
+    def test_cache_disabled(self):
+        self.config(enabled=False, group='watcher_metrics_cache')
+        cached_history = cache.CachedClusterHistory(self.history)
+        self.history.statistic_aggregation.return_value = 10.0
+        cached_history.statistic_aggregation("VM_1", "cpu_util", 7200)
+        cached_history.statistic_aggregation("VM_1", "cpu_util", 7200)
+        self.assertEqual(2, self.history.statistic_aggregation.call_count)
+
+    def test_shared_cache(self):
+        self.assertIs(cache.get_metrics_cache(),
+                      cache.CachedClusterHistory(self.history).cache)
@@ -20,6 +20,8 @@
 
 import mock
 
+from watcher.common import nova_helper
+from watcher.decision_engine.model import resource
 from watcher.metrics_engine.cluster_model_collector.nova import \
     NovaClusterModelCollector
 from watcher.tests import base
@@ -30,6 +32,7 @@ class TestNovaCollector(base.TestCase):
     def setUp(self, mock_ksclient):
         super(TestNovaCollector, self).setUp()
         self.wrapper = mock.MagicMock()
+        self.wrapper.get_instance_list.return_value = []
         self.nova_collector = NovaClusterModelCollector(self.wrapper)
 
     def test_nova_collector(self):
@@ -42,3 +45,80 @@ class TestNovaCollector(base.TestCase):
         self.wrapper.nova.services.find.get.return_value = service
         model = self.nova_collector.get_latest_cluster_data_model()
         self.assertIsNotNone(model)
+
+
+class TestNovaCollectorBulk(base.TestCase):
+
+    def _build_nova(self, num_hosts, vms_per_host):
+        nova = mock.MagicMock()
+        services = []
+        hypervisors = []
+        servers = []
+        for i in range(num_hosts):
+            services.append(mock.Mock(id=i, host="host_%d" % i))
+            hypervisors.append(mock.Mock(
+                service={'id': i}, hypervisor_hostname="host_%d.eu" % i,
+                memory_mb=4096, free_disk_gb=40, local_gb=50, vcpus=8,
+                state='up', status='enabled'))
+            for j in range(vms_per_host):
+                server = mock.Mock(id="vm_%d_%d" % (i, j),
+                                   flavor={'id': 'small'})
+                setattr(server, 'OS-EXT-STS:vm_state', 'active')
+                setattr(server, 'OS-EXT-SRV-ATTR:host', "host_%d" % i)
+                servers.append(server)
+
+        def list_servers(detailed, search_opts, marker, limit):
+            start = 0
+            if marker is not None:
+                start = [s.id for s in servers].index(marker) + 1
+            return servers[start:start + limit]
+
+        flavor = mock.Mock(id='small', vcpus=1, ram=512, disk=1, ephemeral=0)
+        flavor.name = 'm1.small'
+        nova.services.list.return_value = services
+        nova.hypervisors.list.return_value = hypervisors
+        nova.flavors.list.return_value = [flavor]
+        nova.servers.list.side_effect = list_servers
+        return nova
+
+    def _collect(self, nova):
+        osc = mock.MagicMock()
+        osc.nova.return_value = nova
+        collector = NovaClusterModelCollector(nova_helper.NovaHelper(osc))
+        collector.INSTANCE_PAGE_SIZE = 4
+        return collector, collector.get_latest_cluster_data_model()
+
+    def test_bulk_collection(self):
+        nova = self._build_nova(num_hosts=3, vms_per_host=3)
+        collector, model = self._collect(nova)
+
+        self.assertEqual(3, len(model.get_all_hypervisors()))
+        self.assertEqual(9, len(model.get_all_vms()))
+        self.assertEqual(
+            ["vm_1_0", "vm_1_1", "vm_1_2"],
+            model.get_mapping().get_node_vms_from_id("host_1"))
+        # 9 VMs with a page size of 4: 3 pages plus the final empty one
+        self.assertEqual(4, nova.servers.list.call_count)
+        self.assertEqual(1, nova.services.list.call_count)
+        self.assertEqual(1, nova.flavors.list.call_count)
+        self.assertFalse(nova.services.find.called)
+        self.assertFalse(nova.flavors.get.called)
+        self.assertEqual(7, collector.stats['requests'])
+
+    def test_request_count_independent_of_hypervisors(self):
+        nova = self._build_nova(num_hosts=10, vms_per_host=0)
+        collector, model = self._collect(nova)
+        self.assertEqual(10, len(model.get_all_hypervisors()))
+        self.assertEqual(4, collector.stats['requests'])
+
+    def test_missing_flavor_is_fetched(self):
+        nova = self._build_nova(num_hosts=1, vms_per_host=1)
+        nova.flavors.list.return_value = []
+        nova.flavors.get.return_value = mock.Mock(
+            vcpus=2, ram=1024, disk=10, ephemeral=0)
+        collector, model = self._collect(nova)
+        vm = model.get_vm_from_id("vm_0_0")
+        self.assertEqual(
+            2, model.get_resource_from_id(
+                resource.ResourceType.cpu_cores).get_capacity(vm))
+        nova.flavors.get.assert_called_once_with('small')
@@ -62,6 +62,65 @@ class TestCeilometerHelper(base.BaseTestCase):
         )
         self.assertEqual(val, expected_result)
 
+    @staticmethod
+    def _list_statistics(meter_name, q, **kwargs):
+        def statistic(resource_id, value):
+            return mock.Mock(_info={'groupby': {'resource_id': resource_id},
+                                    'aggregate': {'avg': value}})
+
+        statistics = {
+            "cpu_util": [statistic("VM_1", 10), statistic("VM_1", 20),
+                         statistic("VM_2", 30), statistic("VM_3", 40)],
+            "memory.usage": [statistic("VM_2", 512)],
+        }[meter_name]
+        resource_ids = [c['value'] for c in q if c['field'] == 'resource_id']
+        return [s for s in statistics
+                if not resource_ids or
+                s._info['groupby']['resource_id'] in resource_ids]
+
+    def test_statistic_aggregation_batch(self, mock_ceilometer):
+        ceilometer = mock.MagicMock()
+        ceilometer.statistics.list.side_effect = self._list_statistics
+        mock_ceilometer.return_value = ceilometer
+        cm = ceilometer_helper.CeilometerHelper()
+        values = cm.statistic_aggregation_batch(
+            resource_ids=["VM_1", "VM_2"],
+            meter_names=["cpu_util", "memory.usage"],
+            period="7300"
+        )
+        self.assertEqual({("VM_1", "cpu_util"): 20,
+                          ("VM_2", "cpu_util"): 30,
+                          ("VM_1", "memory.usage"): None,
+                          ("VM_2", "memory.usage"): 512}, values)
+        # a few resources: one query restricted to each of them per meter
+        self.assertEqual(4, ceilometer.statistics.list.call_count)
+        ceilometer.statistics.list.assert_any_call(
+            meter_name="cpu_util",
+            q=[{"field": "resource_id", "op": "eq", "value": "VM_1"}],
+            period="7300", aggregates=[{'func': 'avg'}],
+            groupby=['resource_id'])
+
+    def test_statistic_aggregation_batch_many_resources(self,
+                                                        mock_ceilometer):
+        ceilometer = mock.MagicMock()
+        ceilometer.statistics.list.side_effect = self._list_statistics
+        mock_ceilometer.return_value = ceilometer
+        cm = ceilometer_helper.CeilometerHelper()
+        cm.max_filtered_resources = 1
+        values = cm.statistic_aggregation_batch(
+            resource_ids=["VM_1", "VM_2"],
+            meter_names=["cpu_util", "memory.usage"],
+            period="7300"
+        )
+        self.assertEqual({("VM_1", "cpu_util"): 20,
+                          ("VM_2", "cpu_util"): 30,
+                          ("VM_1", "memory.usage"): None,
+                          ("VM_2", "memory.usage"): 512}, values)
+        # many resources: one unrestricted query per meter
+        self.assertEqual(2, ceilometer.statistics.list.call_count)
+        for call in ceilometer.statistics.list.call_args_list:
+            self.assertEqual([], call[1]['q'])
+
     def test_get_last_sample(self, mock_ceilometer):
         ceilometer = mock.MagicMock()
         statistic = mock.MagicMock()
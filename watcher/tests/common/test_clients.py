@@ -242,3 +242,30 @@ class TestClients(base.BaseTestCase):
         neutron = osc.neutron()
         neutron_cached = osc.neutron()
         self.assertEqual(neutron, neutron_cached)
+
+    @mock.patch.object(glclient, 'Client')
+    @mock.patch.object(nvclient, 'Client')
+    @mock.patch.object(clients.OpenStackClients, '_get_keystone_session')
+    def test_clients_share_session(self, mock_get_session, mock_nova,
+                                   mock_glance):
+        osc = clients.OpenStackClients()
+        for _ in range(3):
+            osc.nova()
+        osc.glance()
+
+        mock_get_session.assert_called_once_with()
+        mock_nova.assert_called_once_with(
+            cfg.CONF.nova_client.api_version,
+            session=mock_get_session.return_value)
+        mock_glance.assert_called_once_with(
+            cfg.CONF.glance_client.api_version,
+            session=mock_get_session.return_value)
+        self.assertEqual({'session': {'created': 1, 'reused': 1},
+                          'nova': {'created': 1, 'reused': 2},
+                          'glance': {'created': 1, 'reused': 0}},
+                         osc.get_stats())
+
+    def test_get_clients(self):
+        osc = clients.get_clients()
+        self.assertIsInstance(osc, clients.OpenStackClients)
+        self.assertIs(osc, clients.get_clients())
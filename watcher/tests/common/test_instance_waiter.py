@@ -0,0 +1,169 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import random
+import time
+
+import eventlet
+import mock
+from oslo_config import cfg
+import oslo_messaging as om
+
+from watcher.common import instance_waiter
+from watcher.tests import base
+
+CONF = cfg.CONF
+
+
+def instance_payload(uuid):
+    return {'nova_object.name': 'InstanceActionPayload',
+            'nova_object.data': {'uuid': uuid, 'host': 'Node_1'}}
+
+
+class FakeInstance(object):
+    """Instance whose operation ends when finish() is called"""
+
+    def __init__(self):
+        self.done = False
+        self.checks = 0
+
+    def finish(self):
+        self.done = True
+
+    def check(self):
+        self.checks += 1
+        return self.done
+
+
+class TestInstanceWaiter(base.TestCase):
+
+    def test_backoff_intervals(self):
+        random.seed(0)
+        intervals = instance_waiter.backoff_intervals(1, 8, 0.5)
+        expected = [1, 2, 4, 8, 8, 8]
+        for maximum in expected:
+            interval = next(intervals)
+            self.assertTrue(maximum / 2.0 <= interval <= maximum, interval)
+
+    def test_backoff_intervals_without_jitter(self):
+        intervals = instance_waiter.backoff_intervals(0.5, 3, 0)
+        self.assertEqual([0.5, 1, 2, 3, 3],
+                         [next(intervals) for _ in range(5)])
+
+    def test_wait_done(self):
+        waiter = instance_waiter.InstanceWaiter()
+        self.assertEqual('done', waiter.wait(lambda: 'done', 10))
+        self.assertEqual({'checks': 1, 'notified': 0}, waiter.get_stats())
+
+    def test_wait_polling(self):
+        waiter = instance_waiter.InstanceWaiter(initial_interval=0.01,
+                                                max_interval=0.02)
+        instance = FakeInstance()
+        eventlet.spawn_after(0.1, instance.finish)
+        self.assertTrue(waiter.wait(instance.check, 5, 'VM_1'))
+        self.assertTrue(instance.checks > 2)
+        self.assertEqual(0, waiter.notified)
+
+    def test_wait_timeout(self):
+        waiter = instance_waiter.InstanceWaiter(initial_interval=0.01,
+                                                max_interval=0.01)
+        start = time.time()
+        self.assertFalse(waiter.wait(lambda: False, 0.05))
+        self.assertTrue(time.time() - start < 1)
+        self.assertNotIn(None, waiter._events)
+
+    def _notify(self, waiter, instance, event_type, uuid,
+                publisher_id='nova-compute:Node_1'):
+        instance.finish()
+        waiter.handler.info({}, publisher_id, event_type,
+                            instance_payload(uuid), {})
+
+    def test_wait_notified(self):
+        waiter = instance_waiter.InstanceWaiter(initial_interval=10)
+        instance = FakeInstance()
+        eventlet.spawn_after(0.05, self._notify, waiter, instance,
+                             'instance.live_migration_post.end', 'VM_1')
+        start = time.time()
+        self.assertTrue(waiter.wait(instance.check, 60, 'VM_1'))
+        self.assertTrue(time.time() - start < 5)
+        self.assertEqual(2, instance.checks)
+        self.assertEqual(1, waiter.notified)
+        self.assertEqual({}, waiter._events)
+
+    def test_wait_legacy_notification(self):
+        waiter = instance_waiter.InstanceWaiter(initial_interval=10)
+        instance = FakeInstance()
+
+        def notify():
+            instance.finish()
+            waiter.handler.info(
+                {}, 'compute.Node_1',
+                'compute.instance.live_migration.post.dest.end',
+                {'instance_id': 'VM_1'}, {})
+
+        eventlet.spawn_after(0.05, notify)
+        self.assertTrue(waiter.wait(instance.check, 60, 'VM_1'))
+        self.assertEqual(1, waiter.notified)
+
+    def test_other_notification_ignored(self):
+        waiter = instance_waiter.InstanceWaiter(initial_interval=0.2,
+                                                jitter=0)
+        instance = FakeInstance()
+        eventlet.spawn_after(0.05, self._notify, waiter, instance,
+                             'service.update', 'VM_1')
+        self.assertTrue(waiter.wait(instance.check, 60, 'VM_1'))
+        self.assertEqual(0, waiter.notified)
+
+    def test_notification_of_other_instance(self):
+        waiter = instance_waiter.InstanceWaiter(initial_interval=0.2,
+                                                jitter=0)
+        instance = FakeInstance()
+        eventlet.spawn_after(0.05, self._notify, waiter, instance,
+                             'instance.update', 'VM_2')
+        self.assertTrue(waiter.wait(instance.check, 60, 'VM_1'))
+        self.assertEqual(2, instance.checks)
+        self.assertEqual(0, waiter.notified)
+
+    def test_fake_transport(self):
+        self.config(rpc_backend='fake')
+        transport = om.get_transport(CONF)
+        waiter = instance_waiter.InstanceWaiter(initial_interval=10)
+        waiter.start(transport)
+        self.addCleanup(waiter.stop)
+
+        notifier = om.Notifier(transport,
+                               publisher_id='nova-compute:Node_1',
+                               driver='messaging',
+                               topics=['versioned_notifications'])
+        instance = FakeInstance()
+
+        def notify():
+            instance.finish()
+            notifier.info({}, 'instance.live_migration_post.end',
+                          instance_payload('VM_1'))
+
+        eventlet.spawn_after(0.05, notify)
+        start = time.time()
+        self.assertTrue(waiter.wait(instance.check, 60, 'VM_1'))
+        self.assertTrue(time.time() - start < 5)
+        self.assertEqual(1, waiter.notified)
+
+    @mock.patch.object(instance_waiter.InstanceWaiter, 'start')
+    @mock.patch.object(instance_waiter, '_INSTANCE_WAITER', None)
+    def test_get_instance_waiter(self, m_start):
+        self.config(use_notifications=True, group='watcher_instance_waiter')
+        waiter = instance_waiter.get_instance_waiter()
+        self.assertIs(waiter, instance_waiter.get_instance_waiter())
+        m_start.assert_called_once_with()
@@ -17,16 +17,30 @@
 # limitations under the License.
 #
 
+import functools
+import threading
 import time
 
+import cinderclient.exceptions as ciexceptions
 import mock
+import novaclient.exceptions as nvexceptions
 
+from watcher.common import cache
 from watcher.common import clients
+from watcher.common import instance_waiter
 from watcher.common import nova_helper
 from watcher.common import utils
 from watcher.tests import base
 
 
+class FakeWaiter(instance_waiter.InstanceWaiter):
+    """Check once instead of waiting"""
+
+    def wait(self, check, timeout, instance_id=None):
+        self.checks += 1
+        return check()
+
+
 @mock.patch.object(clients.OpenStackClients, 'nova')
 @mock.patch.object(clients.OpenStackClients, 'neutron')
 @mock.patch.object(clients.OpenStackClients, 'cinder')
@@ -38,6 +52,16 @@ class TestNovaHelper(base.TestCase):
         self.instance_uuid = "fb5311b7-37f3-457e-9cde-6494a3c59bfe"
         self.source_hypervisor = "ldev-indeedsrv005"
         self.destination_hypervisor = "ldev-indeedsrv006"
+        self.waiter = FakeWaiter()
+        p_waiter = mock.patch.object(instance_waiter, 'get_instance_waiter',
+                                     return_value=self.waiter)
+        p_waiter.start()
+        self.addCleanup(p_waiter.stop)
+        self.cache = cache.TTLCache(ttl=60, max_size=100)
+        p_cache = mock.patch.object(nova_helper, 'get_instance_cache',
+                                    return_value=self.cache)
+        p_cache.start()
+        self.addCleanup(p_cache.stop)
 
     def test_stop_instance(self, mock_glance, mock_cinder, mock_neutron,
                            mock_nova):
@@ -49,9 +73,11 @@ class TestNovaHelper(base.TestCase):
         nova_util.nova.servers = mock.MagicMock()
         nova_util.nova.servers.find.return_value = server
         nova_util.nova.servers.list.return_value = [server]
+        nova_util.nova.servers.get.return_value = server
 
         result = nova_util.stop_instance(instance_id)
         self.assertEqual(result, True)
+        self.assertEqual(0, len(self.cache))
 
     def test_set_host_offline(self, mock_glance, mock_cinder, mock_neutron,
                               mock_nova):
@@ -75,11 +101,144 @@ class TestNovaHelper(base.TestCase):
         )
         self.assertIsNotNone(instance)
 
+    def test_live_migrate_instance_wait(self, mock_glance, mock_cinder,
+                                        mock_neutron, mock_nova):
+        waiter = instance_waiter.InstanceWaiter(initial_interval=0.01,
+                                                max_interval=0.01)
+        nova_util = nova_helper.NovaHelper(waiter=waiter)
+        server = mock.MagicMock(id=self.instance_uuid)
+        setattr(server, 'OS-EXT-SRV-ATTR:host', self.source_hypervisor)
+        migrated = mock.MagicMock(id=self.instance_uuid)
+        setattr(migrated, 'OS-EXT-SRV-ATTR:host',
+                self.destination_hypervisor)
+        nova_util.nova.servers = mock.MagicMock()
+        nova_util.nova.servers.list.return_value = [server]
+        nova_util.nova.servers.get.side_effect = [server, server, server,
+                                                  migrated]
+
+        self.assertTrue(nova_util.live_migrate_instance(
+            self.instance_uuid, self.destination_hypervisor))
+        self.assertEqual(3, waiter.checks)
+        self.assertIsNone(self.cache.get(self.instance_uuid))
+        server.live_migrate.assert_called_once_with(
+            host=self.destination_hypervisor, block_migration=False,
+            disk_over_commit=True)
+
+    def test_live_migrate_instance_timeout(self, mock_glance, mock_cinder,
+                                           mock_neutron, mock_nova):
+        waiter = instance_waiter.InstanceWaiter(initial_interval=0.01,
+                                                max_interval=0.01)
+        nova_util = nova_helper.NovaHelper(waiter=waiter)
+        server = mock.MagicMock(id=self.instance_uuid)
+        setattr(server, 'OS-EXT-SRV-ATTR:host', self.source_hypervisor)
+        nova_util.nova.servers = mock.MagicMock()
+        nova_util.nova.servers.list.return_value = [server]
+        nova_util.nova.servers.get.return_value = server
+
+        self.assertFalse(nova_util.live_migrate_instance(
+            self.instance_uuid, self.destination_hypervisor, retry=0.05))
+
+    def test_clients_created_on_use(self, mock_glance, mock_cinder,
+                                    mock_neutron, mock_nova):
+        nova_util = nova_helper.NovaHelper()
+        self.assertIs(clients.get_clients(), nova_util.osc)
+        for client in (mock_glance, mock_cinder, mock_neutron, mock_nova):
+            self.assertFalse(client.called)
+
+        nova_util.nova.services.enable.return_value = mock.MagicMock(
+            status='enabled')
+        nova_util.enable_service_nova_compute('Node_1')
+        nova_util.nova.services.enable.assert_called_once_with(
+            host='Node_1', binary='nova-compute')
+        mock_nova.assert_called_once_with()
+        for client in (mock_glance, mock_cinder, mock_neutron):
+            self.assertFalse(client.called)
+
+    def test_find_instance(self, mock_glance, mock_cinder, mock_neutron,
+                           mock_nova):
+        nova_util = nova_helper.NovaHelper()
+        server = mock.MagicMock(id=self.instance_uuid)
+        nova_util.nova.servers.get.return_value = server
+
+        self.assertIs(server, nova_util.find_instance(self.instance_uuid))
+        self.assertIs(server, nova_util.find_instance(self.instance_uuid))
+        nova_util.nova.servers.get.assert_called_once_with(
+            self.instance_uuid)
+        self.assertFalse(nova_util.nova.servers.list.called)
+
+    def test_find_instance_not_found(self, mock_glance, mock_cinder,
+                                     mock_neutron, mock_nova):
+        nova_util = nova_helper.NovaHelper()
+        nova_util.nova.servers.get.side_effect = nvexceptions.NotFound(404)
+
+        self.assertIsNone(nova_util.find_instance(self.instance_uuid))
+        self.assertEqual(0, len(self.cache))
+
+    def test_find_instance_without_cache(self, mock_glance, mock_cinder,
+                                         mock_neutron, mock_nova):
+        self.config(enabled=False, group='watcher_instance_cache')
+        nova_util = nova_helper.NovaHelper()
+        nova_util.find_instance(self.instance_uuid)
+        nova_util.find_instance(self.instance_uuid)
+        self.assertEqual(2, nova_util.nova.servers.get.call_count)
+
+    def test_find_instances(self, mock_glance, mock_cinder, mock_neutron,
+                            mock_nova):
+        nova_util = nova_helper.NovaHelper()
+        servers = dict((uuid, mock.MagicMock(id=uuid))
+                       for uuid in ('VM_0', 'VM_1', 'VM_2'))
+        self.cache.set('VM_0', servers['VM_0'])
+
+        def get(uuid):
+            if uuid not in servers:
+                raise nvexceptions.NotFound(404)
+            return servers[uuid]
+
+        nova_util.nova.servers.get.side_effect = get
+        instances = nova_util.find_instances(['VM_0', 'VM_1', 'VM_3'])
+
+        self.assertEqual({'VM_0': servers['VM_0'], 'VM_1': servers['VM_1'],
+                          'VM_3': None}, instances)
+        self.assertEqual(2, nova_util.nova.servers.get.call_count)
+        self.assertFalse(nova_util.nova.servers.list.called)
+
+    def test_find_instances_refresh(self, mock_glance, mock_cinder,
+                                    mock_neutron, mock_nova):
+        nova_util = nova_helper.NovaHelper()
+        stale = mock.MagicMock(id='VM_0')
+        server = mock.MagicMock(id='VM_0')
+        self.cache.set('VM_0', stale)
+        nova_util.nova.servers.get.return_value = server
+
+        instances = nova_util.find_instances(['VM_0'], refresh=True)
+
+        self.assertEqual({'VM_0': server}, instances)
+        nova_util.nova.servers.get.assert_called_once_with('VM_0')
+        self.assertIs(server, nova_util.find_instance('VM_0'))
+
+    def test_find_instances_listed(self, mock_glance, mock_cinder,
+                                   mock_neutron, mock_nova):
+        self.config(list_threshold=1, group='watcher_instance_cache')
+        nova_util = nova_helper.NovaHelper()
+        servers = [mock.MagicMock(id=uuid)
+                   for uuid in ('VM_0', 'VM_1', 'VM_2')]
+        nova_util.nova.servers.list.return_value = servers
+
+        instances = nova_util.find_instances(['VM_0', 'VM_1', 'VM_3'])
+
+        self.assertEqual({'VM_0': servers[0], 'VM_1': servers[1],
+                          'VM_3': None}, instances)
+        nova_util.nova.servers.list.assert_called_once_with(
+            detailed=True, search_opts={'all_tenants': True})
+        self.assertFalse(nova_util.nova.servers.get.called)
+        self.assertIs(servers[1], nova_util.find_instance('VM_1'))
+
     def test_watcher_non_live_migrate_instance_not_found(
             self, mock_glance, mock_cinder, mock_neutron, mock_nova):
         nova_util = nova_helper.NovaHelper()
         nova_util.nova.servers.list.return_value = []
         nova_util.nova.servers.find.return_value = None
+        nova_util.nova.servers.get.side_effect = nvexceptions.NotFound(404)
 
         is_success = nova_util.watcher_non_live_migrate_instance(
             self.instance_uuid,
@@ -142,3 +301,159 @@ class TestNovaHelper(base.TestCase):
             self.instance_uuid, "Cirros"
         )
         self.assertIsNone(instance)
+
+
+class FakeServer(object):
+    def __init__(self, uuid, host, **attributes):
+        self.id = uuid
+        self.name = 'name-%s' % uuid
+        self.status = 'ACTIVE'
+        self.key_name = 'mykeys'
+        self.image = {'id': 'image-1'}
+        self.flavor = {'id': 'flavor-1'}
+        self.addresses = {}
+        self.security_groups = []
+        setattr(self, 'OS-EXT-SRV-ATTR:host', host)
+        setattr(self, 'OS-EXT-STS:vm_state', 'active')
+        setattr(self, 'os-extended-volumes:volumes_attached', [])
+        for name, value in attributes.items():
+            setattr(self, name, value)
+        self.remove_floating_ip = mock.Mock()
+        self.add_floating_ip = mock.Mock()
+
+
+class FakeCinder(object):
+    """cinderclient whose volumes become available after a delay"""
+
+    def __init__(self, volume_ids, detach_delay):
+        self.volumes = self
+        self.detach_delay = detach_delay
+        self._volumes = dict(
+            (volume_id, mock.Mock(id=volume_id, status='in-use',
+                                  attachments=[{'device': '/dev/vd%s' % i}]))
+            for i, volume_id in enumerate(volume_ids))
+        self._lock = threading.Lock()
+        self.detaching = 0
+        self.max_detaching = 0
+
+    def get(self, volume_id):
+        if volume_id not in self._volumes:
+            raise ciexceptions.NotFound(404)
+        return self._volumes[volume_id]
+
+    def detach(self, volume_id):
+        with self._lock:
+            self.detaching += 1
+            self.max_detaching = max(self.max_detaching, self.detaching)
+
+        def detached():
+            self._volumes[volume_id].status = 'available'
+            with self._lock:
+                self.detaching -= 1
+
+        timer = threading.Timer(self.detach_delay, detached)
+        timer.daemon = True
+        timer.start()
+
+
+class TestNonLiveMigration(base.TestCase):
+
+    def setUp(self):
+        super(TestNonLiveMigration, self).setUp()
+        self.volume_ids = ['volume-%d' % i for i in range(3)]
+        self.instance = FakeServer(
+            'VM_0', 'Node_0',
+            addresses={'demo-net': [{'OS-EXT-IPS:type': 'fixed',
+                                     'addr': '10.0.0.3'},
+                                    {'OS-EXT-IPS:type': 'floating',
+                                     'addr': '172.24.4.3'}]},
+            security_groups=[{'name': 'default'}],
+            **{'os-extended-volumes:volumes_attached':
+               [{'id': volume_id} for volume_id in self.volume_ids]})
+        self.new_instance = FakeServer('VM_1', 'Node_1')
+        self.servers = {'VM_0': self.instance, 'VM_1': self.new_instance}
+
+        self.cinder = FakeCinder(self.volume_ids, detach_delay=0.1)
+        self.glance = mock.Mock()
+        self.glance.images.get.return_value = mock.Mock(status='active')
+        self.neutron = mock.Mock()
+        self.neutron.list_networks.return_value = {
+            'networks': [{'id': 'net-1'}]}
+        self.nova = mock.MagicMock()
+        self.nova.servers.get.side_effect = self.get_server
+        self.nova.servers.stop.side_effect = self.stop_server
+        self.nova.servers.create_image.return_value = 'image-2'
+        self.nova.servers.create.return_value = self.new_instance
+        self.nova.volumes.delete_server_volume.side_effect = (
+            lambda instance_id, volume_id: self.cinder.detach(volume_id))
+
+        osc = mock.Mock(spec=clients.OpenStackClients)
+        osc.nova.return_value = self.nova
+        osc.cinder.return_value = self.cinder
+        osc.glance.return_value = self.glance
+        osc.neutron.return_value = self.neutron
+        self.waiter = instance_waiter.InstanceWaiter(
+            initial_interval=0.01, max_interval=0.05)
+        self.helper = nova_helper.NovaHelper(
+            osc=osc, waiter=self.waiter,
+            cache=cache.TTLCache(ttl=60, max_size=100))
+
+    def get_server(self, server):
+        return self.servers[getattr(server, 'id', server)]
+
+    def stop_server(self, instance_id):
+        setattr(self.servers[instance_id], 'OS-EXT-STS:vm_state', 'stopped')
+        self.servers[instance_id].status = 'SHUTOFF'
+
+    def test_migrate(self):
+        detaching_at_snapshot = []
+
+        def create_image(*args):
+            detaching_at_snapshot.append(self.cinder.detaching)
+            return 'image-2'
+        self.nova.servers.create_image.side_effect = create_image
+
+        self.assertTrue(self.helper.watcher_non_live_migrate_instance(
+            'VM_0', 'Node_1'))
+
+        # the volumes are detached together, and before the snapshot
+        self.assertEqual(3, self.cinder.max_detaching)
+        self.assertEqual(0, self.cinder.detaching)
+        self.assertEqual([0], detaching_at_snapshot)
+        self.nova.servers.create_image.assert_called_once_with(
+            'VM_0', self.nova.images.get.return_value.name,
+            {'reason': 'instance_migrate'})
+        args, kwargs = self.nova.servers.create.call_args
+        self.assertEqual('nova:Node_1', kwargs['availability_zone'])
+        self.assertEqual(['default'], kwargs['security_groups'])
+        self.assertEqual([{'net-id': 'net-1'}], kwargs['nics'])
+        self.assertEqual(
+            [{'device_name': '/dev/vd%d' % i, 'source_type': 'volume',
+              'destination_type': 'volume', 'uuid': volume_id,
+              'boot_index': '0'}
+             for i, volume_id in enumerate(self.volume_ids)],
+            kwargs['block_device_mapping_v2'])
+        self.instance.remove_floating_ip.assert_called_once_with(
+            '172.24.4.3')
+        self.new_instance.add_floating_ip.assert_called_once_with(
+            '172.24.4.3')
+        self.nova.servers.delete.assert_called_once_with('VM_0')
+
+    def test_volume_not_detached(self):
+        self.cinder.detach_delay = 60
+        self.helper.detach_volume = functools.partial(
+            self.helper.detach_volume, retry=1, sleep=0.2)
+
+        self.assertFalse(self.helper.watcher_non_live_migrate_instance(
+            'VM_0', 'Node_1'))
+        self.assertFalse(self.nova.servers.create_image.called)
+        self.assertFalse(self.nova.servers.create.called)
+        self.assertFalse(self.nova.servers.delete.called)
+
+    def test_volume_not_found(self):
+        self.cinder._volumes.pop('volume-1')
+
+        self.assertFalse(self.helper.watcher_non_live_migrate_instance(
+            'VM_0', 'Node_1'))
+        self.assertFalse(self.nova.volumes.delete_server_volume.called)
+        self.assertFalse(self.nova.servers.create_image.called)
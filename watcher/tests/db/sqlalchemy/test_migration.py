@@ -0,0 +1,91 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the schema migrations and the indexes of the lists"""
+
+import sqlalchemy
+
+from watcher.db.sqlalchemy import api as sqla_api
+from watcher.db.sqlalchemy import migration
+from watcher.tests.db import base
+from watcher.tests.db import utils
+
+
+class TestMigrations(base.DbTestCase):
+
+    def get_indexes(self, table):
+        inspector = sqlalchemy.inspect(sqla_api.get_engine())
+        return set(index['name'] for index in inspector.get_indexes(table))
+
+    def test_downgrade_upgrade(self):
+        self.assertIn('ix_actions_action_plan_id_id',
+                      self.get_indexes('actions'))
+
+        migration.downgrade('base')
+        self.assertIsNone(migration.version())
+        self.assertEqual(set(), self.get_indexes('actions'))
+
+        migration.upgrade('head')
+        self.assertEqual('3cfd8e2a8b25', migration.version())
+        self.assertEqual(set(['ix_actions_action_plan_id_id',
+                              'ix_actions_state_id',
+                              'ix_actions_deleted_at_id']),
+                         self.get_indexes('actions'))
+        self.assertEqual(set(['ix_audits_audit_template_id_id',
+                              'ix_audits_state_id',
+                              'ix_audits_deleted_at_id']),
+                         self.get_indexes('audits'))
+
+    def get_columns(self, table):
+        inspector = sqlalchemy.inspect(sqla_api.get_engine())
+        return set(column['name'] for column in inspector.get_columns(table))
+
+    def test_action_plan_hostname(self):
+        self.assertIn('hostname', self.get_columns('action_plans'))
+
+        migration.downgrade('base')
+        self.assertNotIn('hostname', self.get_columns('action_plans'))
+
+        migration.upgrade('head')
+        self.assertIn('hostname', self.get_columns('action_plans'))
+        action_plan = utils.create_test_action_plan(state='TRIGGERED')
+        self.assertTrue(self.dbapi.claim_action_plan(
+            action_plan.uuid, 'applier-1', ['TRIGGERED']))
+
+    def test_action_list_uses_index(self):
+        action_plan = utils.create_test_action_plan()
+        utils.create_test_action(action_plan_id=action_plan.id)
+        marker = self.dbapi.get_action_list(
+            self.context, filters={'action_plan_id': action_plan.id})[0]
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters,
+                                  context, executemany):
+            if statement.startswith('SELECT actions.'):
+                statements.append((statement, parameters))
+
+        engine = sqla_api.get_engine()
+        sqlalchemy.event.listen(engine, 'before_cursor_execute',
+                                before_cursor_execute)
+        self.addCleanup(sqlalchemy.event.remove, engine,
+                        'before_cursor_execute', before_cursor_execute)
+        self.dbapi.get_action_list(
+            self.context, limit=10, marker=marker,
+            filters={'action_plan_id': action_plan.id})
+
+        statement, parameters = statements[-1]
+        plan = engine.execute('EXPLAIN QUERY PLAN ' + statement,
+                              parameters).fetchall()
+        details = ' '.join(tuple(row)[-1] for row in plan)
+        self.assertIn('ix_actions_action_plan_id_id', details)
+        self.assertNotIn('TEMP B-TREE', details)
@@ -43,6 +43,41 @@ class DbActionTestCase(base.DbTestCase):
         res_uuids = [r.uuid for r in res]
         self.assertEqual(uuids.sort(), res_uuids.sort())
 
+    def _get_pages(self, limit, sort_key, sort_dir):
+        pages = []
+        marker = None
+        while True:
+            page = self.dbapi.get_action_list(
+                self.context, limit=limit, marker=marker, sort_key=sort_key,
+                sort_dir=sort_dir)
+            if not page:
+                return pages
+            pages.append([action.id for action in page])
+            marker = page[-1]
+
+    def test_get_action_list_keyset_pages(self):
+        states = ['PENDING', None, 'SUCCEEDED', 'PENDING', None, 'ONGOING',
+                  'PENDING', 'SUCCEEDED', None, 'PENDING', 'ONGOING']
+        for action_id, state in enumerate(states, 1):
+            utils.create_test_action(id=action_id, state=state,
+                                     uuid=w_utils.generate_uuid())
+        # the NULL values come first in ascending order
+        expected = sorted(range(1, len(states) + 1),
+                          key=lambda i: (states[i - 1] is not None,
+                                         states[i - 1], i))
+        # the actions without a state are not listed otherwise
+        self.context.show_deleted = True
+
+        pages = self._get_pages(4, 'state', 'asc')
+        self.assertEqual([4, 4, 3], [len(page) for page in pages])
+        self.assertEqual(expected, sum(pages, []))
+
+        pages = self._get_pages(3, 'state', 'desc')
+        self.assertEqual(list(reversed(expected)), sum(pages, []))
+
+        pages = self._get_pages(5, None, 'desc')
+        self.assertEqual(list(range(len(states), 0, -1)), sum(pages, []))
+
     def test_get_action_list_with_filters(self):
         audit = utils.create_test_audit(uuid=w_utils.generate_uuid())
         action_plan = self._create_test_action_plan(
@@ -156,3 +191,74 @@ class DbActionTestCase(base.DbTestCase):
         self.assertRaises(exception.ActionAlreadyExists,
                           self._create_test_action,
                           id=2, uuid=uuid)
+
+    def _get_test_actions(self, count):
+        actions = []
+        for i in range(count):
+            action = utils.get_test_action(uuid=w_utils.generate_uuid(),
+                                           next=None)
+            del action['id']
+            actions.append(action)
+        return actions
+
+    def test_create_actions(self):
+        values_list = self._get_test_actions(3)
+        actions = self.dbapi.create_actions(values_list)
+
+        self.assertEqual([v['uuid'] for v in values_list],
+                         [a.uuid for a in actions])
+        for action in actions:
+            self.assertIsNone(action.next)
+            # the returned actions carry the defaults filled in by the DB
+            self.assertIsNotNone(action.created_at)
+            self.assertEqual(0, action.deleted)
+            db_action = self.dbapi.get_action_by_id(self.context, action.id)
+            self.assertEqual(action.uuid, db_action.uuid)
+            self.assertEqual(action.input_parameters,
+                             db_action.input_parameters)
+            self.assertIsNone(db_action.next)
+            self.assertIsNotNone(db_action.created_at)
+
+    def test_create_actions_chain(self):
+        # more actions than the size of the IN clauses
+        values_list = self._get_test_actions(1200)
+        values_list[0]['uuid'] = None
+        actions = self.dbapi.create_actions(values_list, chain=True)
+
+        self.assertTrue(w_utils.is_uuid_like(actions[0].uuid))
+        self.assertEqual(1200, len(set(a.id for a in actions)))
+        for action, next_action in zip(actions, actions[1:]):
+            self.assertEqual(next_action.id, action.next)
+        self.assertIsNone(actions[-1].next)
+
+        db_actions = dict((a.id, a)
+                          for a in self.dbapi.get_action_list(self.context))
+        action_id = actions[0].id
+        chained = []
+        while action_id is not None:
+            chained.append(action_id)
+            action_id = db_actions[action_id].next
+            action_id = int(action_id) if action_id is not None else None
+        self.assertEqual([a.id for a in actions], chained)
+
+    def test_create_actions_empty(self):
+        self.assertEqual([], self.dbapi.create_actions([], chain=True))
+
+    def test_create_actions_already_exists(self):
+        uuid = w_utils.generate_uuid()
+        self._create_test_action(id=1, uuid=uuid)
+        values_list = self._get_test_actions(2)
+        values_list[1]['uuid'] = uuid
+        self.assertRaises(exception.ActionAlreadyExists,
+                          self.dbapi.create_actions, values_list)
+        # nothing is written
+        self.assertEqual(1, len(self.dbapi.get_action_list(self.context)))
+
+    def test_update_action_states(self):
+        actions = self.dbapi.create_actions(self._get_test_actions(3))
+        self.dbapi.update_action_states({actions[0].uuid: 'SUCCEEDED',
+                                         actions[1].uuid: 'FAILED'})
+        self.assertEqual(
+            ['SUCCEEDED', 'FAILED', 'PENDING'],
+            [self.dbapi.get_action_by_id(self.context, a.id).state
+             for a in actions])
@@ -146,3 +146,70 @@ class DbActionPlanTestCase(base.DbTestCase):
         self.assertRaises(exception.ActionPlanAlreadyExists,
                           self._create_test_action_plan,
                           id=2, uuid=uuid)
+
+    def test_claim_action_plan(self):
+        action_plan = self._create_test_action_plan(state='TRIGGERED')
+        self.assertTrue(self.dbapi.claim_action_plan(
+            action_plan['uuid'], 'applier-1', ['TRIGGERED']))
+        self.assertFalse(self.dbapi.claim_action_plan(
+            action_plan['uuid'], 'applier-2', ['TRIGGERED']))
+        res = self.dbapi.get_action_plan_by_uuid(self.context,
+                                                 action_plan['uuid'])
+        self.assertEqual('ONGOING', res.state)
+        self.assertEqual('applier-1', res.hostname)
+
+    def test_claim_action_plan_in_other_state(self):
+        action_plan = self._create_test_action_plan(state='CANCELLED')
+        self.assertFalse(self.dbapi.claim_action_plan(
+            action_plan['uuid'], 'applier-1', ['TRIGGERED']))
+        res = self.dbapi.get_action_plan_by_uuid(self.context,
+                                                 action_plan['uuid'])
+        self.assertEqual('CANCELLED', res.state)
+        self.assertIsNone(res.hostname)
+
+    def test_claim_action_plan_from_applier(self):
+        action_plan = self._create_test_action_plan(state='ONGOING',
+                                                    hostname='applier-1')
+        self.assertFalse(self.dbapi.claim_action_plan(
+            action_plan['uuid'], 'applier-3', ['ONGOING'],
+            previous_hostname='applier-2'))
+        self.assertTrue(self.dbapi.claim_action_plan(
+            action_plan['uuid'], 'applier-2', ['ONGOING'],
+            previous_hostname='applier-1'))
+        res = self.dbapi.get_action_plan_by_uuid(self.context,
+                                                 action_plan['uuid'])
+        self.assertEqual('applier-2', res.hostname)
+
+    def test_claim_next_action_plan(self):
+        uuids = [w_utils.generate_uuid() for _ in range(3)]
+        for i, (uuid, state) in enumerate(
+                zip(uuids, ['RECOMMENDED', 'TRIGGERED', 'TRIGGERED']), 1):
+            self._create_test_action_plan(id=i, uuid=uuid, state=state)
+
+        self.assertEqual(uuids[1], self.dbapi.claim_next_action_plan(
+            'applier-1', ['TRIGGERED']))
+        self.assertEqual(uuids[2], self.dbapi.claim_next_action_plan(
+            'applier-2', ['TRIGGERED']))
+        self.assertIsNone(self.dbapi.claim_next_action_plan(
+            'applier-1', ['TRIGGERED']))
+        res = self.dbapi.get_action_plan_list(
+            self.context, filters={'hostname': 'applier-2'})
+        self.assertEqual([uuids[2]], [r.uuid for r in res])
+
+    def test_soft_delete_action_plans(self):
+        for i in range(1, 4):
+            self._create_test_action_plan(id=i, uuid=w_utils.generate_uuid())
+            utils.create_test_action(id=i, uuid=w_utils.generate_uuid(),
+                                     action_plan_id=i)
+        self.assertEqual(2, self.dbapi.soft_delete_action_plans([1, 2]))
+
+        self.context.show_deleted = True
+        for i, state in enumerate(['DELETED', 'DELETED', 'ONGOING'], 1):
+            action_plan = self.dbapi.get_action_plan_by_id(self.context, i)
+            self.assertEqual(state, action_plan.state)
+            self.assertEqual(state == 'DELETED',
+                             action_plan.deleted_at is not None)
+            action = self.dbapi.get_action_by_id(self.context, i)
+            self.assertEqual(state == 'DELETED', action.state == 'DELETED')
+            self.assertEqual(state == 'DELETED',
+                             action.deleted_at is not None)
@@ -184,3 +184,22 @@ class DbAuditTestCase(base.DbTestCase):
         self.assertRaises(exception.AuditAlreadyExists,
                           self._create_test_audit,
                           id=2, uuid=uuid)
+
+    def test_soft_delete_audits(self):
+        for i in range(1, 4):
+            self._create_test_audit(id=i, uuid=w_utils.generate_uuid())
+            utils.create_test_action_plan(id=i, uuid=w_utils.generate_uuid(),
+                                          audit_id=i)
+            utils.create_test_action(id=i, uuid=w_utils.generate_uuid(),
+                                     action_plan_id=i)
+        self.assertEqual(2, self.dbapi.soft_delete_audits([1, 2]))
+
+        self.context.show_deleted = True
+        for i in range(1, 4):
+            deleted = i != 3
+            for get in (self.dbapi.get_audit_by_id,
+                        self.dbapi.get_action_plan_by_id,
+                        self.dbapi.get_action_by_id):
+                row = get(self.context, i)
+                self.assertEqual(deleted, row.state == 'DELETED')
+                self.assertEqual(deleted, row.deleted_at is not None)
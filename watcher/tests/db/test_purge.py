@@ -0,0 +1,158 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Tests for the purge of the old rows"""
+
+import datetime
+
+import mock
+from oslo_utils import timeutils
+
+from watcher.common import exception
+from watcher.common import utils as w_utils
+from watcher.db import purge
+from watcher.tests.db import base
+from watcher.tests.db import utils
+
+
+class TestPurge(base.DbTestCase):
+
+    def setUp(self):
+        super(TestPurge, self).setUp()
+        self.now = timeutils.utcnow()
+        utils.create_test_audit_template()
+        utils.create_test_audit()
+        for i in range(1, 6):
+            utils.create_test_action_plan(id=i, uuid=w_utils.generate_uuid())
+            utils.create_test_action(id=i, uuid=w_utils.generate_uuid(),
+                                     action_plan_id=i)
+
+    def soft_delete(self, deleted_at, action_plan_ids=None, audit_ids=None):
+        with mock.patch.object(timeutils, 'utcnow', return_value=deleted_at):
+            if action_plan_ids:
+                self.dbapi.soft_delete_action_plans(action_plan_ids)
+            if audit_ids:
+                self.dbapi.soft_delete_audits(audit_ids)
+
+    def get_ids(self, get_list):
+        self.context.show_deleted = True
+        return sorted(row.id for row in get_list(self.context))
+
+    def test_purge(self):
+        self.soft_delete(self.now - datetime.timedelta(days=40), [1, 2, 3])
+        self.soft_delete(self.now - datetime.timedelta(days=10), [4])
+
+        counts = purge.purge(30, batch_size=2)
+
+        self.assertEqual({'actions': 3, 'action_plans': 3, 'audits': 0,
+                          'audit_templates': 0}, counts)
+        self.assertEqual([4, 5], self.get_ids(self.dbapi.get_action_list))
+        self.assertEqual([4, 5],
+                         self.get_ids(self.dbapi.get_action_plan_list))
+        self.assertEqual([1], self.get_ids(self.dbapi.get_audit_list))
+
+    def test_purge_referenced_rows(self):
+        # the action plan 1 is still referenced by its action
+        self.soft_delete(self.now - datetime.timedelta(days=40), [1])
+        self.dbapi.update_action(1, {'deleted_at': None, 'deleted': 0})
+
+        deleted_before = self.now - datetime.timedelta(days=30)
+        self.assertEqual(0, self.dbapi.purge_rows(
+            'action_plans', deleted_before, 10))
+        self.assertEqual([1, 2, 3, 4, 5],
+                         self.get_ids(self.dbapi.get_action_plan_list))
+
+    def test_purge_audit_cascade(self):
+        self.soft_delete(self.now - datetime.timedelta(days=40),
+                         audit_ids=[1])
+
+        counts = purge.purge(30)
+
+        self.assertEqual({'actions': 5, 'action_plans': 5, 'audits': 1,
+                          'audit_templates': 0}, counts)
+        self.assertEqual([], self.get_ids(self.dbapi.get_audit_list))
+
+    def test_purge_unknown_table(self):
+        self.assertRaises(exception.Invalid,
+                          self.dbapi.purge_rows,
+                          'goals', self.now, 10)
+
+    def finish(self, action_plan_id, updated_at, state='SUCCEEDED'):
+        self.dbapi.update_action_plan(
+            action_plan_id, {'state': state, 'updated_at': updated_at})
+
+    def test_purge_finished_action_plans(self):
+        old = self.now - datetime.timedelta(days=40)
+        self.finish(1, old)
+        self.finish(2, old, state='CANCELLED')
+        self.finish(3, self.now)
+        # the audit is finished, but its action plans are not all purged
+        self.dbapi.update_audit(1, {'state': 'SUCCEEDED', 'updated_at': old})
+
+        counts = purge.purge(30)
+
+        self.assertEqual({'actions': 2, 'action_plans': 2, 'audits': 0,
+                          'audit_templates': 0}, counts)
+        self.assertEqual([3, 4, 5], self.get_ids(self.dbapi.get_action_list))
+        self.assertEqual([1], self.get_ids(self.dbapi.get_audit_list))
+
+    def test_purge_max_rows(self):
+        self.soft_delete(self.now - datetime.timedelta(days=40),
+                         audit_ids=[1])
+
+        counts = purge.purge(30, batch_size=2, max_rows=7)
+
+        self.assertEqual({'actions': 5, 'action_plans': 2, 'audits': 0,
+                          'audit_templates': 0}, counts)
+        self.assertEqual([3, 4, 5],
+                         self.get_ids(self.dbapi.get_action_plan_list))
+
+    def test_purge_invalid_limits(self):
+        self.assertRaises(exception.Invalid, purge.purge, 30, batch_size=0)
+        self.assertRaises(exception.Invalid, purge.purge, 30, max_rows=-1)
+        self.assertEqual(dict.fromkeys(purge.TABLES, 0),
+                         purge.purge(0, max_rows=0))
+
+    def test_purge_dry_run(self):
+        self.soft_delete(self.now - datetime.timedelta(days=40),
+                         audit_ids=[1])
+        self.finish(5, self.now - datetime.timedelta(days=40))
+
+        with mock.patch.object(self.dbapi, 'purge_rows') as m_purge_rows:
+            counts = purge.purge(30, dry_run=True)
+            self.assertFalse(m_purge_rows.called)
+
+        self.assertEqual({'actions': 5, 'action_plans': 5, 'audits': 1,
+                          'audit_templates': 0}, counts)
+        self.assertEqual([1, 2, 3, 4, 5],
+                         self.get_ids(self.dbapi.get_action_list))
+        self.assertEqual(counts, purge.purge(30))
+
+    def test_count_purgeable_rows_referenced(self):
+        # the actions of an unfinished action plan are not purged
+        self.soft_delete(self.now - datetime.timedelta(days=40),
+                         audit_ids=[1])
+        self.dbapi.update_action(1, {'deleted_at': None, 'deleted': 0,
+                                     'state': 'PENDING'})
+        self.dbapi.update_action_plan(1, {'deleted_at': None, 'deleted': 0,
+                                          'state': 'ONGOING'})
+
+        older_than = self.now - datetime.timedelta(days=30)
+        self.assertEqual(4, self.dbapi.count_purgeable_rows(
+            'actions', older_than))
+        self.assertEqual(4, self.dbapi.count_purgeable_rows(
+            'action_plans', older_than))
+        self.assertEqual(0, self.dbapi.count_purgeable_rows(
+            'audits', older_than))
@@ -121,6 +121,7 @@ def get_test_action_plan(**kwargs):
         'state': kwargs.get('state', 'ONGOING'),
         'audit_id': kwargs.get('audit_id', 1),
         'first_action_id': kwargs.get('first_action_id', 1),
+        'hostname': kwargs.get('hostname'),
         'created_at': kwargs.get('created_at'),
         'updated_at': kwargs.get('updated_at'),
         'deleted_at': kwargs.get('deleted_at'),
@@ -19,6 +19,7 @@
 import uuid
 
 from watcher.decision_engine.model import hypervisor as modelhyp
+from watcher.decision_engine.model import resource
 from watcher.decision_engine.model import vm_state
 from watcher.tests import base
 from watcher.tests.decision_engine.strategy.strategies import \
@@ -110,3 +111,57 @@ class TestMapping(base.BaseTestCase):
         model.mapping.unmap_from_id(hyp0.uuid, vm0.uuid)
         self.assertEqual(len(model.mapping.get_node_vms_from_id(
             hyp0.uuid)), 0)
+
+    def test_get_node_usage(self):
+        fake_cluster = faker_cluster_state.FakerModelCollector()
+        model = fake_cluster.generate_scenario_3_with_2_hypervisors()
+        mapping = model.mapping
+        hyp0 = model.get_hypervisor_from_id('Node_0')
+        hyp1 = model.get_hypervisor_from_id('Node_1')
+        vm1 = model.get_vm_from_id(self.VM1_UUID)
+        cores = resource.ResourceType.cpu_cores
+
+        self.assertEqual(10, mapping.get_node_usage(hyp0, cores))
+        self.assertEqual(10, mapping.get_node_usage(hyp1, cores))
+        self.assertEqual(20, mapping.get_node_usage_from_id(
+            'Node_0', resource.ResourceType.disk))
+
+        mapping.migrate_vm(vm1, hyp0, hyp1)
+        self.assertEqual(0, mapping.get_node_usage(hyp0, cores))
+        self.assertEqual(20, mapping.get_node_usage(hyp1, cores))
+        # the totals were updated, not computed again
+        self.assertEqual(0, mapping.get_node_usage(
+            hyp0, resource.ResourceType.disk))
+
+    def test_get_node_usage_fork(self):
+        fake_cluster = faker_cluster_state.FakerModelCollector()
+        model = fake_cluster.generate_scenario_3_with_2_hypervisors()
+        hyp0 = model.get_hypervisor_from_id('Node_0')
+        cores = resource.ResourceType.cpu_cores
+        self.assertEqual(10, model.mapping.get_node_usage(hyp0, cores))
+
+        fork = model.fork()
+        fork.mapping.unmap_from_id('Node_0', self.VM1_UUID)
+        self.assertEqual(0, fork.mapping.get_node_usage(hyp0, cores))
+        self.assertEqual(10, model.mapping.get_node_usage(hyp0, cores))
+
+    def test_register_usage(self):
+        fake_cluster = faker_cluster_state.FakerModelCollector()
+        model = fake_cluster.generate_scenario_3_with_2_hypervisors()
+        mapping = model.mapping
+        hyp0 = model.get_hypervisor_from_id('Node_0')
+        hyp1 = model.get_hypervisor_from_id('Node_1')
+        vm1 = model.get_vm_from_id(self.VM1_UUID)
+        cpu_util = {self.VM1_UUID: 2.5, self.VM2_UUID: 4.0}
+
+        mapping.register_usage('cpu_util',
+                               lambda vm_uuid, model: cpu_util[vm_uuid])
+        self.assertEqual(2.5, mapping.get_node_usage(hyp0, 'cpu_util'))
+        self.assertEqual(4.0, mapping.get_node_usage(hyp1, 'cpu_util'))
+        mapping.migrate_vm(vm1, hyp0, hyp1)
+        self.assertEqual(0, mapping.get_node_usage(hyp0, 'cpu_util'))
+        self.assertEqual(6.5, mapping.get_node_usage(hyp1, 'cpu_util'))
+
+        # a new source invalidates the totals computed with the previous one
+        mapping.register_usage('cpu_util', lambda vm_uuid, model: 1)
+        self.assertEqual(2, mapping.get_node_usage(hyp1, 'cpu_util'))
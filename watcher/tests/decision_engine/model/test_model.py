@@ -23,6 +23,7 @@ from watcher.common.exception import IllegalArgumentException
 from watcher.decision_engine.model.hypervisor import Hypervisor
 from watcher.decision_engine.model.hypervisor_state import HypervisorState
 from watcher.decision_engine.model.model_root import ModelRoot
+from watcher.decision_engine.model import resource
 from watcher.tests import base
 from watcher.tests.decision_engine.strategy.strategies.faker_cluster_state import \
     FakerModelCollector
@@ -136,3 +137,56 @@ class TestModel(base.BaseTestCase):
         model = ModelRoot()
         self.assertRaises(IllegalArgumentException,
                           model.assert_vm, "valeur_qcq")
+
+    def test_fork(self):
+        fake_cluster = FakerModelCollector()
+        model = fake_cluster.generate_scenario_1()
+        fork = model.fork()
+
+        hyp0 = fork.get_hypervisor_from_id("Node_0")
+        hyp1 = fork.get_hypervisor_from_id("Node_1")
+        vm0 = fork.get_vm_from_id("VM_0")
+        self.assertTrue(fork.get_mapping().migrate_vm(vm0, hyp0, hyp1))
+        hyp0.state = HypervisorState.OFFLINE.value
+        fork.get_resource_from_id(
+            resource.ResourceType.cpu_cores).set_capacity(vm0, 1)
+
+        self.assertEqual("Node_0", model.get_mapping().get_node_from_vm_id(
+            "VM_0").uuid)
+        self.assertIn("VM_0",
+                      model.get_mapping().get_node_vms_from_id("Node_0"))
+        self.assertNotIn("VM_0",
+                         model.get_mapping().get_node_vms_from_id("Node_1"))
+        self.assertEqual(HypervisorState.ONLINE,
+                         model.get_hypervisor_from_id("Node_0").state)
+        self.assertEqual(10, model.get_resource_from_id(
+            resource.ResourceType.cpu_cores).get_capacity(vm0))
+        self.assertEqual(1, fork.get_resource_from_id(
+            resource.ResourceType.cpu_cores).get_capacity(vm0))
+
+    def test_several_forks(self):
+        fake_cluster = FakerModelCollector()
+        model = fake_cluster.generate_scenario_1()
+        fork1 = model.fork()
+        fork2 = model.fork()
+        vm0 = model.get_vm_from_id("VM_0")
+
+        fork1.get_mapping().migrate_vm(
+            vm0, fork1.get_hypervisor_from_id("Node_0"),
+            fork1.get_hypervisor_from_id("Node_1"))
+        fork2.get_mapping().migrate_vm(
+            vm0, fork2.get_hypervisor_from_id("Node_0"),
+            fork2.get_hypervisor_from_id("Node_2"))
+        # changes to the original model are not seen by the forks either
+        model.get_mapping().unmap_from_id("Node_0", "VM_1")
+
+        self.assertEqual("Node_1", fork1.get_mapping().get_node_from_vm_id(
+            "VM_0").uuid)
+        self.assertEqual("Node_2", fork2.get_mapping().get_node_from_vm_id(
+            "VM_0").uuid)
+        self.assertEqual("Node_0", model.get_mapping().get_node_from_vm_id(
+            "VM_0").uuid)
+        self.assertIn("VM_1",
+                      fork1.get_mapping().get_node_vms_from_id("Node_0"))
+        self.assertNotIn("VM_0",
+                         fork1.get_mapping().get_node_vms_from_id("Node_2"))
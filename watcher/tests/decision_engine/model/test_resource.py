@@ -0,0 +1,108 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import array
+import uuid
+
+from watcher.common import utils as w_utils
+from watcher.decision_engine.model import resource
+from watcher.decision_engine.model import vm as modelvm
+from watcher.tests import base
+from watcher.tests.decision_engine.strategy.strategies \
+    import faker_cluster_state
+
+
+class TestResource(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestResource, self).setUp()
+        self.resource = resource.Resource(resource.ResourceType.cpu_cores)
+        self.vms = []
+        for i in range(3):
+            vm = modelvm.VM()
+            vm.uuid = "VM_%d" % i
+            self.resource.set_capacity(vm, i + 1)
+            self.vms.append(vm)
+
+    def test_columns(self):
+        self.assertIsInstance(self.resource._values, array.array)
+        self.assertEqual([1, 2, 3], list(self.resource._values))
+
+    def test_non_integer_capacity(self):
+        self.resource.set_capacity(self.vms[0], 1.5)
+        self.assertEqual(1.5, self.resource.get_capacity(self.vms[0]))
+        self.assertEqual(2, self.resource.get_capacity(self.vms[1]))
+        self.assertEqual(6.5, self.resource.get_total_capacity_from_ids(
+            ["VM_0", "VM_1", "VM_2"]))
+
+    def test_bulk_accessors(self):
+        self.assertEqual(2, self.resource.get_capacity(self.vms[1]))
+        self.assertIsNone(self.resource.get_capacity_from_id("VM_unknown"))
+        self.assertEqual([1, None, 3], self.resource.get_capacities_from_ids(
+            ["VM_0", "VM_unknown", "VM_2"]))
+        self.assertEqual(6, self.resource.get_total_capacity_from_ids(
+            ["VM_0", "VM_1", "VM_2"]))
+        self.assertEqual(4, self.resource.get_total_capacity_from_ids(
+            ["VM_0", "VM_unknown", "VM_2"]))
+
+    def test_uuid_keys(self):
+        vm_uuid = w_utils.generate_uuid()
+        self.resource.set_capacity_from_id(uuid.UUID(vm_uuid), 4)
+        self.assertEqual(4, self.resource.get_capacity_from_id(vm_uuid))
+        self.assertEqual([4], self.resource.get_capacities_from_ids(
+            [uuid.UUID(vm_uuid)]))
+        self.assertEqual(5, self.resource.get_total_capacity_from_ids(
+            [uuid.UUID(vm_uuid), "VM_0"]))
+        self.assertTrue(self.resource.unset_capacity_from_id(
+            uuid.UUID(vm_uuid)))
+        self.assertNotIn(vm_uuid, self.resource.mapping)
+
+    def test_unset_capacity(self):
+        self.assertTrue(self.resource.unset_capacity(self.vms[0]))
+        self.assertFalse(self.resource.unset_capacity(self.vms[0]))
+        self.assertIsNone(self.resource.get_capacity(self.vms[0]))
+        self.assertEqual(2, self.resource.get_capacity(self.vms[1]))
+        self.assertEqual(3, self.resource.get_capacity(self.vms[2]))
+
+    def test_mapping(self):
+        self.assertEqual({"VM_0": 1, "VM_1": 2, "VM_2": 3},
+                         self.resource.mapping)
+        self.resource.mapping["VM_3"] = 4
+        self.assertEqual(4, self.resource.get_capacity_from_id("VM_3"))
+        del self.resource.mapping["VM_0"]
+        self.assertIsNone(self.resource.get_capacity(self.vms[0]))
+        self.assertEqual(3, len(self.resource.mapping))
+        self.assertRaises(KeyError, lambda: self.resource.mapping["VM_0"])
+
+    def test_fork(self):
+        fork = self.resource.fork()
+        fork.set_capacity(self.vms[0], 10)
+        self.resource.unset_capacity(self.vms[1])
+        self.assertEqual(1, self.resource.get_capacity(self.vms[0]))
+        self.assertEqual(10, fork.get_capacity(self.vms[0]))
+        self.assertEqual(2, fork.get_capacity(self.vms[1]))
+
+
+class TestModelCapacities(base.BaseTestCase):
+
+    def test_vectorized_accessors(self):
+        model = faker_cluster_state.FakerModelCollector().generate_scenario_1()
+        vms_cores = model.get_vms_capacities(resource.ResourceType.cpu_cores)
+        self.assertEqual(35, len(vms_cores))
+        self.assertEqual(10, vms_cores["VM_0"])
+        hypervisors_memory = model.get_hypervisors_capacities(
+            resource.ResourceType.memory)
+        self.assertEqual(dict(("Node_%d" % i, 132) for i in range(5)),
+                         hypervisors_memory)
@@ -16,6 +16,7 @@
 
 import mock
 
+from watcher.common import exception
 from watcher.common import utils
 from watcher.db import api as db_api
 from watcher.decision_engine.planner import default as pbase
@@ -115,6 +116,58 @@ class TestActionScheduling(base.DbTestCase):
         self.assertEqual(actions[0].action_type, "nop")
         self.assertEqual(actions[1].action_type, "migrate")
 
+    def test_schedule_actions_chained(self):
+        default_planner = pbase.DefaultPlanner()
+        audit = db_utils.create_test_audit(uuid=utils.generate_uuid())
+        solution = dsol.DefaultSolution()
+        for i in range(5):
+            solution.add_action(action_type="migrate",
+                                resource_id=utils.generate_uuid(),
+                                input_parameters={})
+        solution.add_action(action_type="nop", resource_id="",
+                            input_parameters={})
+
+        with mock.patch.object(
+                objects.Action.dbapi, "create_actions",
+                wraps=objects.Action.dbapi.create_actions) as m_create:
+            action_plan = default_planner.schedule(
+                self.context, audit.id, solution)
+        # the whole plan is written at once
+        self.assertEqual(1, m_create.call_count)
+
+        action_plan = objects.ActionPlan.get_by_id(self.context,
+                                                   action_plan.id)
+        filters = {'action_plan_id': action_plan.id}
+        actions = dict(
+            (a.id, a)
+            for a in objects.Action.list(self.context, filters=filters))
+        action_types = []
+        action_id = action_plan.first_action_id
+        while action_id is not None:
+            action_types.append(actions[action_id].action_type)
+            action_id = actions[action_id].next
+        self.assertEqual(["nop"] + ["migrate"] * 5, action_types)
+
+    @mock.patch.object(pbase.LOG, "exception")
+    def test_schedule_actions_failure(self, m_exception):
+        default_planner = pbase.DefaultPlanner()
+        audit = db_utils.create_test_audit(uuid=utils.generate_uuid())
+        solution = dsol.DefaultSolution()
+        for i in range(2):
+            solution.add_action(action_type="migrate",
+                                resource_id=utils.generate_uuid(),
+                                input_parameters={})
+
+        with mock.patch.object(
+                objects.Action.dbapi, "create_actions",
+                side_effect=exception.ActionAlreadyExists(uuid="uuid")):
+            self.assertRaises(exception.ActionAlreadyExists,
+                              default_planner.schedule,
+                              self.context, audit.id, solution)
+        # a single error is logged for the whole action plan
+        self.assertEqual(1, m_exception.call_count)
+        self.assertEqual(2, m_exception.call_args[0][1]['count'])
+
 
 class TestDefaultPlanner(base.DbTestCase):
     def setUp(self):
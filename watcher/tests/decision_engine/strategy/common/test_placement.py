@@ -0,0 +1,99 @@
+# -*- encoding: utf-8 -*-
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import random
+
+from watcher.decision_engine.strategy.common import placement
+from watcher.tests import base
+
+
+class TestPlacementEngine(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestPlacementEngine, self).setUp()
+        limits = {'cpu': 10, 'ram': 100}
+        self.engine = placement.PlacementEngine(['cpu', 'ram'], [
+            ('Node_0', limits, {'cpu': 9, 'ram': 10}),
+            ('Node_1', limits, {'cpu': 2, 'ram': 95}),
+            ('Node_2', limits, {'cpu': 6, 'ram': 50}),
+            ('Node_3', limits, {'cpu': 4, 'ram': 20}),
+        ])
+
+    def test_first_fit(self):
+        self.assertEqual('Node_0', self.engine.first_fit(
+            {'cpu': 1, 'ram': 1}))
+        self.assertEqual('Node_2', self.engine.first_fit(
+            {'cpu': 2, 'ram': 10}))
+        self.assertEqual('Node_3', self.engine.first_fit(
+            {'cpu': 2, 'ram': 10}, exclude=('Node_2',)))
+        self.assertIsNone(self.engine.first_fit({'cpu': 2, 'ram': 10},
+                                                count=2))
+        self.assertIsNone(self.engine.first_fit({'cpu': 9, 'ram': 10}))
+
+    def test_first_fit_check(self):
+        checked = []
+
+        def check(host_id):
+            checked.append(host_id)
+            return host_id == 'Node_3'
+
+        self.assertEqual('Node_3', self.engine.first_fit(
+            {'cpu': 2, 'ram': 10}, check=check))
+        # Node_0 and Node_1 are discarded by the index
+        self.assertEqual(['Node_2', 'Node_3'], checked)
+
+    def test_best_fit(self):
+        self.assertEqual('Node_2', self.engine.best_fit(
+            {'cpu': 3, 'ram': 10}))
+        self.assertEqual('Node_3', self.engine.best_fit(
+            {'cpu': 3, 'ram': 10}, exclude=('Node_2',)))
+        self.assertEqual('Node_1', self.engine.best_fit(
+            {'cpu': 8, 'ram': 5}))
+        self.assertIsNone(self.engine.best_fit({'cpu': 11, 'ram': 1}))
+
+    def test_move(self):
+        demand = {'cpu': 4, 'ram': 30}
+        self.assertEqual('Node_2', self.engine.first_fit(demand))
+        self.engine.move('Node_3', 'Node_2', {'cpu': 4, 'ram': 20})
+        self.assertEqual({'cpu': 0, 'ram': 30}, self.engine.get_free('Node_2'))
+        self.assertEqual({'cpu': 0, 'ram': 0}, self.engine.get_used('Node_3'))
+        self.assertEqual('Node_3', self.engine.first_fit(demand))
+        self.assertEqual('Node_3', self.engine.best_fit(demand))
+        self.assertFalse(self.engine.fits('Node_2', demand))
+
+    def test_same_as_linear_scan(self):
+        rand = random.Random(0)
+        hosts = [("Node_%d" % i, {'cpu': 40, 'ram': 128},
+                  {'cpu': rand.randint(0, 40), 'ram': rand.randint(0, 128)})
+                 for i in range(100)]
+        engine = placement.PlacementEngine(['cpu', 'ram'], hosts)
+        for _ in range(500):
+            demand = {'cpu': rand.randint(1, 8), 'ram': rand.randint(1, 32)}
+            fitting = [host_id for host_id, limits, used in hosts
+                       if engine.fits(host_id, demand)]
+            first = engine.first_fit(demand)
+            best = engine.best_fit(demand)
+            if not fitting:
+                self.assertIsNone(first)
+                self.assertIsNone(best)
+                continue
+            self.assertEqual(fitting[0], first)
+            self.assertEqual(
+                min(engine.get_free(host_id)['cpu'] for host_id in fitting),
+                engine.get_free(best)['cpu'])
+            src = rand.choice(hosts)[0]
+            if src != first and engine.get_used(src)['cpu'] >= demand[
+                    'cpu'] and engine.get_used(src)['ram'] >= demand['ram']:
+                engine.move(src, first, demand)
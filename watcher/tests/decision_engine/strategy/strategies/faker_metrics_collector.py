@@ -39,6 +39,14 @@ class FakerMetricsCollector(object):
             result = self.get_average_outlet_temperature(resource_id)
         return result
 
+    def mock_get_statistics_batch(self, resource_ids, meter_names, period,
+                                  aggregate='avg'):
+        return dict(((resource_id, meter_name),
+                     self.mock_get_statistics(resource_id, meter_name,
+                                              period, aggregate))
+                    for resource_id in resource_ids
+                    for meter_name in meter_names)
+
     def get_average_outlet_temperature(self, uuid):
         """The average outlet temperature for host"""
         mock = {}
@@ -189,6 +197,14 @@ class FakeCeilometerMetrics:
         elif meter_name == "disk.root.size":
             return self.get_vm_disk_root_size(resource_id)
 
+    def mock_get_statistics_batch(self, resource_ids, meter_names, period,
+                                  aggregate='avg'):
+        return dict(((resource_id, meter_name),
+                     self.mock_get_statistics(resource_id, meter_name,
+                                              period, aggregate))
+                    for resource_id in resource_ids
+                    for meter_name in meter_names)
+
     def get_hypervisor_cpu_util(self, r_id):
         '''
         Calculates hypervisor utilization dynamicaly.
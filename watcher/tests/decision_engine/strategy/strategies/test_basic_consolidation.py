@@ -22,6 +22,7 @@ import mock
 from watcher.applier.actions.loading import default
 from watcher.common import exception
 from watcher.decision_engine.model import model_root
+from watcher.decision_engine.model import resource
 from watcher.decision_engine.strategy import strategies
 from watcher.tests import base
 from watcher.tests.decision_engine.strategy.strategies \
@@ -47,7 +48,9 @@ class TestBasicConsolidation(base.BaseTestCase):
         cluster = self.fake_cluster.generate_scenario_1()
         sercon = strategies.BasicConsolidation()
         sercon.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
 
         node_1_score = 0.023333333333333317
         self.assertEqual(
@@ -69,7 +72,9 @@ class TestBasicConsolidation(base.BaseTestCase):
         cluster = self.fake_cluster.generate_scenario_1()
         sercon = strategies.BasicConsolidation()
         sercon.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         vm_0 = cluster.get_vm_from_id("VM_0")
         vm_0_score = 0.023333333333333317
         self.assertEqual(sercon.calculate_score_vm(vm_0, cluster), vm_0_score)
@@ -92,7 +97,9 @@ class TestBasicConsolidation(base.BaseTestCase):
         cluster = self.fake_cluster.generate_scenario_5_with_vm_disk_0()
         sercon = strategies.BasicConsolidation()
         sercon.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         vm_0 = cluster.get_vm_from_id("VM_0")
         vm_0_score = 0.023333333333333355
         self.assertEqual(sercon.calculate_score_vm(vm_0, cluster), vm_0_score)
@@ -101,7 +108,9 @@ class TestBasicConsolidation(base.BaseTestCase):
         cluster = self.fake_cluster.generate_scenario_1()
         sercon = strategies.BasicConsolidation()
         sercon.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         vm_0 = cluster.get_vm_from_id("VM_0")
         cores = 16
         # 80 Go
@@ -113,6 +122,81 @@ class TestBasicConsolidation(base.BaseTestCase):
                                                  mem),
                          vm_0_weight_assert)
 
+    def _score_one_by_one(self, sercon, cluster, elements, metric_name):
+        # the scores as computed for a single element at a time
+        scores = []
+        for element in elements:
+            if metric_name == sercon.HOST_CPU_USAGE_METRIC_NAME:
+                cpu_util = self.fake_metrics.mock_get_statistics(
+                    sercon.get_node_resource_id(element), metric_name,
+                    "7200")
+                cores_used = cluster.get_resource_from_id(
+                    resource.ResourceType.cpu_cores).get_capacity(
+                        element) * (cpu_util / 100)
+            else:
+                cpu_util = self.fake_metrics.mock_get_statistics(
+                    element.uuid, metric_name, "7200")
+                cores_used = cluster.get_resource_from_id(
+                    resource.ResourceType.cpu_cores).get_capacity(
+                        element) * (cpu_util / 100.0)
+            scores.append(sercon.calculate_weight(cluster, element,
+                                                  cores_used, 0, 0))
+        return scores
+
+    def test_calculate_scores_batch(self):
+        fake_cluster = self.fake_cluster
+        for cluster in (fake_cluster.generate_scenario_1(),
+                        fake_cluster.generate_scenario_5_with_vm_disk_0()):
+            sercon = strategies.BasicConsolidation()
+            sercon.ceilometer = mock.MagicMock(
+                statistic_aggregation=self.fake_metrics.mock_get_statistics,
+                statistic_aggregation_batch=(
+                    self.fake_metrics.mock_get_statistics_batch))
+            sercon.prefetch_metrics(cluster)
+
+            hypervisors = list(cluster.get_all_hypervisors().values())
+            self.assertEqual(
+                self._score_one_by_one(sercon, cluster, hypervisors,
+                                       sercon.HOST_CPU_USAGE_METRIC_NAME),
+                sercon.calculate_score_nodes(hypervisors, cluster))
+
+            vms = list(cluster.get_all_vms().values())
+            self.assertEqual(
+                self._score_one_by_one(sercon, cluster, vms,
+                                       sercon.INSTANCE_CPU_USAGE_METRIC_NAME),
+                sercon.calculate_score_vms(vms, cluster))
+
+    def test_execute_batch_scoring(self):
+        def calculate_score_nodes(hypervisors, model):
+            return [self._score_one_by_one(
+                sercon, model, [hypervisor],
+                sercon.HOST_CPU_USAGE_METRIC_NAME)[0]
+                for hypervisor in hypervisors]
+
+        def calculate_score_vms(vms, model):
+            return [self._score_one_by_one(
+                sercon, model, [vm], sercon.INSTANCE_CPU_USAGE_METRIC_NAME)[0]
+                for vm in vms]
+
+        for generate_scenario in (
+                self.fake_cluster.generate_scenario_1,
+                self.fake_cluster.generate_scenario_3_with_2_hypervisors,
+                self.fake_cluster.generate_scenario_5_with_vm_disk_0):
+            solutions = []
+            for one_by_one in (False, True):
+                sercon = strategies.BasicConsolidation()
+                sercon.ceilometer = mock.MagicMock(
+                    statistic_aggregation=(
+                        self.fake_metrics.mock_get_statistics),
+                    statistic_aggregation_batch=(
+                        self.fake_metrics.mock_get_statistics_batch))
+                if one_by_one:
+                    sercon.calculate_score_nodes = calculate_score_nodes
+                    sercon.calculate_score_vms = calculate_score_vms
+                solutions.append(
+                    sercon.execute(generate_scenario()).actions)
+            self.assertEqual(solutions[0], solutions[1])
+
     def test_calculate_migration_efficacy(self):
         sercon = strategies.BasicConsolidation()
         sercon.calculate_migration_efficacy()
@@ -133,7 +217,9 @@ class TestBasicConsolidation(base.BaseTestCase):
         metrics.empty_one_metric("CPU_COMPUTE")
         sercon = strategies.BasicConsolidation()
         sercon.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
 
         self.assertRaises(exception.ClusterStateNotDefined,
                           sercon.calculate_score_vm, "VM_1", None)
@@ -172,7 +258,9 @@ class TestBasicConsolidation(base.BaseTestCase):
     def test_basic_consolidation_migration(self):
         sercon = strategies.BasicConsolidation()
         sercon.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
 
         solution = sercon.execute(
             self.fake_cluster.generate_scenario_3_with_2_hypervisors())
@@ -193,7 +281,9 @@ class TestBasicConsolidation(base.BaseTestCase):
     def test_execute_no_workload(self):
         sercon = strategies.BasicConsolidation()
         sercon.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
 
         current_state_cluster = faker_cluster_state.FakerModelCollector()
         model = current_state_cluster. \
@@ -209,7 +299,9 @@ class TestBasicConsolidation(base.BaseTestCase):
     def test_check_parameters(self):
         sercon = strategies.BasicConsolidation()
         sercon.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         solution = sercon.execute(
             self.fake_cluster.generate_scenario_3_with_2_hypervisors())
         loader = default.DefaultActionLoader()
@@ -57,7 +57,9 @@ class TestOutletTempControl(base.BaseTestCase):
         model = self.fake_cluster.generate_scenario_3_with_2_hypervisors()
         strategy = strategies.OutletTempControl()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         h1, h2 = strategy.group_hosts_by_outlet_temp(model)
         self.assertEqual(h1[0]['hv'].uuid, 'Node_1')
         self.assertEqual(h2[0]['hv'].uuid, 'Node_0')
@@ -66,7 +68,9 @@ class TestOutletTempControl(base.BaseTestCase):
         model = self.fake_cluster.generate_scenario_3_with_2_hypervisors()
         strategy = strategies.OutletTempControl()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         h1, h2 = strategy.group_hosts_by_outlet_temp(model)
         vm_to_mig = strategy.choose_vm_to_migrate(model, h1)
         self.assertEqual(vm_to_mig[0].uuid, 'Node_1')
@@ -77,7 +81,9 @@ class TestOutletTempControl(base.BaseTestCase):
         model = self.fake_cluster.generate_scenario_3_with_2_hypervisors()
         strategy = strategies.OutletTempControl()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         h1, h2 = strategy.group_hosts_by_outlet_temp(model)
         vm_to_mig = strategy.choose_vm_to_migrate(model, h1)
         dest_hosts = strategy.filter_dest_servers(model, h2, vm_to_mig[1])
@@ -97,14 +103,18 @@ class TestOutletTempControl(base.BaseTestCase):
     def test_execute_cluster_empty(self):
         strategy = strategies.OutletTempControl()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         model = model_root.ModelRoot()
         self.assertRaises(exception.ClusterEmpty, strategy.execute, model)
 
     def test_execute_no_workload(self):
         strategy = strategies.OutletTempControl()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
 
         current_state_cluster = faker_cluster_state.FakerModelCollector()
         model = current_state_cluster. \
@@ -116,7 +126,9 @@ class TestOutletTempControl(base.BaseTestCase):
     def test_execute(self):
         strategy = strategies.OutletTempControl()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         model = self.fake_cluster.generate_scenario_3_with_2_hypervisors()
         solution = strategy.execute(model)
         actions_counter = collections.Counter(
@@ -128,7 +140,9 @@ class TestOutletTempControl(base.BaseTestCase):
     def test_check_parameters(self):
         outlet = strategies.OutletTempControl()
         outlet.ceilometer = mock.MagicMock(
-            statistic_aggregation=self.fake_metrics.mock_get_statistics)
+            statistic_aggregation=self.fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                self.fake_metrics.mock_get_statistics_batch))
         model = self.fake_cluster.generate_scenario_3_with_2_hypervisors()
         solution = outlet.execute(model)
         loader = default.DefaultActionLoader()
@@ -17,6 +17,8 @@ from watcher.tests import base
 
 import mock
 
+from watcher.common import exception
+from watcher.decision_engine.model import vm_state
 from watcher.decision_engine.strategy.strategies.smart_consolidation import \
     SmartStrategy
 from watcher.tests.decision_engine.strategy.strategies \
@@ -33,7 +35,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(cluster)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         vm_0 = cluster.get_vm_from_id("VM_0")
         vm_util = dict(cpu=1.0, ram=1, disk=10)
         self.assertEqual(vm_util,
@@ -44,7 +48,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(cluster)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         node_0 = cluster.get_hypervisor_from_id("Node_0")
         node_util = dict(cpu=1.0, ram=1, disk=10)
         self.assertEqual(node_util,
@@ -55,7 +61,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(cluster)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         node_0 = cluster.get_hypervisor_from_id("Node_0")
         node_util = dict(cpu=40, ram=64, disk=250)
         self.assertEqual(node_util,
@@ -66,7 +74,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         hypervisor = model.get_hypervisor_from_id('Node_0')
         rhu = strategy.get_relative_hypervisor_utilization(hypervisor, model)
         expected_rhu = {'disk': 0.04, 'ram': 0.015625, 'cpu': 0.025}
@@ -77,7 +87,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         cru = strategy.get_relative_cluster_utilization(model)
         expected_cru = {'cpu': 0.05, 'disk': 0.05, 'ram': 0.0234375}
         self.assertEqual(expected_cru, cru)
@@ -87,7 +99,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         h1 = model.get_hypervisor_from_id('Node_0')
         h2 = model.get_hypervisor_from_id('Node_1')
         vm_uuid = 'VM_0'
@@ -100,12 +114,29 @@ class TestSmartConsolidation(base.BaseTestCase):
                                          'resource_id': vm_uuid}}
         self.assertEqual(expected, strategy.solution.actions[0])
 
+    def test_add_migration_stopped_vm(self):
+        model = self.fake_cluster.generate_scenario_1()
+        strategy = SmartStrategy()
+        h1 = model.get_hypervisor_from_id('Node_0')
+        h2 = model.get_hypervisor_from_id('Node_1')
+        model.get_vm_from_id('VM_0').state = vm_state.VMState.STOPPED.value
+        strategy.add_migration('VM_0', h1, h2, model)
+        self.assertEqual(
+            'non_live',
+            strategy.solution.actions[0]['input_parameters']['migration_type'])
+
+        model.get_vm_from_id('VM_1').state = vm_state.VMState.ERROR
+        self.assertRaises(exception.WatcherException,
+                          strategy.add_migration, 'VM_1', h1, h2, model)
+
     def test_is_overloaded(self):
         strategy = SmartStrategy()
         model = self.fake_cluster.generate_scenario_1()
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         h1 = model.get_hypervisor_from_id('Node_0')
         cc = {'cpu': 1.0, 'ram': 1.0, 'disk': 1.0}
         res = strategy.is_overloaded(h1, model, cc)
@@ -124,7 +155,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         h = model.get_hypervisor_from_id('Node_1')
         vm_uuid = 'VM_0'
         cc = {'cpu': 1.0, 'ram': 1.0, 'disk': 1.0}
@@ -140,7 +173,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         h = model.get_hypervisor_from_id('Node_0')
         strategy.activate_hypervisor(h)
         expected = [{'action_type': 'change_nova_service_state',
@@ -153,7 +188,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         h = model.get_hypervisor_from_id('Node_0')
         strategy.deactivate_hypervisor(h)
         expected = [{'action_type': 'change_nova_service_state',
@@ -166,7 +203,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         h1 = model.get_hypervisor_from_id('Node_0')
         h2 = model.get_hypervisor_from_id('Node_1')
         vm_uuid = 'VM_0'
@@ -188,7 +227,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         cc = {'cpu': 1.0, 'ram': 1.0, 'disk': 1.0}
         strategy.offload_phase(model, cc)
         expected = []
@@ -199,7 +240,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         h1 = model.get_hypervisor_from_id('Node_0')
         h2 = model.get_hypervisor_from_id('Node_1')
         vm_uuid = 'VM_0'
@@ -217,7 +260,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         h1 = model.get_hypervisor_from_id('Node_0')
         h2 = model.get_hypervisor_from_id('Node_1')
         cc = {'cpu': 1.0, 'ram': 1.0, 'disk': 1.0}
@@ -250,7 +295,9 @@ class TestSmartConsolidation(base.BaseTestCase):
         fake_metrics = faker_metrics_collector.FakeCeilometerMetrics(model)
         strategy = SmartStrategy()
         strategy.ceilometer = mock.MagicMock(
-            statistic_aggregation=fake_metrics.mock_get_statistics)
+            statistic_aggregation=fake_metrics.mock_get_statistics,
+            statistic_aggregation_batch=(
+                fake_metrics.mock_get_statistics_batch))
         h1 = model.get_hypervisor_from_id('Node_0')
         h2 = model.get_hypervisor_from_id('Node_1')
         cc = {'cpu': 1.0, 'ram': 1.0, 'disk': 1.0}
@@ -72,6 +72,25 @@ class TestActionObject(base.DbTestCase):
             mock_create_action.assert_called_once_with(self.fake_action)
             self.assertEqual(self.context, action._context)
 
+    def test_bulk_create(self):
+        fake_actions = [utils.get_test_action(id=i, next=None)
+                        for i in range(1, 3)]
+        fake_actions[0]['next'] = 2
+        with mock.patch.object(self.dbapi, 'create_actions',
+                               autospec=True) as mock_create_actions:
+            mock_create_actions.return_value = fake_actions
+            actions = [objects.Action(self.context, uuid=a['uuid'])
+                       for a in fake_actions]
+
+            created = objects.Action.bulk_create(self.context, actions,
+                                                 chain=True)
+            mock_create_actions.assert_called_once_with(
+                [{'uuid': a['uuid']} for a in fake_actions], chain=True)
+            self.assertEqual(actions, created)
+            self.assertEqual([1, 2], [a.id for a in created])
+            self.assertEqual([2, None], [a.next for a in created])
+            self.assertEqual(set(), created[0].obj_what_changed())
+
     def test_destroy(self):
         uuid = self.fake_action['uuid']
         with mock.patch.object(self.dbapi, 'get_action_by_uuid',
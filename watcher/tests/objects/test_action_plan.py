@@ -121,3 +121,19 @@ class TestActionPlanObject(base.DbTestCase):
             self.assertEqual("second state", action_plan.state)
             self.assertEqual(expected, mock_get_action_plan.call_args_list)
             self.assertEqual(self.context, action_plan._context)
+
+    def test_soft_delete(self):
+        uuid = self.fake_action_plan['uuid']
+        with mock.patch.object(self.dbapi, 'get_action_plan_by_uuid',
+                               autospec=True) as m_get_action_plan:
+            m_get_action_plan.return_value = self.fake_action_plan
+            with mock.patch.object(self.dbapi, 'soft_delete_action_plans',
+                                   autospec=True) as mock_soft_delete:
+                action_plan = objects.ActionPlan.get_by_uuid(
+                    self.context, uuid)
+                action_plan.soft_delete()
+                mock_soft_delete.assert_called_once_with(
+                    [self.fake_action_plan['id']])
+                self.assertEqual(objects.action_plan.State.DELETED,
+                                 action_plan.state)
+                self.assertEqual(set(), action_plan.obj_what_changed())
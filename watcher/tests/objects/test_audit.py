@@ -116,3 +116,41 @@ class TestAuditObject(base.DbTestCase):
             self.assertEqual("second state", audit.state)
             self.assertEqual(expected, mock_get_audit.call_args_list)
             self.assertEqual(self.context, audit._context)
+
+    def test_soft_delete(self):
+        uuid = self.fake_audit['uuid']
+        with mock.patch.object(self.dbapi, 'get_audit_by_uuid',
+                               autospec=True) as mock_get_audit:
+            mock_get_audit.return_value = self.fake_audit
+            with mock.patch.object(self.dbapi, 'soft_delete_audits',
+                                   autospec=True) as mock_soft_delete:
+                audit = objects.Audit.get_by_uuid(self.context, uuid)
+                audit.soft_delete()
+                mock_soft_delete.assert_called_once_with(
+                    [self.fake_audit['id']])
+                self.assertEqual(objects.audit.State.DELETED, audit.state)
+                self.assertEqual(set(), audit.obj_what_changed())
+
+    def test_soft_delete_cascade(self):
+        audit = utils.create_test_audit()
+        utils.create_test_action_plan(audit_id=audit.id)
+        utils.create_test_action()
+        # the action plan of another audit is kept
+        other_audit = utils.create_test_audit(
+            id=2, uuid='f8e47706-efcf-49a4-a5c4-af604eb492f2',
+            state='PENDING')
+        utils.create_test_action_plan(
+            id=2, uuid='a1a85d4e-3e07-4c6b-96fd-1e6dc2a5dcb1',
+            audit_id=other_audit.id)
+
+        objects.Audit.get_by_uuid(self.context, audit.uuid).soft_delete()
+
+        self.context.show_deleted = True
+        for obj_class, obj_id, state in [
+                (objects.Audit, 1, 'DELETED'),
+                (objects.ActionPlan, 1, 'DELETED'),
+                (objects.Action, 1, 'DELETED'),
+                (objects.Audit, 2, 'PENDING'),
+                (objects.ActionPlan, 2, 'ONGOING')]:
+            self.assertEqual(
+                state, obj_class.get_by_id(self.context, obj_id).state)
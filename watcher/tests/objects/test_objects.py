@@ -586,3 +586,15 @@ class TestObjectSerializer(test_base.TestCase):
             self.assertEqual(1, len(thing2))
             for item in thing2:
                 self.assertIsInstance(item, MyObj)
+
+
+class TestWriteListeners(test_base.TestCase):
+
+    def test_notify_write(self):
+        written = []
+        self.addCleanup(base._write_listeners.remove, written.append)
+        base.add_write_listener(written.append)
+        base.add_write_listener(written.append)
+
+        base.notify_write('MyObj')
+        self.assertEqual(['MyObj'], written)